@@ -0,0 +1,93 @@
+import argparse
+import logging
+import os
+import pickle
+import time
+from typing import List, Callable
+
+from logrec.dataprep.model import serialization
+from logrec.dataprep.parse_projects import EXTENSION
+from logrec.dataprep.parsed_file import ParsedFile
+from logrec.util.compression import CODECS, Codec, get_codec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RECORDS = 10000
+
+
+def dump_pickle(token_list) -> bytes:
+    return pickle.dumps(token_list, pickle.HIGHEST_PROTOCOL)
+
+
+SERIALIZATIONS = {
+    'compact': (serialization.encode, serialization.decode),
+    'pickle': (dump_pickle, pickle.loads),
+}
+
+
+def load_records(path: str, max_records: int, dump: Callable) -> List[bytes]:
+    """
+    :return: serialized token lists from the parsed file at `path` or from all the parsed files in the directory
+    """
+    if os.path.isdir(path):
+        parsed_files = sorted(os.path.join(root, file) for root, _, files in os.walk(path)
+                              for file in files if file.endswith(f'.{EXTENSION}'))
+    else:
+        parsed_files = [path]
+    records = []
+    for parsed_file in parsed_files:
+        with ParsedFile(parsed_file) as f:
+            for token_list in f:
+                records.append(dump(token_list))
+                if len(records) == max_records:
+                    return records
+    return records
+
+
+def benchmark_codec(codec: Codec, records: List[bytes], load: Callable) -> None:
+    total_size = sum(len(record) for record in records)
+
+    start = time.perf_counter()
+    compressed = [codec.compress(record) for record in records]
+    compression_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for record in compressed:
+        codec.decompress(record)
+    decompression_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for record in compressed:
+        load(codec.decompress(record))
+    loading_time = time.perf_counter() - start
+
+    compressed_size = sum(len(record) for record in compressed)
+    mb = total_size / 1024 / 1024
+    print(f'{codec.name:<8} {compressed_size / total_size * 100:>7.2f}% '
+          f'{mb / compression_time:>12.1f} {mb / decompression_time:>14.1f} {mb / loading_time:>17.1f}')
+
+
+def run(path: str, codecs: List[str], max_records: int, serialization_name: str) -> None:
+    dump, load = SERIALIZATIONS[serialization_name]
+    records = load_records(path, max_records, dump)
+    total_size = sum(len(record) for record in records)
+    print(f'{len(records)} token lists, {total_size / 1024 / 1024:.2f} MB serialized ({serialization_name})')
+    print(f'{"codec":<8} {"size":>8} {"compr. MB/s":>12} {"decompr. MB/s":>14} {"decompr.+load":>17}')
+    for codec in codecs:
+        benchmark_codec(get_codec(codec), records, load)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compares the codecs that token lists in parsed files '
+                                                 'can be compressed with. Throughput is measured '
+                                                 'in MB of serialized token lists per second.')
+    parser.add_argument('path', help='parsed file or directory with parsed files')
+    parser.add_argument('--codecs', nargs='+', choices=[codec.name for codec in CODECS],
+                        default=[codec.name for codec in CODECS])
+    parser.add_argument('--max-records', type=int, default=DEFAULT_MAX_RECORDS,
+                        help='maximum number of token lists to benchmark on')
+    parser.add_argument('--serialization', choices=list(SERIALIZATIONS.keys()), default='compact',
+                        help='how token lists are serialized before they are compressed')
+    args = parser.parse_args()
+
+    run(args.path, args.codecs, args.max_records, args.serialization)
@@ -0,0 +1,60 @@
+import argparse
+import logging
+import os
+import time
+from typing import List, Tuple
+
+from logrec.dataprep.parse_projects import decode_file_contents
+from logrec.dataprep.preprocessors.general import from_file, replace_4whitespaces_with_tabs, spl_verbose
+from logrec.dataprep.preprocessors.java import process_numeric_literals
+from logrec.dataprep.preprocessors.lexer import tokenize_verbose
+from logrec.util.files import list_files
+
+logger = logging.getLogger(__name__)
+
+
+def load_token_lists(path: str) -> Tuple[List[List], int]:
+    """
+    :return: token lists of the java files in `path` as they are passed to the lexer by parse_projects,
+    and the total size of the files
+    """
+    token_lists = []
+    total_size = 0
+    for file in list_files(path):
+        with open(file.path, 'rb') as f:
+            contents = f.read()
+        lines = decode_file_contents(contents, file.path)
+        if lines is None:
+            continue
+        total_size += len(contents)
+        token_lists.append(replace_4whitespaces_with_tabs(process_numeric_literals(from_file(lines), {}), {}))
+    return token_lists, total_size
+
+
+def benchmark(name: str, func, token_lists: List[List], total_size: int, repeat: int) -> List[List]:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [func(token_list, {}) for token_list in token_lists]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{name:<16} {best:>8.2f} s {total_size / 1024 / 1024 / best:>8.2f} MB/s')
+    return result
+
+
+def run(path: str, repeat: int) -> None:
+    token_lists, total_size = load_token_lists(path)
+    print(f'{len(token_lists)} files, {total_size / 1024 / 1024:.2f} MB')
+    expected = benchmark('spl_verbose', spl_verbose, token_lists, total_size, repeat)
+    actual = benchmark('tokenize_verbose', tokenize_verbose, token_lists, total_size, repeat)
+    if actual != expected:
+        raise AssertionError('Token lists produced by the lexer differ from the ones produced by spl_verbose')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compares the throughput of the lexer with the one of spl_verbose.')
+    parser.add_argument('path', help='directory with java files, e.g. a raw dataset')
+    parser.add_argument('--repeat', type=int, default=3, help='the best time out of this number of runs is reported')
+    args = parser.parse_args()
+
+    run(os.path.abspath(args.path), args.repeat)
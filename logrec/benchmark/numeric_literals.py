@@ -0,0 +1,72 @@
+import argparse
+import logging
+import os
+import re
+import time
+from typing import List, Callable
+
+from logrec.dataprep.model.word import ParseableToken
+from logrec.dataprep.parse_projects import decode_file_contents
+from logrec.dataprep.preprocessors.general import from_file, replace_4whitespaces_with_tabs
+from logrec.dataprep.preprocessors.java import process_numeric_literals, is_number
+from logrec.dataprep.preprocessors.lexer import tokenize_verbose
+from logrec.util.files import list_files
+
+logger = logging.getLogger(__name__)
+
+
+def load_lines(path: str) -> List[str]:
+    """
+    :return: lines of the java files in `path` as they are passed to `process_numeric_literals` by parse_projects
+    """
+    lines = []
+    for file in list_files(path):
+        with open(file.path, 'rb') as f:
+            lines_from_file = decode_file_contents(f.read(), file.path)
+        if lines_from_file is not None:
+            lines.extend(str(token) for token in from_file(lines_from_file) if isinstance(token, ParseableToken))
+    return lines
+
+
+def benchmark(name: str, func: Callable, items: List, repeat: int) -> None:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(items)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    per_item = best / len(items) * 1e6 if items else 0.0
+    print(f'{name:<36} {len(items):>10} {best:>8.3f} s {per_item:>8.3f} us')
+
+
+def process_lines(lines: List[str]) -> None:
+    process_numeric_literals([ParseableToken(line) for line in lines], {})
+
+
+def check_numbers(tokens: List[str]) -> None:
+    for token in tokens:
+        is_number(token)
+
+
+def run(path: str, repeat: int) -> None:
+    lines = load_lines(path)
+    lines_with_digits = [line for line in lines if re.search('[0-9]', line)]
+    lines_without_digits = [line for line in lines if not re.search('[0-9]', line)]
+    tokens = [token for token in tokenize_verbose(replace_4whitespaces_with_tabs(
+        process_numeric_literals([ParseableToken(line) for line in lines], {}), {}), {}) if isinstance(token, str)]
+
+    print(f'{"":<36} {"items":>10} {"time":>10} {"per item":>11}')
+    benchmark('process_numeric_literals: all lines', process_lines, lines, repeat)
+    benchmark('  lines with digits', process_lines, lines_with_digits, repeat)
+    benchmark('  lines without digits', process_lines, lines_without_digits, repeat)
+    benchmark('is_number: tokens', check_numbers, tokens, repeat)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measures the time numeric literals are looked for in a line '
+                                                 'and the time taken to check if a token is a number.')
+    parser.add_argument('path', help='directory with java files, e.g. a raw dataset')
+    parser.add_argument('--repeat', type=int, default=3, help='the best time out of this number of runs is reported')
+    args = parser.parse_args()
+
+    run(os.path.abspath(args.path), args.repeat)
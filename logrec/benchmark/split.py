@@ -0,0 +1,54 @@
+import argparse
+import logging
+import os
+import time
+from typing import List
+
+from logrec.benchmark.lexer import load_token_lists
+from logrec.dataprep.preprocessors import split
+from logrec.dataprep.preprocessors.lexer import tokenize_verbose
+
+logger = logging.getLogger(__name__)
+
+
+def benchmark(name: str, token_lists: List[List], total_size: int, repeat: int, cached: bool) -> List[List]:
+    best = None
+    for _ in range(repeat):
+        if cached:
+            # every run starts with an empty cache as a newly started process does
+            split.split_identifier.cache_clear()
+        start = time.perf_counter()
+        result = [split.simple_split(token_list, {}) for token_list in token_lists]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{name:<10} {best:>8.2f} s {total_size / 1024 / 1024 / best:>8.2f} MB/s')
+    return result
+
+
+def run(path: str, repeat: int) -> None:
+    token_lists, total_size = load_token_lists(path)
+    token_lists = [tokenize_verbose(token_list, {}) for token_list in token_lists]
+    print(f'{len(token_lists)} files, {total_size / 1024 / 1024:.2f} MB')
+
+    cached_split_identifier = split.split_identifier
+    split.split_identifier = cached_split_identifier.__wrapped__
+    try:
+        expected = benchmark('no cache', token_lists, total_size, repeat, cached=False)
+    finally:
+        split.split_identifier = cached_split_identifier
+    actual = benchmark('cache', token_lists, total_size, repeat, cached=True)
+    cache_info = split.split_identifier.cache_info()
+    print(f'Cache hit rate: {split.split_cache_hit_rate() * 100:.1f}% '
+          f'({cache_info.currsize} identifiers cached, at most {cache_info.maxsize})')
+    if actual != expected:
+        raise AssertionError('Token lists split with the cache differ from the ones split without it')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compares the throughput of simple_split '
+                                                 'with and without the cache of identifier splittings.')
+    parser.add_argument('path', help='directory with java files, e.g. a raw dataset or a project in it')
+    parser.add_argument('--repeat', type=int, default=3, help='the best time out of this number of runs is reported')
+    args = parser.parse_args()
+
+    run(os.path.abspath(args.path), args.repeat)
@@ -0,0 +1,49 @@
+import argparse
+import gc
+import logging
+import time
+import tracemalloc
+
+from logrec.dataprep.parse_projects import decode_file_contents
+from logrec.dataprep.preprocessors import apply_preprocessors
+from logrec.dataprep.preprocessors.general import from_file
+from logrec.dataprep.preprocessors.preprocessor_list import pp_params
+
+logger = logging.getLogger(__name__)
+
+
+def run(path: str, copies: int, streaming: bool) -> None:
+    with open(path, 'rb') as f:
+        contents = f.read() * copies
+    lines = decode_file_contents(contents, path)
+    # loads dictionaries etc. so that they are not counted
+    apply_preprocessors(from_file(lines[:100]), pp_params["preprocessors"], {'interesting_context_words': []})
+
+    gc.collect()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    token_list = apply_preprocessors(from_file(lines), pp_params["preprocessors"], {'interesting_context_words': []},
+                                     streaming=streaming)
+    elapsed = time.perf_counter() - start_time
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    source_mb = len(contents) / 1024 / 1024
+    print(f'Source: {source_mb:.2f} MB, {len(lines)} lines, {len(token_list)} top-level tokens')
+    print(f'Token list: {retained / 1024 / 1024:.2f} MB ({retained / len(contents):.1f} bytes per source byte), '
+          f'peak while parsing: {peak / 1024 / 1024:.2f} MB')
+    print(f'Parsing time (slowed down by tracing): {elapsed:.2f} s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measures the memory taken by the token list of a source file '
+                                                 'after it has been run through the preprocessors of parse_projects.')
+    parser.add_argument('path', help='java file')
+    parser.add_argument('--copies', type=int, default=1,
+                        help='the file is concatenated with itself this number of times to get a large file')
+    parser.add_argument('--streaming', action='store_true',
+                        help='tokens go through the preprocessors one by one where possible')
+    args = parser.parse_args()
+
+    run(args.path, args.copies, args.streaming)
@@ -1,13 +1,15 @@
 from logrec.dataprep.prepconfig import PrepConfig
 from logrec.dataprep.preprocessors.preprocessor_list import pp_params
-from logrec.dataprep.preprocessors import apply_preprocessors
+from logrec.dataprep.preprocessors import PreprocessingPlan
 from logrec.dataprep.preprocessors.general import from_string
 from logrec.dataprep.to_repr import init_splitting_config, to_repr
 from logrec.properties import DEFAULT_DATASET, DEFAULT_BPE_BASE_REPR, DEFAULT_BPE_N_MERGES
 
+preprocessing_plan = PreprocessingPlan(pp_params["preprocessors"])
+
 
 def preprocess(s, r):
-    parsed = apply_preprocessors(from_string(s), pp_params["preprocessors"], {
+    parsed = preprocessing_plan.apply(from_string(s), {
         'interesting_context_words': []
     })
     params = PrepConfig.from_encoded_string(r)
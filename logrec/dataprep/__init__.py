@@ -15,5 +15,6 @@ CLASSIFICATION_DIR = 'classification'
 BPE_DIR = 'bpe'
 
 TEXT_FIELD_FILE = 'TEXT.pkl'
+COMPACT_VOCAB_FILE = 'TEXT.vocab'
 
 MODELS_DIR = 'models'
@@ -0,0 +1,110 @@
+import logging
+import os
+import struct
+from array import array
+from collections import Counter, defaultdict
+from typing import List, Tuple, Dict
+
+from torchtext.data import Field
+from torchtext.vocab import Vocab, _default_unk_index
+
+from logrec.dataprep.model.placeholders import placeholders
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'LRVOCAB\0'
+VERSION = 1
+# magic, version, number of words, size of utf-8 encoded words
+HEADER = struct.Struct('<8sIQQ')
+HEADER_SIZE = 32  # HEADER.size padded to 8 bytes
+
+
+def create_text_field() -> Field:
+    return Field(tokenize=lambda s: s.split(" "), pad_token=placeholders['pad_token'])
+
+
+def get_specials(text_field: Field) -> List[str]:
+    return [tok for tok in [text_field.unk_token, text_field.pad_token, text_field.init_token, text_field.eos_token]
+            if tok is not None]
+
+
+def create_itos(words, specials: List[str]) -> List[str]:
+    """
+    Order of words the field would get if `build_vocab` was called with each of the words occurring once:
+    specials first, then the rest sorted alphabetically.
+    """
+    specials_set = set(specials)
+    return specials + sorted(word for word in words if word not in specials_set)
+
+
+def dump_compact_vocab(itos: List[str], counts: array, file: str) -> None:
+    """
+    Binary format: header, counts (int64), words (utf-8, separated by new lines)
+    """
+    if len(itos) != len(counts):
+        raise ValueError(f'Number of words ({len(itos)}) and counts ({len(counts)}) differ')
+    word_bytes = '\n'.join(itos).encode('utf-8')
+    with open(f'{file}.part', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(itos), len(word_bytes)).ljust(HEADER_SIZE, b'\0'))
+        f.write(array('q', counts).tobytes())
+        f.write(word_bytes)
+    os.replace(f'{file}.part', file)
+
+
+def load_compact_vocab(file: str) -> Tuple[List[str], array]:
+    with open(file, 'rb') as f:
+        magic, version, n_words, n_word_bytes = HEADER.unpack(f.read(HEADER_SIZE)[:HEADER.size])
+        if magic != MAGIC:
+            raise ValueError(f'{file} is not a compact vocab file')
+        if version != VERSION:
+            raise ValueError(f'Unsupported version of compact vocab file {file}: {version}')
+        counts = array('q')
+        counts.frombytes(f.read(n_words * counts.itemsize))
+        itos = f.read(n_word_bytes).decode('utf-8').split('\n') if n_words else []
+    return itos, counts
+
+
+class LazyVocab(Vocab):
+    """
+    torchtext vocab created from an already ordered list of words. `stoi` and `freqs` are only built
+    when they are accessed for the first time, and are not pickled.
+
+    `freqs` is 1 for every word of the corpus, as it was when `build_vocab` was called with each word once,
+    the corpus counts are in `counts`.
+    """
+
+    def __init__(self, itos: List[str], counts: array):
+        self.itos = itos
+        self.counts = counts
+        self.vectors = None
+
+    def __getattr__(self, name):
+        if name == 'stoi':
+            self.stoi = defaultdict(_default_unk_index)
+            self.stoi.update(zip(self.itos, range(len(self.itos))))
+            return self.stoi
+        elif name == 'freqs':
+            self.freqs = Counter({word: 1 for word, count in zip(self.itos, self.counts) if count > 0})
+            return self.freqs
+        raise AttributeError(name)
+
+    def __getstate__(self) -> Dict:
+        return {k: v for k, v in self.__dict__.items() if k not in ['stoi', 'freqs']}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+
+
+def create_field(word_counts: Dict[str, int]) -> Tuple[Field, List[str], array]:
+    text_field = create_text_field()
+    itos = create_itos(word_counts.keys(), get_specials(text_field))
+    counts = array('q', (word_counts.get(word, 0) for word in itos))
+    text_field.vocab = LazyVocab(itos, counts)
+    return text_field, itos, counts
+
+
+def load_field(file: str) -> Field:
+    itos, counts = load_compact_vocab(file)
+    text_field = create_text_field()
+    text_field.vocab = LazyVocab(itos, counts)
+    return text_field
@@ -1,8 +1,6 @@
 import argparse
 import logging
 import os
-import gzip
-import pickle
 import re
 from functools import partial
 from multiprocessing.pool import Pool
@@ -10,6 +8,7 @@ from multiprocessing.pool import Pool
 from logrec.dataprep import parse_projects, path_to_non_eng_dicts, path_to_eng_dicts, PARSED_DIR
 from logrec.dataprep.lang.dao import DAO
 from logrec.dataprep.lang.langchecker import LanguageChecker
+from logrec.dataprep.parsed_file import ParsedFile
 from logrec.dataprep.preprocessors.general import to_token_list
 from logrec.dataprep.prepconfig import PrepConfig
 from logrec.dataprep.to_repr import to_repr
@@ -37,22 +36,16 @@ def calc_stats(lang_checker, path_to_dir_with_preprocessed_projects, train_test_
     project_name = get_project_name(file)
     filenames_file = f'.{project_name}.{parse_projects.FILENAMES_EXTENSION}'
     file_stats = []
-    with gzip.GzipFile(os.path.join(path_to_dir_with_preprocessed_projects, train_test_valid, file), 'rb') as f, \
+    with ParsedFile(os.path.join(path_to_dir_with_preprocessed_projects, train_test_valid, file)) as f, \
             open(os.path.join(path_to_dir_with_preprocessed_projects, train_test_valid, filenames_file), 'r') as fn:
-        _ = pickle.load(f)  # preprocessing param dict
-        while True:
-            try:
-                token_list = pickle.load(f)
-
-                only_code_stats = calc_stats_for_prepconfig('02110', lang_checker, token_list)
-                code_str_stats = calc_stats_for_prepconfig('01110', lang_checker, token_list)
-                code_str_com_stats = calc_stats_for_prepconfig('00110', lang_checker, token_list, include_sample=True)
-
-                filename = fn.readline().rstrip('\n')
-                file_stats.append(
-                    (train_test_valid, project_name, filename, *only_code_stats, *code_str_stats, *code_str_com_stats))
-            except EOFError:
-                break
+        for token_list in f:
+            only_code_stats = calc_stats_for_prepconfig('02110', lang_checker, token_list)
+            code_str_stats = calc_stats_for_prepconfig('01110', lang_checker, token_list)
+            code_str_com_stats = calc_stats_for_prepconfig('00110', lang_checker, token_list, include_sample=True)
+
+            filename = fn.readline().rstrip('\n')
+            file_stats.append(
+                (train_test_valid, project_name, filename, *only_code_stats, *code_str_stats, *code_str_com_stats))
     return file_stats if file_stats else [[train_test_valid, project_name]]
 
 
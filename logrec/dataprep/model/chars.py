@@ -1,9 +1,12 @@
 from typing import List
 
+from logrec.dataprep.model.slots import Stateless
 from logrec.dataprep.preprocessors.repr import ReprConfig
 
 
-class SpecialChar(object):
+class SpecialChar(Stateless):
+    __slots__ = ()
+
     def __eq__(self, other):
         return other.__class__ == self.__class__
 
@@ -15,6 +18,8 @@ class SpecialChar(object):
 
 
 class NewLine(SpecialChar):
+    __slots__ = ()
+
     def non_preprocessed_repr(self, repr_config):
         return "\n"
 
@@ -23,6 +28,8 @@ class NewLine(SpecialChar):
 
 
 class Tab(SpecialChar):
+    __slots__ = ()
+
     def non_preprocessed_repr(self, repr_config):
         return "\t"
 
@@ -31,25 +38,35 @@ class Tab(SpecialChar):
 
 
 class Backslash(SpecialChar):
+    __slots__ = ()
+
     def non_preprocessed_repr(self, repr_config):
         return "\\"
 
 
 class Quote(SpecialChar):
+    __slots__ = ()
+
     def non_preprocessed_repr(self, repr_config):
         return "\""
 
 
 class MultilineCommentStart(SpecialChar):
+    __slots__ = ()
+
     def non_preprocessed_repr(self, repr_config):
         return "/*"
 
 
 class MultilineCommentEnd(SpecialChar):
+    __slots__ = ()
+
     def non_preprocessed_repr(self, repr_config):
         return "*/"
 
 
 class OneLineCommentStart(SpecialChar):
+    __slots__ = ()
+
     def non_preprocessed_repr(self, repr_config):
         return "//"
@@ -2,11 +2,14 @@ from typing import List
 
 from logrec.dataprep.model.noneng import NonEng, NonEngContent
 from logrec.dataprep.model.placeholders import placeholders
+from logrec.dataprep.model.slots import PicklableSlots
 from logrec.dataprep.model.word import Word
 from logrec.dataprep.preprocessors.repr import torepr, ReprConfig
 
 
-class ProcessableTokenContainer(object):
+class ProcessableTokenContainer(PicklableSlots):
+    __slots__ = ('subtokens',)
+
     def __init__(self, subtokens):
         if isinstance(subtokens, list):
             self.subtokens = subtokens
@@ -27,6 +30,8 @@ class ProcessableTokenContainer(object):
 
 
 class SplitContainer(ProcessableTokenContainer):
+    __slots__ = ()
+
     def __init__(self, subtokens):
         super().__init__(subtokens)
 
@@ -60,6 +65,8 @@ class SplitContainer(ProcessableTokenContainer):
 
 
 class TextContainer(ProcessableTokenContainer):
+    __slots__ = ('non_eng_percent', 'non_eng_qty')
+
     def __str__(self):
         return " ".join([str(s) for s in self.non_preprocessed_repr(ReprConfig.empty())])
 
@@ -85,6 +92,8 @@ class TextContainer(ProcessableTokenContainer):
 
 
 class OneLineComment(TextContainer):
+    __slots__ = ()
+
     def __init__(self, tokens):
         super().__init__(tokens)
 
@@ -99,6 +108,8 @@ class OneLineComment(TextContainer):
 
 
 class MultilineComment(TextContainer):
+    __slots__ = ()
+
     def __init__(self, tokens):
         super().__init__(tokens)
 
@@ -113,6 +124,8 @@ class MultilineComment(TextContainer):
 
 
 class StringLiteral(TextContainer):
+    __slots__ = ()
+
     def __init__(self, tokens):
         super().__init__(tokens)
 
@@ -1,11 +1,14 @@
 from typing import List
 
 from logrec.dataprep.model.placeholders import placeholders
+from logrec.dataprep.model.slots import PicklableSlots
 from logrec.dataprep.model.word import Word
 from logrec.dataprep.preprocessors.repr import torepr, ReprConfig
 
 
-class NonEng(object):
+class NonEng(PicklableSlots):
+    __slots__ = ('processable_token',)
+
     def __init__(self, processable_token):
         if not isinstance(processable_token, Word):
             raise ValueError(f"NonEngFullWord excepts FullWord but {type(processable_token)} is passed")
@@ -1,11 +1,14 @@
 from typing import List
 
 from logrec.dataprep.model.placeholders import placeholders
+from logrec.dataprep.model.slots import PicklableSlots, Stateless
 from logrec.dataprep.preprocessors.repr import ReprConfig
 from logrec.dataprep.split.ngram import NgramSplittingType, do_ngram_splitting
 
 
-class Number(object):
+class Number(PicklableSlots):
+    __slots__ = ('parts_of_number',)
+
     def __init__(self, parts_of_number):
         if not isinstance(parts_of_number, list):
             raise ValueError(f"Parts of number must be list but is {type(parts_of_number)}")
@@ -42,7 +45,9 @@ class Number(object):
         return self.__class__ == other.__class__ and self.parts_of_number == other.parts_of_number
 
 
-class SpecialNumberChar(object):
+class SpecialNumberChar(Stateless):
+    __slots__ = ()
+
     def __repr__(self):
         return f'{self.__class__.__name__}'
 
@@ -51,6 +56,8 @@ class SpecialNumberChar(object):
 
 
 class E(SpecialNumberChar):
+    __slots__ = ()
+
     def __str__(self):
         return self.non_preprocessed_repr(ReprConfig.empty())
 
@@ -59,6 +66,8 @@ class E(SpecialNumberChar):
 
 
 class L(SpecialNumberChar):
+    __slots__ = ()
+
     def __str__(self):
         return self.non_preprocessed_repr(ReprConfig.empty())
 
@@ -67,6 +76,8 @@ class L(SpecialNumberChar):
 
 
 class F(SpecialNumberChar):
+    __slots__ = ()
+
     def __str__(self):
         return self.non_preprocessed_repr(ReprConfig.empty())
 
@@ -75,6 +86,8 @@ class F(SpecialNumberChar):
 
 
 class D(SpecialNumberChar):
+    __slots__ = ()
+
     def __str__(self):
         return self.non_preprocessed_repr(ReprConfig.empty())
 
@@ -83,6 +96,8 @@ class D(SpecialNumberChar):
 
 
 class DecimalPoint(SpecialNumberChar):
+    __slots__ = ()
+
     def __str__(self):
         return self.non_preprocessed_repr(ReprConfig.empty())
 
@@ -91,6 +106,8 @@ class DecimalPoint(SpecialNumberChar):
 
 
 class HexStart(SpecialNumberChar):
+    __slots__ = ()
+
     def __str__(self):
         return self.non_preprocessed_repr(ReprConfig.empty())
 
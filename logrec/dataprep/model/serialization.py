@@ -0,0 +1,228 @@
+"""
+Compact binary encoding of token lists produced by the preprocessors.
+
+Layout: header, lengths (in characters) of the strings in the string table, the string table (utf-8),
+codes. Every node of the token tree is encoded as a code: the tag of the node in the lowest `TAG_BITS` bits
+and an argument in the remaining ones: the index of a string in the string table for words and strings,
+the number of children for containers (the children follow), the index in `SPECIAL_CHARS` for special chars.
+"""
+
+import struct
+from array import array
+from typing import List, Dict
+
+from logrec.dataprep.model.chars import NewLine, Tab, Backslash, Quote, MultilineCommentStart, MultilineCommentEnd, \
+    OneLineCommentStart
+from logrec.dataprep.model.containers import SplitContainer, OneLineComment, MultilineComment, StringLiteral
+from logrec.dataprep.model.logging import LogStatement, LogContent, LoggableBlock, LogLevel
+from logrec.dataprep.model.noneng import NonEng
+from logrec.dataprep.model.numeric import Number, E, L, F, D, DecimalPoint, HexStart
+from logrec.dataprep.model.word import Word, ParseableToken, Capitalization, Underscore
+
+MARKER = b'T'  # pickles start with b'\x80', so encoded token lists can be told apart from pickled ones
+VERSION = 1
+# marker, version, number of strings, size of utf-8 encoded strings, number of codes
+HEADER = struct.Struct('<cBxxIII')
+
+TAG_BITS = 5
+TAG_MASK = (1 << TAG_BITS) - 1
+MAX_ARG = (1 << (32 - TAG_BITS)) - 1
+
+LIST = 0
+STR = 1
+WORD_UNDEFINED = 2
+WORD_NONE = 3
+WORD_FIRST_LETTER = 4
+WORD_ALL = 5
+PARSEABLE_TOKEN = 6
+SPECIAL_CHAR = 7
+SPLIT_CONTAINER = 8
+NUMBER = 9
+NON_ENG = 10
+ONE_LINE_COMMENT = 11
+MULTILINE_COMMENT = 12
+STRING_LITERAL = 13
+LOG_STATEMENT = 14
+LOG_CONTENT = 15
+LOGGABLE_BLOCK = 16
+LOG_LEVEL = 17
+NONE = 18
+
+WORD_TAGS = {
+    Capitalization.UNDEFINED: WORD_UNDEFINED,
+    Capitalization.NONE: WORD_NONE,
+    Capitalization.FIRST_LETTER: WORD_FIRST_LETTER,
+    Capitalization.ALL: WORD_ALL,
+}
+CAPITALIZATIONS = {tag: capitalization for capitalization, tag in WORD_TAGS.items()}
+
+# new chars can only be appended, indices are stored in encoded token lists
+SPECIAL_CHARS = [NewLine, Tab, Backslash, Quote, MultilineCommentStart, MultilineCommentEnd, OneLineCommentStart,
+                 Underscore, E, L, F, D, DecimalPoint, HexStart]
+SPECIAL_CHAR_INDICES = {cls: i for i, cls in enumerate(SPECIAL_CHARS)}
+
+SEQUENCE_TAGS = {
+    list: LIST,
+    SplitContainer: SPLIT_CONTAINER,
+    OneLineComment: ONE_LINE_COMMENT,
+    MultilineComment: MULTILINE_COMMENT,
+    StringLiteral: STRING_LITERAL,
+    LogContent: LOG_CONTENT,
+    LoggableBlock: LOGGABLE_BLOCK,
+}
+SEQUENCE_CLASSES = {tag: cls for cls, tag in SEQUENCE_TAGS.items()}
+
+
+def is_encoded(data: bytes) -> bool:
+    return data[:len(MARKER)] == MARKER
+
+
+class _Encoder(object):
+    def __init__(self):
+        self.strings = []
+        self.string_indices = {}
+        self.codes = array('I')
+
+    def _add_code(self, tag: int, arg: int) -> None:
+        if arg > MAX_ARG:
+            raise ValueError(f'Argument {arg} is too big to be encoded')
+        self.codes.append(tag | (arg << TAG_BITS))
+
+    def _string_index(self, s: str) -> int:
+        index = self.string_indices.get(s)
+        if index is None:
+            index = len(self.strings)
+            self.string_indices[s] = index
+            self.strings.append(s)
+        return index
+
+    def _add_children(self, tag: int, children: List) -> None:
+        self._add_code(tag, len(children))
+        for child in children:
+            self.add(child)
+
+    def add(self, token) -> None:
+        cls = type(token)
+        if cls is str:
+            self._add_code(STR, self._string_index(token))
+        elif cls is Word:
+            self._add_code(WORD_TAGS[token.capitalization], self._string_index(token.canonic_form))
+        elif cls in SPECIAL_CHAR_INDICES:
+            self._add_code(SPECIAL_CHAR, SPECIAL_CHAR_INDICES[cls])
+        elif cls is Number:
+            self._add_children(NUMBER, token.parts_of_number)
+        elif cls in SEQUENCE_TAGS:
+            self._add_children(SEQUENCE_TAGS[cls], token if cls is list else token.subtokens)
+        elif cls is ParseableToken:
+            self._add_code(PARSEABLE_TOKEN, self._string_index(token.val))
+        elif cls is NonEng:
+            self._add_code(NON_ENG, 0)
+            self.add(token.processable_token)
+        elif cls is LogStatement:
+            self._add_code(LOG_STATEMENT, 0)
+            self.add(token.object_name)
+            self.add(token.method_name)
+            self.add(token.level)
+            self.add(token.get_log_content_tokens())
+            self.add(token._tokens_before_final_semicolon)
+        elif cls is LogLevel:
+            self._add_code(LOG_LEVEL, self._string_index(token.repr))
+            self.codes.append(token.value)
+        elif token is None:
+            self._add_code(NONE, 0)
+        else:
+            raise ValueError(f'Tokens of type {cls} cannot be encoded: {token}')
+
+    def to_bytes(self) -> bytes:
+        string_lengths = array('I', map(len, self.strings))
+        string_bytes = ''.join(self.strings).encode('utf-8')
+        return b''.join([HEADER.pack(MARKER, VERSION, len(self.strings), len(string_bytes), len(self.codes)),
+                         string_lengths.tobytes(), string_bytes, self.codes.tobytes()])
+
+
+def encode(token_list: List) -> bytes:
+    encoder = _Encoder()
+    encoder.add(token_list)
+    return encoder.to_bytes()
+
+
+class _Decoder(object):
+    def __init__(self, strings: List[str], codes: array):
+        self.strings = strings
+        self.codes = iter(codes)
+        # leaves do not change after they have been created, so they are shared between the places they occur at
+        self.leaves: Dict[int, object] = {}
+
+    def _create_leaf(self, code: int):
+        tag, arg = code & TAG_MASK, code >> TAG_BITS
+        if tag == STR:
+            return self.strings[arg]
+        elif tag in CAPITALIZATIONS:
+            return Word(self.strings[arg], CAPITALIZATIONS[tag])
+        elif tag == SPECIAL_CHAR:
+            return SPECIAL_CHARS[arg]()
+        elif tag == PARSEABLE_TOKEN:
+            return ParseableToken(self.strings[arg])
+        else:
+            raise ValueError(f'Unknown tag: {tag}')
+
+    def _children(self, n: int) -> List:
+        children = []
+        for _ in range(n):
+            code = next(self.codes)
+            # most of the children are leaves, so they are looked up here without an extra call
+            leaf = self.leaves.get(code)
+            children.append(leaf if leaf is not None else self._decode(code))
+        return children
+
+    def _decode(self, code: int):
+        tag, arg = code & TAG_MASK, code >> TAG_BITS
+        if tag == SPLIT_CONTAINER:
+            # the most frequent container, its constructor only checks that the subtokens are a list
+            container = object.__new__(SplitContainer)
+            container.subtokens = self._children(arg)
+            return container
+        if tag in SEQUENCE_CLASSES:
+            children = self._children(arg)
+            return children if tag == LIST else SEQUENCE_CLASSES[tag](children)
+        elif tag == NUMBER:
+            return Number(self._children(arg))
+        elif tag == NON_ENG:
+            return NonEng(self.next())
+        elif tag == LOG_STATEMENT:
+            return LogStatement(object_name=self.next(), method_name=self.next(), level=self.next(),
+                                log_content_token_list=self.next(), tokens_before_final_semicolon=self.next())
+        elif tag == LOG_LEVEL:
+            return LogLevel(next(self.codes), self.strings[arg])
+        elif tag == NONE:
+            return None
+        leaf = self._create_leaf(code)
+        self.leaves[code] = leaf
+        return leaf
+
+    def next(self):
+        code = next(self.codes)
+        leaf = self.leaves.get(code)
+        return leaf if leaf is not None else self._decode(code)
+
+
+def decode(data: bytes) -> List:
+    marker, version, n_strings, n_string_bytes, n_codes = HEADER.unpack_from(data)
+    if marker != MARKER:
+        raise ValueError('Data is not an encoded token list')
+    if version != VERSION:
+        raise ValueError(f'Unsupported version of token list encoding: {version}')
+    offset = HEADER.size
+    string_lengths = array('I')
+    string_lengths.frombytes(data[offset:offset + n_strings * string_lengths.itemsize])
+    offset += n_strings * string_lengths.itemsize
+    all_strings = data[offset:offset + n_string_bytes].decode('utf-8')
+    offset += n_string_bytes
+    strings = []
+    start = 0
+    for length in string_lengths:
+        strings.append(all_strings[start:start + length])
+        start += length
+    codes = array('I')
+    codes.frombytes(data[offset:offset + n_codes * codes.itemsize])
+    return _Decoder(strings, codes).next()
@@ -0,0 +1,42 @@
+from typing import Dict
+
+
+class PicklableSlots(object):
+    """
+    Pickles objects of classes with `__slots__` with the same state (attribute dict) as before
+    the model classes got slots, so token lists pickled before and after that can be read with either version.
+    """
+    __slots__ = ()
+
+    def __getstate__(self) -> Dict:
+        return {slot: getattr(self, slot) for cls in type(self).__mro__
+                for slot in getattr(cls, '__slots__', ()) if hasattr(self, slot)}
+
+    def __setstate__(self, state) -> None:
+        # objects of slotted classes without __getstate__ are pickled with the state (dict_state, slots_state)
+        if isinstance(state, tuple):
+            dict_state, slots_state = state
+            state = {**(dict_state or {}), **(slots_state or {})}
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class Stateless(object):
+    """
+    Tokens that do not have any state. Only one instance of each subclass is created,
+    calling the constructor (or unpickling) again returns the same instance.
+    """
+    __slots__ = ()
+
+    _instances = {}
+
+    def __new__(cls):
+        instance = Stateless._instances.get(cls)
+        if instance is None:
+            instance = super().__new__(cls)
+            Stateless._instances[cls] = instance
+        return instance
+
+    def __setstate__(self, state) -> None:
+        # instances pickled before the class got slots can have an empty attribute dict as their state
+        pass
@@ -1,8 +1,10 @@
+import sys
 from enum import Enum, auto
 from typing import List
 
 from logrec.dataprep.model.chars import SpecialChar
 from logrec.dataprep.model.placeholders import placeholders
+from logrec.dataprep.model.slots import PicklableSlots
 from logrec.dataprep.preprocessors.repr import ReprConfig
 from logrec.dataprep.split.ngram import do_ngram_splitting
 
@@ -15,20 +17,24 @@ class Capitalization(Enum):
 
 
 class Underscore(SpecialChar):
+    __slots__ = ()
+
     def non_preprocessed_repr(self, repr_config):
         return "_"
 
 
-class Word(object):
+class Word(PicklableSlots):
     """
     Invariants:
     str === str(Word.of(str))
     """
+    __slots__ = ('canonic_form', 'capitalization')
 
     def __init__(self, canonic_form, capitalization=Capitalization.UNDEFINED):
         Word._check_canonic_form_is_valid(canonic_form)
 
-        self.canonic_form = canonic_form
+        # the same words occur many times, interning makes them share the string
+        self.canonic_form = sys.intern(canonic_form)
         self.capitalization = capitalization
 
     def get_canonic_form(self):
@@ -101,10 +107,11 @@ class Word(object):
             return cls(s, Capitalization.UNDEFINED)
 
 
-class ParseableToken(object):
+class ParseableToken(PicklableSlots):
     """
     This class represents parts of input that still needs to be parsed
     """
+    __slots__ = ('val',)
 
     def __init__(self, val):
         if not isinstance(val, str):
@@ -1,85 +1,267 @@
 import argparse
-import gzip
+import hashlib
+import json
 import logging
 import os
-import pickle
 import time
 from multiprocessing.pool import Pool
+from collections import namedtuple
 from pathlib import Path
+from typing import List, Tuple, Optional, Dict
 
-from logrec.dataprep.preprocessors import apply_preprocessors
+from logrec.dataprep.preprocessors import PreprocessingPlan, PreprocessingStats
 from logrec.dataprep.preprocessors.general import from_file
+from logrec.dataprep.preprocessors.split import split_cache_lookups
+from logrec.dataprep.parsed_file import ParsedFile, ParsedFileWriter, dump_token_list
 from logrec.dataprep.prepconfig import PrepParam
 from logrec.dataprep.preprocessors.preprocessor_list import pp_params
 from logrec.infrastructure.fs import FS
 from logrec.properties import DEFAULT_PARSE_PROJECTS_ARGS
-from logrec.util.files import file_mapper
+from logrec.util.compression import CODECS, DEFAULT_CODEC, get_codec
+from logrec.util.files import list_files, FileStat
 
 logger = logging.getLogger(__name__)
 
 EXTENSION = "parsed"
 FILENAMES_EXTENSION = "filenames"
+MANIFEST_EXTENSION = "manifest"
+NOT_FINISHED_EXTENSION = "part"
+MANIFEST_VERSION = 2
 
+DEFAULT_BATCH_SIZE_MB = 4
 
-def read_file_with_encoding(file_path, encoding):
-    with open(file_path, 'r', encoding=encoding) as f:
-        return [line for line in f], file_path
 
+def split_lines(text: str) -> List[str]:
+    """
+    Splits text into lines the same way as iterating over a file opened in text mode with universal newlines does
+    """
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    last_line = lines.pop()
+    res = [line + '\n' for line in lines]
+    if last_line:
+        res.append(last_line)
+    return res
 
-def read_file_contents(file_path):
+
+def decode_file_contents(contents: bytes, file_path: str) -> Optional[List[str]]:
+    """
+    If the contents cannot be decoded as utf-8, they are decoded as ISO-8859-1, the file is not re-read
+    """
     try:
-        return read_file_with_encoding(file_path, 'utf-8')
+        return split_lines(contents.decode('utf-8'))
     except UnicodeDecodeError:
         logger.warning(f"Encoding is not utf-8, trying ISO-8859-1")
         try:
-            return read_file_with_encoding(file_path, 'ISO-8859-1')
+            return split_lines(contents.decode('ISO-8859-1'))
         except UnicodeDecodeError:
             logger.error(f"Unicode decode error in file: {file_path}")
 
 
-def preprocess_and_write(params):
+# index is the position of the token list of the file in the parsed file
+ManifestRecord = namedtuple('ManifestRecord', ['filename', 'hash', 'size', 'mtime', 'index'])
+
+
+def get_manifest_path(full_dest_dir: str, project: str) -> str:
+    return os.path.join(full_dest_dir, f'.{project}.{MANIFEST_EXTENSION}')
+
+
+def write_manifest(path: str, records: List[ManifestRecord]) -> None:
+    with open(path, 'w') as f:
+        json.dump({'version': MANIFEST_VERSION,
+                   'preprocessors': pp_params['preprocessors'],
+                   'files': [list(record) for record in records]}, f)
+
+
+def read_manifest(path: str) -> Optional[Dict[str, ManifestRecord]]:
+    """
+    :return: records by filename, None if the manifest does not exist
+    or the project was parsed with a different version of the manifest or different preprocessors
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    if manifest['version'] != MANIFEST_VERSION or manifest['preprocessors'] != pp_params['preprocessors']:
+        return None
+    return {record[0]: ManifestRecord(*record) for record in manifest['files']}
+
+
+class ProjectToParse(object):
+    def __init__(self, train_test_valid: str, project: str, dir_with_files_to_preprocess: str, full_dest_dir: str,
+                 batches: List[List[FileStat]], old_manifest: Optional[Dict[str, ManifestRecord]] = None):
+        self.train_test_valid = train_test_valid
+        self.project = project
+        self.dir_with_files_to_preprocess = dir_with_files_to_preprocess
+        self.full_dest_dir = full_dest_dir
+        self.path_to_preprocessed_file = os.path.join(full_dest_dir, f'{project}.{EXTENSION}')
+        self.batches = batches
+        self.size = sum(file.size for batch in batches for file in batch)
+        self.old_manifest = old_manifest
+        self.records_in_batches = {}
+
+    def path_to_batch_file(self, batch_index: int) -> str:
+        return os.path.join(self.full_dest_dir, f'.{self.project}.{EXTENSION}.{batch_index}.{NOT_FINISHED_EXTENSION}')
+
+    @property
+    def all_batches_parsed(self) -> bool:
+        return len(self.records_in_batches) == len(self.batches)
+
+    def old_manifest_for_batch(self, batch_index: int) -> Dict[str, ManifestRecord]:
+        if self.old_manifest is None:
+            return {}
+        filenames = [os.path.relpath(file.path, start=self.dir_with_files_to_preprocess)
+                     for file in self.batches[batch_index]]
+        return {filename: self.old_manifest[filename] for filename in filenames if filename in self.old_manifest}
+
+    def __str__(self):
+        return os.path.join(self.train_test_valid, self.project)
+
+
+def split_into_batches(files: List[FileStat], batch_size: int) -> List[List[FileStat]]:
+    batches = []
+    current_batch, current_batch_size = [], 0
+    for file in files:
+        current_batch.append(file)
+        current_batch_size += file.size
+        if current_batch_size >= batch_size:
+            batches.append(current_batch)
+            current_batch, current_batch_size = [], 0
+    if current_batch:
+        batches.append(current_batch)
+    return batches
+
+
+def is_unchanged(files: List[FileStat], dir_with_files_to_preprocess: str,
+                 old_manifest: Dict[str, ManifestRecord]) -> bool:
+    if len(files) != len(old_manifest):
+        return False
+    for file in files:
+        record = old_manifest.get(os.path.relpath(file.path, start=dir_with_files_to_preprocess))
+        if record is None or record.size != file.size or record.mtime != file.mtime:
+            return False
+    return True
+
+
+def written_with_codec(path_to_parsed_file: str, codec: str) -> bool:
+    with ParsedFile(path_to_parsed_file) as parsed_file:
+        return parsed_file.indexed and parsed_file.codec.name == codec
+
+
+def plan_project(src_dir, dest_dir, train_test_valid, project, batch_size,
+                 incremental=False, codec=DEFAULT_CODEC) -> Optional[ProjectToParse]:
+    """
+    In the incremental mode, an existing parsed file is not skipped. The files of the project are re-parsed
+    except for the ones whose content hash has not changed since the parsed file was written,
+    the token lists of the latter are copied from the existing parsed file.
+    If the existing parsed file was written with a different codec, it is rewritten even if no files have changed.
+    """
     from logrec.properties import REWRITE_PARSED_FILE
 
-    src_dir, dest_dir, train_test_valid, project, preprocessing_param_dict = params
     full_dest_dir = os.path.join(dest_dir, train_test_valid)
     path_to_preprocessed_file = os.path.join(full_dest_dir, f'{project}.{EXTENSION}')
     if not os.path.exists(full_dest_dir):
         os.makedirs(full_dest_dir, exist_ok=True)
-    if not REWRITE_PARSED_FILE and os.path.exists(path_to_preprocessed_file):
+    if not REWRITE_PARSED_FILE and not incremental and os.path.exists(path_to_preprocessed_file):
         logger.warning(f"File {path_to_preprocessed_file} already exists! Doing nothing.")
-        return
+        return None
     dir_with_files_to_preprocess = os.path.join(src_dir, train_test_valid, project)
     if not os.path.exists(dir_with_files_to_preprocess):
         logger.error(f"Path {dir_with_files_to_preprocess} does not exist")
         exit(2)
-    filenames=[]
-    with gzip.GzipFile(f'{path_to_preprocessed_file}.part', 'wb') as f:
-        total_files = sum(f for f in file_mapper(dir_with_files_to_preprocess, lambda path: 1))
-        logger.info(f"Preprocessing java files from {dir_with_files_to_preprocess}. Files to process: {total_files}")
-        pickle.dump(preprocessing_param_dict, f, pickle.HIGHEST_PROTOCOL)
-        for ind, (lines_from_file, file_path) in enumerate(
-                file_mapper(dir_with_files_to_preprocess, read_file_contents)):
-            if (ind+1) % 100 == 0:
-                logger.info(
-                    f"[{os.path.join(train_test_valid, project)}] Parsed {ind+1} out of {total_files} files ({(ind+1)/float(total_files)*100:.2f}%)")
-            parsed = apply_preprocessors(from_file(lines_from_file), pp_params["preprocessors"], {
-                'interesting_context_words': []
-            })
-            pickle.dump(parsed, f, pickle.HIGHEST_PROTOCOL)
-            filename=os.path.relpath(file_path, start=dir_with_files_to_preprocess)
-            filenames.append(filename)
-
-
-    with open(os.path.join(full_dest_dir, f'.{project}.{FILENAMES_EXTENSION}'), "w") as f:
-        for filename in filenames:
+    files = list_files(dir_with_files_to_preprocess)
+    old_manifest = None
+    if incremental and not REWRITE_PARSED_FILE and os.path.exists(path_to_preprocessed_file):
+        old_manifest = read_manifest(get_manifest_path(full_dest_dir, project))
+        if old_manifest is None:
+            logger.warning(f"No valid manifest found for {path_to_preprocessed_file}, all the files will be re-parsed")
+        elif is_unchanged(files, dir_with_files_to_preprocess, old_manifest) \
+                and written_with_codec(path_to_preprocessed_file, codec):
+            logger.info(f"Files in {dir_with_files_to_preprocess} have not changed! Doing nothing.")
+            return None
+    return ProjectToParse(train_test_valid, project, dir_with_files_to_preprocess, full_dest_dir,
+                          split_into_batches(files, batch_size), old_manifest)
+
+
+preprocessing_plan = PreprocessingPlan(pp_params["preprocessors"])
+
+
+def preprocess_batch(params) -> Tuple[int, int, List[ManifestRecord], List[int], PreprocessingStats]:
+    """
+    Parses a batch of files of a project and writes their compressed records to a separate file,
+    the records of all the batches of the project are put into the parsed file afterwards by `finish_project`.
+
+    Token lists of the files found in `old_manifest` with the same content hash are copied from the old parsed file
+    (and recompressed if the old parsed file was written with a different codec).
+    The file is not even read if its size and modification time are the same as in the manifest.
+
+    Preprocessing stats of the files parsed in the batch, including the lookups of the identifier splitting cache
+    of the worker made while parsing them, are returned to be reported by the main process.
+    Token lists are streamed through the preprocessors unless the time spent in each of them has to be measured.
+    """
+    project_index, batch_index, files, dir_with_files_to_preprocess, path_to_batch_file, \
+        path_to_old_parsed_file, old_manifest, codec_name, profile_preprocessing = params
+    codec = get_codec(codec_name)
+    records = []
+    record_lengths = []
+    old_parsed_file = ParsedFile(path_to_old_parsed_file) if old_manifest else None
+    split_cache_hits_before, split_cache_lookups_before = split_cache_lookups()
+    with open(path_to_batch_file, 'wb') as f:
+        for file in files:
+            filename = os.path.relpath(file.path, start=dir_with_files_to_preprocess)
+            old_record = old_manifest.get(filename)
+            contents = None
+            if old_record and old_record.size == file.size and old_record.mtime == file.mtime:
+                content_hash = old_record.hash
+            else:
+                with open(file.path, 'rb') as source_file:
+                    contents = source_file.read()
+                content_hash = hashlib.sha1(contents).hexdigest()
+            if old_record and old_record.hash == content_hash:
+                record = old_parsed_file.read_compressed(old_record.index)
+                if old_parsed_file.codec.id != codec.id:
+                    record = codec.compress(old_parsed_file.codec.decompress(record))
+            else:
+                lines_from_file = decode_file_contents(contents, file.path)
+                if lines_from_file is None:
+                    continue
+                parsed = preprocessing_plan.apply(from_file(lines_from_file), {
+                    'interesting_context_words': []
+                }, streaming=not profile_preprocessing)
+                record = dump_token_list(parsed, codec)
+            f.write(record)
+            records.append(ManifestRecord(filename, content_hash, file.size, file.mtime, None))
+            record_lengths.append(len(record))
+    if old_parsed_file is not None:
+        old_parsed_file.close()
+    stats = preprocessing_plan.collect_stats()
+    hits, lookups = split_cache_lookups()
+    stats.add_cache_lookups('split', hits - split_cache_hits_before, lookups - split_cache_lookups_before)
+    return project_index, batch_index, records, record_lengths, stats
+
+
+def finish_project(project: ProjectToParse, preprocessing_param_dict, codec: str = DEFAULT_CODEC) -> None:
+    path_to_part_file = f'{project.path_to_preprocessed_file}.{NOT_FINISHED_EXTENSION}'
+    records = []
+    with ParsedFileWriter(path_to_part_file, preprocessing_param_dict, codec) as writer:
+        for batch_index in range(len(project.batches)):
+            batch_records, record_lengths = project.records_in_batches[batch_index]
+            with open(project.path_to_batch_file(batch_index), 'rb') as batch_file:
+                for record, record_length in zip(batch_records, record_lengths):
+                    writer.write_compressed(batch_file.read(record_length))
+                    records.append(record._replace(index=len(records)))
+            os.remove(project.path_to_batch_file(batch_index))
+
+    with open(os.path.join(project.full_dest_dir, f'.{project.project}.{FILENAMES_EXTENSION}'), "w") as f:
+        for record in records:
             try:
-                f.write(f"{filename}\n")
+                f.write(f"{record.filename}\n")
             except UnicodeEncodeError:
                 f.write("<bad encoding>\n")
                 logger.warning("Filename has bad encoding")
+    write_manifest(get_manifest_path(project.full_dest_dir, project.project), records)
 
     # remove .part to show that all raw files in this project have been preprocessed
-    os.rename(f'{path_to_preprocessed_file}.part', path_to_preprocessed_file)
+    os.rename(path_to_part_file, project.path_to_preprocessed_file)
 
 
 def split_two_last_levels(root):
@@ -87,41 +269,80 @@ def split_two_last_levels(root):
     return os.path.dirname(os.path.dirname(os.path.dirname(root))), Path(root).parts[-2], Path(root).parts[-1]
 
 
-def run(dataset):
+def run(dataset, batch_size_mb=DEFAULT_BATCH_SIZE_MB, incremental=False, codec=DEFAULT_CODEC,
+        profile_preprocessing=False):
     fs = FS.for_parse_projects(dataset)
 
     logger.info(f"Getting files from {fs.path_to_raw_dataset}")
-    logger.info(f"Writing preprocessed files to {fs.path_to_parsed_dataset}")
+    logger.info(f"Writing preprocessed files to {fs.path_to_parsed_dataset} (codec: {codec})")
     preprocessing_types_dict = {k: None for k in PrepParam}
 
     fs.save_pp_params(pp_params)
     fs.save_preprocessing_types(preprocessing_types_dict)
 
-    params = []
-
+    batch_size = int(batch_size_mb * 1024 * 1024)
+    projects = []
     for train_test_valid, project in fs.get_raw_projects():
-        params.append(
-            (fs.path_to_raw_dataset, fs.path_to_parsed_dataset, train_test_valid, project, preprocessing_types_dict))
+        project_to_parse = plan_project(fs.path_to_raw_dataset, fs.path_to_parsed_dataset, train_test_valid, project,
+                                        batch_size, incremental, codec)
+        if project_to_parse is not None:
+            projects.append(project_to_parse)
+    # the biggest projects are started first so that they do not end up being parsed at the end alone
+    projects.sort(key=lambda p: p.size, reverse=True)
+
+    tasks = []
+    for project_index, project in enumerate(projects):
+        if not project.batches:
+            finish_project(project, preprocessing_types_dict, codec)
+        for batch_index, files in enumerate(project.batches):
+            tasks.append((project_index, batch_index, files, project.dir_with_files_to_preprocess,
+                          project.path_to_batch_file(batch_index), project.path_to_preprocessed_file,
+                          project.old_manifest_for_batch(batch_index), codec, profile_preprocessing))
+    logger.info(f"Projects to parse: {len(projects)}, split into {len(tasks)} batches of files")
 
-    files_total = len(params)
-    current_file = 0
+    bytes_total = sum(project.size for project in projects)
+    bytes_parsed = 0
+    projects_parsed = 0
+    preprocessing_stats = PreprocessingStats(preprocessing_plan.stage_names)
     start_time = time.time()
     with Pool() as pool:
-        it = pool.imap_unordered(preprocess_and_write, params)
-        for _ in it:
-            current_file += 1
-            logger.info(f"Processed {current_file} out of {files_total} chunks")
-            time_elapsed = time.time() - start_time
-            logger.info(f"Time elapsed: {time_elapsed:.2f} s, estimated time until completion: "
-                        f"{time_elapsed / current_file * files_total - time_elapsed:.2f} s")
+        it = pool.imap_unordered(preprocess_batch, tasks)
+        for project_index, batch_index, records, record_lengths, batch_stats in it:
+            preprocessing_stats.merge(batch_stats)
+            project = projects[project_index]
+            project.records_in_batches[batch_index] = records, record_lengths
+            if project.all_batches_parsed:
+                finish_project(project, preprocessing_types_dict, codec)
+                projects_parsed += 1
+                logger.info(f"Processed project {project} ({projects_parsed} out of {len(projects)})")
+            bytes_parsed += sum(file.size for file in project.batches[batch_index])
+            if bytes_parsed > 0:
+                time_elapsed = time.time() - start_time
+                logger.info(f"Time elapsed: {time_elapsed:.2f} s, {bytes_parsed / bytes_total * 100:.2f}% of the code "
+                            f"parsed, estimated time until completion: "
+                            f"{time_elapsed / bytes_parsed * bytes_total - time_elapsed:.2f} s")
+    if preprocessing_stats.runs > 0:
+        logger.info(f"{preprocessing_stats}")
 
 
 if __name__ == '__main__':
 
     parser = argparse.ArgumentParser()
     parser.add_argument('dataset', help='dataset name')
+    parser.add_argument('--batch-size', action='store', type=float, default=DEFAULT_BATCH_SIZE_MB,
+                        help='size (MB) of source code in a batch of files parsed by one process, '
+                             'projects bigger than that are parsed by multiple processes')
+    parser.add_argument('--incremental', action='store_true',
+                        help='re-parse projects that have already been parsed, '
+                             'reusing the results for the files that have not changed')
+    parser.add_argument('--codec', action='store', choices=[codec.name for codec in CODECS], default=DEFAULT_CODEC,
+                        help='codec to compress the token lists in parsed files with, '
+                             'it is detected automatically when the files are read')
+    parser.add_argument('--profile-preprocessing', action='store_true',
+                        help='report the time spent in each preprocessor, '
+                             'token lists are not streamed through the preprocessors then')
 
     args = parser.parse_known_args(*DEFAULT_PARSE_PROJECTS_ARGS)
     args = args[0]
 
-    run(args.dataset)
+    run(args.dataset, args.batch_size, args.incremental, args.codec, args.profile_preprocessing)
@@ -0,0 +1,199 @@
+import gzip
+import logging
+import os
+import pickle
+import struct
+from array import array
+from typing import Iterator, List, Optional
+
+from logrec.dataprep.model import serialization
+from logrec.util.compression import Codec, get_codec, get_codec_by_id, DEFAULT_CODEC
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'LRPARSED'
+VERSION = 2
+# magic, version
+PREAMBLE = struct.Struct('<8sI')
+# magic, version, codec id, number of records, offset of the index
+HEADER = struct.Struct('<8sIIQQ')
+# version 1 files have no codec id, their records are compressed with zlib
+HEADER_V1 = struct.Struct('<8sIQQ')
+V1_CODEC = 'zlib-6'
+HEADER_SIZE = 32  # HEADER.size padded to 8 bytes
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def dump_record(obj, codec: Codec = get_codec(DEFAULT_CODEC)) -> bytes:
+    return codec.compress(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+
+
+def load_record(record: bytes, codec: Codec = get_codec(DEFAULT_CODEC)):
+    return pickle.loads(codec.decompress(record))
+
+
+def dump_token_list(token_list: List, codec: Codec = get_codec(DEFAULT_CODEC)) -> bytes:
+    return codec.compress(serialization.encode(token_list))
+
+
+def load_token_list(record: bytes, codec: Codec = get_codec(DEFAULT_CODEC)) -> List:
+    # token lists used to be pickled, such records can still be found in parsed files
+    data = codec.decompress(record)
+    return serialization.decode(data) if serialization.is_encoded(data) else pickle.loads(data)
+
+
+class ParsedFileWriter(object):
+    """
+    Layout of a parsed file: header, records, index. The first record is the preprocessing params dict,
+    each of the next ones is the token list of a source file. The params are pickled, the token lists
+    are encoded with `serialization.encode`. Records are compressed independently
+    with the codec whose id is stored in the header, the index holds the offsets of all the records
+    followed by the offset of the end of the last one.
+
+    The number of records and the offset of the index are written to the header when the writer is closed,
+    so a file whose writing has not been finished is recognized by the reader. If the writer is used
+    as a context manager and the block raises, the partially written file is removed instead.
+    """
+
+    def __init__(self, path: str, preprocessing_param_dict, codec: str = DEFAULT_CODEC):
+        self.path = path
+        self.codec = get_codec(codec)
+        self.handle = open(path, 'wb')
+        self.handle.write(b'\0' * HEADER_SIZE)
+        self.offset = HEADER_SIZE
+        self.offsets = array('Q')
+        self.write_compressed(dump_record(preprocessing_param_dict, self.codec))
+
+    def write_compressed(self, record: bytes) -> None:
+        """
+        :param record: encoded token list compressed with the codec of the writer
+        """
+        self.offsets.append(self.offset)
+        self.handle.write(record)
+        self.offset += len(record)
+
+    def write(self, token_list) -> None:
+        self.write_compressed(dump_token_list(token_list, self.codec))
+
+    def close(self) -> None:
+        n_records = len(self.offsets)
+        index_offset = self.offset
+        self.offsets.append(index_offset)
+        self.handle.write(self.offsets.tobytes())
+        self.handle.seek(0)
+        self.handle.write(HEADER.pack(MAGIC, VERSION, self.codec.id, n_records, index_offset).ljust(HEADER_SIZE, b'\0'))
+        self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.handle.close()
+            os.remove(self.path)
+
+
+class ParsedFile(object):
+    """
+    Gives random access to the token lists of the source files of a project written with `ParsedFileWriter`.
+    Parsed files in the legacy format (gzip stream of pickles) are supported too, but can only be iterated over.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.handle = open(path, 'rb')
+        head = self.handle.read(HEADER_SIZE)
+        if head[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+            self.handle.seek(0)
+            self.offsets = None
+            self.codec = None
+            self.legacy_stream = gzip.GzipFile(fileobj=self.handle, mode='rb')
+            self.params = pickle.load(self.legacy_stream)
+            return
+
+        if len(head) < HEADER_SIZE:
+            raise ValueError(f'{path} is not a parsed file')
+        magic, version = PREAMBLE.unpack(head[:PREAMBLE.size])
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a parsed file')
+        if version == VERSION:
+            _, _, codec_id, n_records, index_offset = HEADER.unpack(head[:HEADER.size])
+            self.codec = get_codec_by_id(codec_id)
+        elif version == 1:
+            _, _, n_records, index_offset = HEADER_V1.unpack(head[:HEADER_V1.size])
+            self.codec = get_codec(V1_CODEC)
+        else:
+            raise ValueError(f'Unsupported version of parsed file {path}: {version}')
+        if index_offset == 0:
+            raise ValueError(f'Writing of parsed file {path} has not been finished')
+        self.handle.seek(index_offset)
+        self.offsets = array('Q')
+        self.offsets.frombytes(self.handle.read((n_records + 1) * self.offsets.itemsize))
+        self.params = load_record(self._read_record(0), self.codec)
+
+    @property
+    def indexed(self) -> bool:
+        return self.offsets is not None
+
+    def _check_indexed(self) -> None:
+        if not self.indexed:
+            raise TypeError(f'Random access is not supported for {self.path}, '
+                            f'it has been written in the legacy format, it needs to be re-parsed')
+
+    def _read_record(self, record_index: int) -> bytes:
+        start, end = self.offsets[record_index], self.offsets[record_index + 1]
+        self.handle.seek(start)
+        return self.handle.read(end - start)
+
+    def __len__(self):
+        self._check_indexed()
+        return len(self.offsets) - 2
+
+    def read_compressed(self, index: int) -> bytes:
+        """
+        :return: compressed record of the `index`-th source file as it is stored in the parsed file,
+        it can be decompressed with `self.codec`
+        """
+        self._check_indexed()
+        if not 0 <= index < len(self):
+            raise IndexError(f'Parsed file {self.path} has {len(self)} source files, index {index} is out of range')
+        return self._read_record(index + 1)
+
+    def __getitem__(self, index: int) -> List:
+        return load_token_list(self.read_compressed(index), self.codec)
+
+    def iterate(self, start: int = 0, end: Optional[int] = None) -> Iterator[List]:
+        """
+        :return: token lists of the source files from `start` (inclusive) to `end` (exclusive)
+        """
+        if not self.indexed:
+            if start != 0 or end is not None:
+                self._check_indexed()
+            while True:
+                try:
+                    yield pickle.load(self.legacy_stream)
+                except EOFError:
+                    return
+        end = len(self) if end is None else min(end, len(self))
+        if start >= end:
+            return
+        self.handle.seek(self.offsets[start + 1])
+        for record_index in range(start + 1, end + 1):
+            yield load_token_list(self.handle.read(self.offsets[record_index + 1] - self.offsets[record_index]),
+                                  self.codec)
+
+    def __iter__(self):
+        return self.iterate()
+
+    def close(self) -> None:
+        if not self.indexed:
+            self.legacy_stream.close()
+        self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
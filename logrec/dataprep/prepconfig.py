@@ -68,6 +68,9 @@ class PrepConfig(object):
         PrepParam.MARK_LOGS: 0,
     }
 
+    # number of bpe merges for each value of SPLIT param, the number for 9 (bpe_custom) is passed explicitly
+    bpe_n_merges = {4: 5000, 5: 1000, 6: 10000, 7: 20000, 8: 0}
+
     @staticmethod
     def __check_param_number(n_passed_params: int):
         n_expected_params = len([i for i in PrepParam])
@@ -1,3 +1,4 @@
 import logging
 
-from logrec.dataprep.preprocessors.core import apply_preprocessors, names_to_functions
\ No newline at end of file
+from logrec.dataprep.preprocessors.core import apply_preprocessors, names_to_functions, PreprocessingPlan, \
+    PreprocessingStats
\ No newline at end of file
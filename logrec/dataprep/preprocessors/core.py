@@ -1,6 +1,9 @@
 import importlib
 import logging
 import time
+from collections import deque
+from functools import lru_cache
+from typing import List, Tuple, Dict
 
 logger = logging.getLogger(__name__)
 
@@ -14,21 +17,182 @@ def names_to_functions(pp_names):
     return pps
 
 
-def apply_preprocessors(to_be_processed, preprocessors, context={}):
+def streamable(stream_func):
+    """
+    Marks a preprocessor as having a streaming version: a generator function that takes an iterator over tokens
+    and the context and yields the tokens the preprocessor would return.
+
+    Streaming does not bound the memory taken by a whole plan: a streaming version may have to see all its input
+    before yielding anything (`java.process_comments_and_str_literals` returns its input unchanged if any of it
+    cannot be processed), and preprocessors without a streaming version (e.g. `loggable.mark`) get a list.
+    While such a stage is in the plan, peak memory grows with the size of the file.
+    """
+    def decorator(preprocessor):
+        preprocessor.stream = stream_func
+        return preprocessor
+    return decorator
+
+
+def _materialized(preprocessor, tokens, context):
+    preprocessor_output = _apply_stage(preprocessor, list(tokens), context)
+    # the tokens that have been passed on are not kept here, the next stages may replace them with new ones
+    remaining = deque(preprocessor_output)
+    del preprocessor_output
+    while remaining:
+        yield remaining.popleft()
+
+
+def _stream_stage(preprocessor, tokens, context):
+    """
+    Preprocessors without a streaming version get all the tokens produced by the previous stage as a list,
+    so streaming only bounds the memory taken by the stages between two such preprocessors.
+    """
+    if hasattr(preprocessor, 'stream'):
+        return preprocessor.stream(tokens, context)
+    else:
+        return _materialized(preprocessor, tokens, context)
+
+
+def _count_tokens(tokens, token_counts, stage):
+    count = 0
+    try:
+        for token in tokens:
+            count += 1
+            yield token
+    finally:
+        token_counts[stage] += count
+
+
+def _apply_stage(preprocessor, to_be_processed, context):
+    preprocessor_output = preprocessor(to_be_processed, context)
+    if isinstance(preprocessor_output, tuple):
+        preprocessor_output, add_to_context = preprocessor_output
+        for (k, v) in add_to_context:
+            context[k] = v
+    return preprocessor_output
+
+
+class PreprocessingStats(object):
+    """
+    Stats of the token lists preprocessed with a `PreprocessingPlan`: the total time, numbers of top-level tokens
+    and the number of tokens produced by each stage, and, for the token lists preprocessed stage by stage
+    (not streamed), the time spent in each stage. Hits and lookups of the caches used by the preprocessors
+    can be added by the caller, as only it knows which caches have been used.
+    """
+
+    def __init__(self, stage_names: List[str]):
+        self.stage_names = stage_names
+        self.runs = 0
+        self.time = 0.0
+        self.input_token_count = 0
+        self.output_token_count = 0
+        self.timed_runs = 0
+        self.stage_times = [0.0] * len(stage_names)
+        self.stage_token_counts = [0] * len(stage_names)
+        self.cache_lookups: Dict[str, List[int]] = {}
+
+    def add_cache_lookups(self, cache_name: str, hits: int, lookups: int) -> None:
+        counts = self.cache_lookups.setdefault(cache_name, [0, 0])
+        counts[0] += hits
+        counts[1] += lookups
+
+    def merge(self, other: 'PreprocessingStats') -> None:
+        if self.stage_names != other.stage_names:
+            raise ValueError(f'Cannot merge stats of different plans: {self.stage_names}, {other.stage_names}')
+        self.runs += other.runs
+        self.time += other.time
+        self.input_token_count += other.input_token_count
+        self.output_token_count += other.output_token_count
+        self.timed_runs += other.timed_runs
+        for i in range(len(self.stage_names)):
+            self.stage_times[i] += other.stage_times[i]
+            self.stage_token_counts[i] += other.stage_token_counts[i]
+        for cache_name, (hits, lookups) in other.cache_lookups.items():
+            self.add_cache_lookups(cache_name, hits, lookups)
+
+    def __str__(self):
+        lines = [f'Preprocessed {self.runs} token lists in {self.time:.2f} s: '
+                 f'{self.input_token_count} tokens -> {self.output_token_count} tokens']
+        for cache_name, (hits, lookups) in self.cache_lookups.items():
+            if lookups > 0:
+                lines.append(f'{cache_name} cache hit rate: {hits / lookups * 100:.1f}% '
+                             f'({hits} hits out of {lookups} lookups)')
+        if not self.stage_names:
+            return '\n'.join(lines)
+        if self.timed_runs > 0:
+            lines.append(f'Stages (timed for {self.timed_runs} token lists preprocessed stage by stage):')
+        else:
+            lines.append('Stages:')
+        total_stage_time = sum(self.stage_times)
+        name_width = max(map(len, self.stage_names))
+        for name, t, token_count in zip(self.stage_names, self.stage_times, self.stage_token_counts):
+            line = f'    {name:<{name_width}} {token_count:12} tokens'
+            if self.timed_runs > 0:
+                share = t / total_stage_time * 100 if total_stage_time > 0 else 0.0
+                line += f' {t:10.2f} s {share:6.1f}%'
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+class PreprocessingPlan(object):
+    """
+    Preprocessors resolved from their names once, so that they can be applied to any number of token lists.
+    Stats of the token lists preprocessed are accumulated in `stats`.
+
+    Stages are not timed separately when token lists are streamed through them: the tokens would have to be timed
+    one by one, which takes a noticeable part of the preprocessing time. The tokens they produce are counted though.
+    """
+
+    def __init__(self, preprocessors: List):
+        if preprocessors and isinstance(preprocessors[0], str):
+            self.stage_names = list(preprocessors)
+            self.preprocessors = names_to_functions(preprocessors)
+        else:
+            self.stage_names = [f'{p.__module__.split(".")[-1]}.{p.__name__}' for p in preprocessors]
+            self.preprocessors = list(preprocessors)
+        self.stats = PreprocessingStats(self.stage_names)
+
+    def collect_stats(self) -> PreprocessingStats:
+        """
+        :return: stats accumulated since the plan was created or this method was last called
+        """
+        stats, self.stats = self.stats, PreprocessingStats(self.stage_names)
+        return stats
+
+    def apply(self, to_be_processed, context, streaming: bool = False):
+        stats = self.stats
+        start = time.perf_counter()
+        stats.input_token_count += len(to_be_processed)
+        if streaming:
+            tokens = iter(to_be_processed)
+            for i, preprocessor in enumerate(self.preprocessors):
+                tokens = _count_tokens(_stream_stage(preprocessor, tokens, context), stats.stage_token_counts, i)
+            to_be_processed = list(tokens)
+        else:
+            for i, preprocessor in enumerate(self.preprocessors):
+                stage_start = time.perf_counter()
+                to_be_processed = _apply_stage(preprocessor, to_be_processed, context)
+                stats.stage_times[i] += time.perf_counter() - stage_start
+                stats.stage_token_counts[i] += len(to_be_processed)
+            stats.timed_runs += 1
+        stats.runs += 1
+        stats.time += time.perf_counter() - start
+        stats.output_token_count += len(to_be_processed)
+        return to_be_processed
+
+
+@lru_cache(maxsize=None)
+def _cached_plan(preprocessors: Tuple) -> PreprocessingPlan:
+    return PreprocessingPlan(list(preprocessors))
+
+
+def apply_preprocessors(to_be_processed, preprocessors, context={}, streaming=False):
+    """
+    Applies preprocessors given by their names, as functions or as a `PreprocessingPlan`.
+    Plans for the lists of preprocessors are created once and reused by subsequent calls.
+    """
     if not preprocessors:
         return to_be_processed
-    if isinstance(next(iter(preprocessors)), str):
-        preprocessors = names_to_functions(preprocessors)
-    for preprocessor in preprocessors:
-        start = time.time()
-        preprocessor_output = preprocessor(to_be_processed, context)
-        if isinstance(preprocessor_output, tuple):
-            to_be_processed, add_to_context = preprocessor_output
-            for (k,v) in add_to_context:
-                context[k] = v
-        else:
-            to_be_processed = preprocessor_output
-        t = int(time.time() - start)
-        if t > 0:
-            logger.debug(f"{preprocessor}: {t}s")
-    return to_be_processed
\ No newline at end of file
+    if not isinstance(preprocessors, PreprocessingPlan):
+        preprocessors = _cached_plan(tuple(preprocessors))
+    return preprocessors.apply(to_be_processed, context, streaming)
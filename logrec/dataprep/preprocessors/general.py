@@ -6,6 +6,7 @@ from logrec.dataprep.model.containers import ProcessableTokenContainer
 from logrec.dataprep.model.word import ParseableToken
 
 from logrec.dataprep.preprocessors import java
+from logrec.dataprep.preprocessors.core import streamable
 from logrec.dataprep.model.chars import NewLine, MultilineCommentEnd, MultilineCommentStart, \
     OneLineCommentStart, Quote, Backslash, Tab
 from logrec.dataprep.model.placeholders import placeholders
@@ -28,18 +29,21 @@ def from_list(lst):
 ###############   Multitoken list level   ###########
 
 
-def replace_4whitespaces_with_tabs(token_list, context):
-    result = []
-    for token in token_list:
+def replace_4whitespaces_with_tabs_stream(tokens, context):
+    for token in tokens:
         if isinstance(token, ParseableToken):
             split_line = re.split("( {4})", str(token))
-            result.extend([(Tab() if w == " " * 4 else ParseableToken(w)) for w in split_line])
+            yield from [(Tab() if w == " " * 4 else ParseableToken(w)) for w in split_line]
         elif isinstance(token, ProcessableTokenContainer):
             for subtoken in token.get_subtokens():
-                result.extend(replace_4whitespaces_with_tabs(subtoken))
+                yield from replace_4whitespaces_with_tabs(subtoken)
         else:
-            result.append(token)
-    return result
+            yield token
+
+
+@streamable(replace_4whitespaces_with_tabs_stream)
+def replace_4whitespaces_with_tabs(token_list, context):
+    return list(replace_4whitespaces_with_tabs_stream(token_list, context))
 
 
 def to_token_list(tokens):
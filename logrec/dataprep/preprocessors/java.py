@@ -1,4 +1,5 @@
 import logging
+import re
 import regex
 
 from logrec.dataprep.model.chars import MultilineCommentStart, MultilineCommentEnd, OneLineCommentStart, \
@@ -8,6 +9,7 @@ from logrec.dataprep.model.containers import MultilineComment, OneLineComment, S
 from logrec.dataprep.model.numeric import Number, D, F, L, DecimalPoint, HexStart, E
 from logrec.dataprep.model.placeholders import placeholders
 from logrec.dataprep.model.word import ParseableToken
+from logrec.dataprep.preprocessors.core import streamable
 
 logger = logging.getLogger(__name__)
 
@@ -132,70 +134,132 @@ key_words = [
 NUMBER_REGEX = '-?(?:0x[0-9a-fA-F]+[lL]?|[0-9]+[lL]?|(?:[0-9]*\.[0-9]+|[0-9]+(?:\.[0-9]*)?)(?:[eE][-+]?[0-9]+)?[fFdD]?)'
 
 
-def is_number(s):
-    return regex.fullmatch(NUMBER_REGEX, s)
+number_regex = regex.compile(NUMBER_REGEX)
+# numbers not adjacent to identifiers, captured, so that they are returned by `split`
+numbers_in_text_regex = regex.compile(
+    f'(?:^|(?<=[^[:lower:][:upper:][:digit:]_]))({NUMBER_REGEX})(?![[:lower:][:upper:][:digit:]_.]|$)')
+# every number contains a digit
+digit_regex = re.compile('[0-9]')
 
 
-def find_all_comment_string_literal_symbols(token_list):
-    res = []
-    for ind in range(len(token_list)):
-        if token_list[ind] == QUOTE:
-            i = ind - 1
-            while i >= 0 and token_list[i] == BACKSLASH:
-                i -= 1
-            if (ind - i) % 2 == 1 and (ind == 0 or token_list[ind-1] != "'" or ind +1 >= len(token_list) or token_list[ind+1] != "'"):
-                res.append((ind, token_list[ind]))
-        elif token_list[ind] in [START_MULTILINE_COMMENT, END_MULTILINE_COMMENT, START_ONE_LINE_COMMENT, NEW_LINE]:
-            res.append((ind, token_list[ind]))
-    return res
+def is_number(s):
+    return number_regex.fullmatch(s)
 
 
-def replace_segments(token_list, segments_to_remove):
-    new_token_list = []
+def iterate_with_replaced_segments(token_list, segments_to_remove):
     curr_ind = 0
     for begin, end, clazz in segments_to_remove:
-        new_token_list.extend(token_list[curr_ind:begin])
-        new_token_list.append(clazz(token_list[begin+1:end]))
+        yield from token_list[curr_ind:begin]
+        yield clazz(token_list[begin+1:end])
         curr_ind = end if clazz == OneLineComment else end + 1
     if curr_ind < len(token_list):
-        new_token_list.extend(token_list[curr_ind:])
-    return new_token_list
+        yield from token_list[curr_ind:]
 
-def process_comments_and_str_literals(token_list, context):
-    comment_string_literal_symbols_locations = find_all_comment_string_literal_symbols(token_list)
-    active_symbol, active_symbol_index = None, -1
+
+def replace_segments(token_list, segments_to_remove):
+    return list(iterate_with_replaced_segments(token_list, segments_to_remove))
+
+
+# tags of the tokens that open, close or escape comments and string literals
+QUOTE_TAG = 1
+BACKSLASH_TAG = 2
+START_MULTILINE_COMMENT_TAG = 3
+END_MULTILINE_COMMENT_TAG = 4
+START_ONE_LINE_COMMENT_TAG = 5
+NEW_LINE_TAG = 6
+
+comment_string_literal_tags = {
+    Quote: QUOTE_TAG,
+    Backslash: BACKSLASH_TAG,
+    MultilineCommentStart: START_MULTILINE_COMMENT_TAG,
+    MultilineCommentEnd: END_MULTILINE_COMMENT_TAG,
+    OneLineCommentStart: START_ONE_LINE_COMMENT_TAG,
+    NewLine: NEW_LINE_TAG,
+}
+
+
+def _is_apostrophe(token):
+    return token.__class__ is str and token == "'"
+
+
+def _log_unprocessable(token_list, index):
+    logger.warning(f"{repr(' '.join(map(str, token_list[index-100:index+1])))}, index: {index}")
+
+
+def find_comments_and_str_literals(token_list):
+    """
+    Scans the token list once, the tokens are told apart by their types.
+
+    Quotes preceded by an odd number of backslashes and quotes in char literals (`'"'`) are skipped.
+    Symbols between the start and the end of a comment or a string literal are ignored.
+
+    :return: segments of the token list to be replaced with comments and string literals,
+    None if the token list cannot be processed
+    """
+    tags = comment_string_literal_tags
     segments_to_remove = []
+    active_tag, active_index = None, -1
+    preceding_backslashes = 0
+    for index, token in enumerate(token_list):
+        tag = tags.get(token.__class__)
+        if tag is None:
+            preceding_backslashes = 0
+            continue
+        if tag == BACKSLASH_TAG:
+            preceding_backslashes += 1
+            continue
+        if tag == QUOTE_TAG:
+            escaped = preceding_backslashes % 2 == 1
+            preceding_backslashes = 0
+            if escaped or (0 < index < len(token_list) - 1 and _is_apostrophe(token_list[index - 1])
+                           and _is_apostrophe(token_list[index + 1])):
+                continue
+        else:
+            preceding_backslashes = 0
 
-    for index, symbol in comment_string_literal_symbols_locations:
-        if active_symbol is None:
-            if symbol == END_MULTILINE_COMMENT:
-                logger.warning(
-                    f"{repr(' '.join(list(map(lambda t: str(t),token_list[index-100:index+1]))))}, index: {index}")
-                return token_list
-            elif symbol == NEW_LINE:
-                pass
-            else:
-                active_symbol, active_symbol_index = symbol, index
-        elif active_symbol == QUOTE:
-            if symbol == NEW_LINE:
-                logger.warning(
-                    f"{repr(' '.join(list(map(lambda t: str(t),token_list[index-100:index+1]))))}, index: {index}")
-                return token_list
-            elif symbol == QUOTE:
-                segments_to_remove.append((active_symbol_index, index, StringLiteral))
-                active_symbol, active_symbol_index = None, -1
-        elif active_symbol == START_ONE_LINE_COMMENT:
-            if symbol == NEW_LINE:
-                segments_to_remove.append((active_symbol_index, index, OneLineComment))
-                active_symbol, active_symbol_index = None, -1
-        elif active_symbol == START_MULTILINE_COMMENT:
-            if symbol == END_MULTILINE_COMMENT:
-                segments_to_remove.append((active_symbol_index, index, MultilineComment))
-                active_symbol, active_symbol_index = None, -1
+        if active_tag is None:
+            if tag == END_MULTILINE_COMMENT_TAG:
+                _log_unprocessable(token_list, index)
+                return None
+            elif tag != NEW_LINE_TAG:
+                active_tag, active_index = tag, index
+        elif active_tag == QUOTE_TAG:
+            if tag == NEW_LINE_TAG:
+                _log_unprocessable(token_list, index)
+                return None
+            elif tag == QUOTE_TAG:
+                segments_to_remove.append((active_index, index, StringLiteral))
+                active_tag, active_index = None, -1
+        elif active_tag == START_ONE_LINE_COMMENT_TAG:
+            if tag == NEW_LINE_TAG:
+                segments_to_remove.append((active_index, index, OneLineComment))
+                active_tag, active_index = None, -1
+        elif active_tag == START_MULTILINE_COMMENT_TAG:
+            if tag == END_MULTILINE_COMMENT_TAG:
+                segments_to_remove.append((active_index, index, MultilineComment))
+                active_tag, active_index = None, -1
         else:
-            raise AssertionError(f"Unknown symbol: {active_symbol}")
-    token_list = replace_segments(token_list, segments_to_remove)
-    return token_list
+            raise AssertionError(f"Unknown tag: {active_tag}")
+    return segments_to_remove
+
+
+def process_comments_and_str_literals_stream(tokens, context):
+    # the whole input has to be seen before anything is returned: if it cannot be processed, it is returned unchanged.
+    # Together with the preprocessors without a streaming version, this stage sets the peak memory of the pipeline
+    token_list = list(tokens)
+    segments_to_remove = find_comments_and_str_literals(token_list)
+    if segments_to_remove is None:
+        yield from token_list
+    else:
+        yield from iterate_with_replaced_segments(token_list, segments_to_remove)
+
+
+@streamable(process_comments_and_str_literals_stream)
+def process_comments_and_str_literals(token_list, context):
+    segments_to_remove = find_comments_and_str_literals(token_list)
+    if segments_to_remove is None:
+        return token_list
+    return replace_segments(token_list, segments_to_remove)
 
 def replace(token_list, start, end, new_symbol):
     len_before_replacement = len(token_list)
@@ -219,49 +283,65 @@ def strip_off_identifiers(token_list, context):
     return result
 
 
+def to_number(number):
+    """
+    :param number: string matching `NUMBER_REGEX`
+    """
+    parts_of_number = []
+    if number.startswith('-'):
+        parts_of_number.append('-')
+        number = number[1:]
+    if number.startswith("0x"):
+        parts_of_number.append(HexStart())
+        number = number[2:]
+        hex = True
+    else:
+        hex = False
+    for ch in number:
+        if ch == '.':
+            parts_of_number.append(DecimalPoint())
+        elif ch == 'l' or ch == 'L':
+            parts_of_number.append(L())
+        elif (ch == 'f' or ch == 'F') and not hex:
+            parts_of_number.append(F())
+        elif (ch == 'd' or ch == 'D') and not hex:
+            parts_of_number.append(D())
+        elif (ch == 'e' or ch == 'E') and not hex:
+            parts_of_number.append(E())
+        else:
+            parts_of_number.append(ch)
+    return Number(parts_of_number)
+
+
 def process_number_literal(possible_number):
     if is_number(possible_number) and possible_number not in tabs:
-        parts_of_number = []
-        if possible_number.startswith('-'):
-            parts_of_number.append('-')
-            possible_number = possible_number[1:]
-        if possible_number.startswith("0x"):
-            parts_of_number.append(HexStart())
-            possible_number = possible_number[2:]
-            hex = True
-        else:
-            hex = False
-        for ch in possible_number:
-            if ch == '.':
-                parts_of_number.append(DecimalPoint())
-            elif ch == 'l' or ch == 'L':
-                parts_of_number.append(L())
-            elif (ch == 'f' or ch == 'F') and not hex:
-                parts_of_number.append(F())
-            elif (ch == 'd' or ch == 'D') and not hex:
-                parts_of_number.append(D())
-            elif (ch == 'e' or ch == 'E') and not hex:
-                parts_of_number.append(E())
-            else:
-                parts_of_number.append(ch)
-        return Number(parts_of_number)
+        return to_number(possible_number)
     else:
         return ParseableToken(possible_number)
 
 
-def process_numeric_literals(token_list, context):
-    res = []
-    for token in token_list:
+def process_numeric_literals_stream(tokens, context):
+    for token in tokens:
         if isinstance(token, ParseableToken):
-            numbers_separated = list(
-                filter(None, regex.split(
-                    f'(?:^|(?<=[^[:lower:][:upper:][:digit:]_]))({NUMBER_REGEX})(?![[:lower:][:upper:][:digit:]_.]|$)',
-                    str(token))))
-            for possible_number in numbers_separated:
-               res.append(process_number_literal(possible_number))
+            s = str(token)
+            if digit_regex.search(s) is None:
+                # neither a number nor a part of the line can be one
+                if s:
+                    yield ParseableToken(s)
+                continue
+            for i, part in enumerate(numbers_in_text_regex.split(s)):
+                # every second part is a number found in the line
+                if i % 2:
+                    yield to_number(part)
+                elif part:
+                    yield process_number_literal(part)
         elif isinstance(token, ProcessableTokenContainer):
             for subtoken in token.get_subtokens():
-                res.extend(process_numeric_literals(subtoken))
+                yield from process_numeric_literals(subtoken)
         else:
-            res.append(token)
-    return res
+            yield token
+
+
+@streamable(process_numeric_literals_stream)
+def process_numeric_literals(token_list, context):
+    return list(process_numeric_literals_stream(token_list, context))
@@ -4,6 +4,7 @@ from enum import Enum, auto
 from logrec.dataprep.model.chars import NewLine, Tab
 from logrec.dataprep.model.containers import SplitContainer
 from logrec.dataprep.model.logging import LogStatement, LogLevel, TRACE, FATAL, ERROR, WARN, INFO, DEBUG, UNKNOWN
+from logrec.dataprep.preprocessors.core import streamable
 
 LOGGER_REGEX = re.compile("[Ll]og|LOG|[Ll]ogger|LOGGER")
 
@@ -146,29 +147,35 @@ class SemicolonFinder(LogSearchState):
         return self
 
 
-def mark(token_list, context):
-    new_tokens = []
+def mark_stream(tokens, context):
+    """
+    Only the tokens that might belong to a log statement being built are held back.
+    """
     suspected_log_tokens = []
     state = Searching()
     log_statement = LogStatement()
-    for token in token_list:
+    for token in tokens:
         search_result = state.check(token)
         if search_result == SearchResult.NOT_FOUND:
-            new_tokens.append(token)
+            yield token
         elif search_result == SearchResult.IN_PROGRESS:
             suspected_log_tokens.append(token)
             state = state.action(log_statement, token)
         elif search_result == SearchResult.FAILED:
             state = Searching()
-            new_tokens.extend(suspected_log_tokens)  # in case 'log statement' was found,
+            yield from suspected_log_tokens  # in case 'log statement' was found,
             # but later wasn't marked as log statement
             suspected_log_tokens = []  # TODO come up with unit-tests that will fail without this line
-            new_tokens.append(token)
+            yield token
         elif search_result == SearchResult.BUILT:
-            new_tokens.append(log_statement)
+            yield log_statement
             log_statement = LogStatement()
             suspected_log_tokens = []
             state = Searching()
         else:
             raise AssertionError()
-    return new_tokens
+
+
+@streamable(mark_stream)
+def mark(token_list, context):
+    return list(mark_stream(token_list, context))
@@ -6,15 +6,23 @@ from logrec.dataprep.model.containers import ProcessableTokenContainer
 from logrec.dataprep.model.logging import LogStatement
 from logrec.dataprep.model.noneng import NonEng
 from logrec.dataprep.model.word import Word
+from logrec.dataprep.preprocessors.core import streamable
 
 logger = logging.getLogger(__name__)
 
 lang_checker = LanguageChecker(path_to_eng_dicts, path_to_non_eng_dicts)
 
+def mark_token(token):
+    return apply_operation_to_token(token, lambda t, c: c(t) if lang_checker.is_non_eng(t.get_canonic_form()) else t)
+
+
+def mark_stream(tokens, context):
+    return map(mark_token, tokens)
+
+
+@streamable(mark_stream)
 def mark(token_list, context):
-    return [
-        apply_operation_to_token(token, lambda t, c: c(t) if lang_checker.is_non_eng(t.get_canonic_form()) else t)
-        for token in token_list]
+    return [mark_token(token) for token in token_list]
 
 
 # TODO merge this with similar function in split.py
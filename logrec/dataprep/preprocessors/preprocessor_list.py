@@ -3,7 +3,7 @@ pp_params = {
         "java.process_numeric_literals",
 
         "general.replace_4whitespaces_with_tabs",
-        "general.spl_verbose",
+        "lexer.tokenize_verbose",
 
         "split.simple_split",
         # "legacy.merge_tabs",
@@ -2,13 +2,21 @@ import logging
 import regex
 ############   Multitoken list level    ###############3
 import time
+from functools import lru_cache
+from typing import Tuple
 
 from logrec.dataprep import util
 from logrec.dataprep.model.containers import ProcessableTokenContainer, SplitContainer
 from logrec.dataprep.model.word import ParseableToken, Word, Underscore
+from logrec.dataprep.preprocessors.core import streamable
 
 logger = logging.getLogger(__name__)
 
+# identifiers are very repetitive, the splittings of this number of the most recent ones are kept in each process
+SPLIT_CACHE_SIZE = 1 << 16
+
+identifier_parts_regex = regex.compile('(_|[0-9]+|[[:upper:]]?[[:lower:]]+|[[:upper:]]+(?![[:lower:]]))')
+
 
 class SplittingDict(metaclass=util.Singleton):
     def __init__(self, splitting_file_location):
@@ -25,18 +33,46 @@ def get_splitting_dictionary(splitting_file_location):
     return SplittingDict(splitting_file_location).splitting_dict
 
 
+def simple_split_stream(tokens, context):
+    return map(simple_split_token, tokens)
+
+
+@streamable(simple_split_stream)
 def simple_split(token_list, context):
     return [simple_split_token(identifier) for identifier in token_list]
 
 #############  Token Level ################
 
+@lru_cache(maxsize=SPLIT_CACHE_SIZE)
+def split_identifier(identifier: str) -> Tuple:
+    """
+    :return: words and underscores the identifier consists of. They are shared by all the occurrences
+    of the identifier, so they must not be modified.
+    """
+    parts = [m[0] for m in identifier_parts_regex.finditer(identifier)]
+    return tuple(Word.from_(p) if p != '_' else Underscore() for p in parts)
+
+
+def split_cache_lookups() -> Tuple[int, int]:
+    """
+    :return: numbers of the identifiers split in this process which were found in the cache and of all of them
+    """
+    cache_info = split_identifier.cache_info()
+    return cache_info.hits, cache_info.hits + cache_info.misses
+
+
+def split_cache_hit_rate() -> float:
+    """
+    :return: share of the identifiers split in this process which were found in the cache
+    """
+    hits, lookups = split_cache_lookups()
+    return hits / lookups if lookups > 0 else 0.0
+
+
 def simple_split_token(token):
     if isinstance(token, ParseableToken):
-        parts = [m[0] for m in
-                 regex.finditer('(_|[0-9]+|[[:upper:]]?[[:lower:]]+|[[:upper:]]+(?![[:lower:]]))', str(token))]
-        # if len("".join(parts)) ==
-        processable_tokens = [Word.from_(p) if p != '_' else Underscore() for p in parts]
-        return SplitContainer(processable_tokens)
+        # every container gets its own list, so that it can be modified
+        return SplitContainer(list(split_identifier(str(token))))
     elif isinstance(token, ProcessableTokenContainer):
         return type(token)([simple_split_token(subtoken) for subtoken in token.get_subtokens()])
     else:
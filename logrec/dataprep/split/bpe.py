@@ -1,13 +1,20 @@
 import argparse
+import itertools
 import logging
 import os
+import pickle
+import shutil
 import re, collections
-from typing import Optional, Dict
+from array import array
+from multiprocessing.pool import Pool
+from typing import Optional, Dict, List, Tuple, Union
 
 import time
 
 from logrec.dataprep import BPE_DIR, METADATA_DIR
 from logrec.dataprep.model.placeholders import placeholders
+from logrec.dataprep.prepconfig import PrepConfig
+from logrec.dataprep.split.merges_cache import dump_merges_cache, MERGES_CACHE_BIN_FILE_NAME
 from logrec.dataprep.preprocessors.java import special_tokens
 from logrec.dataprep.util import dump_dict_into_2_columns, dump_list, read_list, read_dict_from_2_columns
 from logrec.properties import DEFAULT_PARSED_DATASETS_DIR, DEFAULT_BPE_ARGS
@@ -49,14 +56,251 @@ def merge_vocab(pair, v_in, pairs):
     return v_out
 
 
+SHARDS_PER_WORKER = 4
+
+# words of the vocab being symbolized by a pool worker and symbol ids, set by `init_symbolizing_worker`
+vocab_for_workers = None
+# symbolized words being counted by a pool worker, their frequencies and the number of symbols,
+# set by `init_counting_worker`
+words_for_workers = None
+
+
+def init_symbolizing_worker(words: List[str], symbol_ids: Dict[str, int]) -> None:
+    global vocab_for_workers
+    vocab_for_workers = words, symbol_ids
+
+
+def init_counting_worker(words: List[List[int]], freqs: List[int], n_symbols: int) -> None:
+    global words_for_workers
+    words_for_workers = words, freqs, n_symbols
+
+
+def split_into_shards(n_items: int, workers: int) -> List[Tuple[int, int]]:
+    shard_size = n_items // (workers * SHARDS_PER_WORKER) + 1
+    return [(start, min(start + shard_size, n_items)) for start in range(0, n_items, shard_size)]
+
+
+def symbolize_shard(shard: Tuple[int, int]) -> Tuple[array, array, array, array, array]:
+    """
+    Converts words [start, end) of `vocab_for_workers` into symbol ids and indexes their pairs.
+
+    :return: lengths of the words, their symbol ids, pairs encoded as `first * n_symbols + second`
+    in the order of their first occurrence, offsets of the ids of the words containing each pair in
+    the last array: ids of the words containing the first pair, the second one, etc.
+    """
+    start, end = shard
+    words, symbol_ids = vocab_for_workers
+    n_symbols = len(symbol_ids)
+    word_lengths = array('i')
+    word_symbols = array('i')
+    index = {}
+    for word_id in range(start, end):
+        ids = [symbol_ids[symbol] for symbol in words[word_id].split()]
+        word_lengths.append(len(ids))
+        word_symbols.extend(ids)
+        for i in range(len(ids) - 1):
+            key = ids[i] * n_symbols + ids[i + 1]
+            word_ids = index.get(key)
+            if word_ids is None:
+                index[key] = [word_id]
+            elif word_ids[-1] != word_id:
+                word_ids.append(word_id)
+    offsets = array('q', [0])
+    index_word_ids = array('q')
+    for word_ids in index.values():
+        index_word_ids.extend(word_ids)
+        offsets.append(len(index_word_ids))
+    return word_lengths, word_symbols, array('q', index.keys()), offsets, index_word_ids
+
+
+def count_pairs_in_shard(shard: Tuple[int, int]) -> Tuple[array, array]:
+    """
+    Counts pairs in words [start, end) of `words_for_workers`. Pairs are encoded as
+    `first * n_symbols + second` and returned in the order of their first occurrence
+    """
+    start, end = shard
+    words, freqs, n_symbols = words_for_workers
+    counts = collections.defaultdict(int)
+    for word_id in range(start, end):
+        symbol_ids = words[word_id]
+        freq = freqs[word_id]
+        for i in range(len(symbol_ids) - 1):
+            counts[symbol_ids[i] * n_symbols + symbol_ids[i + 1]] += freq
+    return array('q', counts.keys()), array('q', counts.values())
+
+
+class BpeLearner(object):
+    """
+    Keeps every word of the vocab as a list of symbol ids and maintains an inverted index
+    from a pair of symbol ids to the ids of the words containing this pair, so that a merge
+    only touches the words that actually change.
+
+    Pair frequencies are updated with the same deltas and in the same order as `merge_vocab` does,
+    therefore the learnt merges and the resulting vocab are identical to the ones produced by it.
+    """
+
+    def __init__(self, vocab: Dict[str, int], workers: int = 1):
+        self.symbols = []
+        self.symbol_ids = {}
+        self.words = []
+        self.freqs = []
+        self.pair_index = collections.defaultdict(set)
+        if workers > 1:
+            self.__init_in_parallel(vocab, workers)
+            return
+        for word, freq in vocab.items():
+            symbol_ids = [self.__intern(symbol) for symbol in word.split()]
+            word_id = len(self.words)
+            self.words.append(symbol_ids)
+            self.freqs.append(freq)
+            self.__index_word(word_id, symbol_ids)
+
+    def __init_in_parallel(self, vocab: Dict[str, int], workers: int) -> None:
+        """
+        Symbols are interned in the order of their first occurrence (the same as by the sequential version),
+        then words are converted into symbol ids and their pairs are indexed by the workers in contiguous shards
+        """
+        words = list(vocab.keys())
+        self.freqs = list(vocab.values())
+        self.symbols = list(dict.fromkeys(itertools.chain.from_iterable(map(str.split, words))))
+        self.symbol_ids = {symbol: symbol_id for symbol_id, symbol in enumerate(self.symbols)}
+        n_symbols = len(self.symbols)
+        shards = split_into_shards(len(words), workers)
+        logger.info(f'Symbolizing words in {len(shards)} shards using {workers} workers')
+        with Pool(workers, initializer=init_symbolizing_worker, initargs=(words, self.symbol_ids)) as pool:
+            for word_lengths, word_symbols, pair_keys, offsets, index_word_ids in pool.imap(symbolize_shard, shards):
+                ends = list(itertools.accumulate(word_lengths))
+                starts = [0] + ends[:-1]
+                self.words.extend(map(word_symbols.tolist().__getitem__, map(slice, starts, ends)))
+                for i, key in enumerate(pair_keys):
+                    self.pair_index[divmod(key, n_symbols)].update(index_word_ids[offsets[i]:offsets[i + 1]])
+
+    def __intern(self, symbol: str) -> int:
+        if symbol not in self.symbol_ids:
+            self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return self.symbol_ids[symbol]
+
+    def __index_word(self, word_id: int, symbol_ids: List[int]) -> None:
+        for i in range(len(symbol_ids) - 1):
+            self.pair_index[symbol_ids[i], symbol_ids[i + 1]].add(word_id)
+
+    def __unindex_word(self, word_id: int, symbol_ids: List[int]) -> None:
+        for i in range(len(symbol_ids) - 1):
+            pair = symbol_ids[i], symbol_ids[i + 1]
+            word_ids = self.pair_index.get(pair)
+            if word_ids is not None:
+                word_ids.discard(word_id)
+                if not word_ids:
+                    del self.pair_index[pair]
+
+    def get_stats(self, workers: int = 1) -> PriorityCounter:
+        if workers > 1:
+            return self.__get_stats_in_parallel(workers)
+
+        pairs = collections.defaultdict(int)
+        for symbol_ids, freq in zip(self.words, self.freqs):
+            for i in range(len(symbol_ids) - 1):
+                pairs[symbol_ids[i], symbol_ids[i + 1]] += freq
+        return PriorityCounter(pairs)
+
+    def __get_stats_in_parallel(self, workers: int) -> PriorityCounter:
+        """
+        Shards are contiguous ranges of words reduced in order, so that pairs are inserted
+        into the `PriorityCounter` in the same order as by the sequential version
+        """
+        shards = split_into_shards(len(self.words), workers)
+        logger.info(f'Counting pairs in {len(shards)} shards using {workers} workers')
+        n_symbols = len(self.symbols)
+        encoded_pairs = collections.defaultdict(int)
+        with Pool(workers, initializer=init_counting_worker, initargs=(self.words, self.freqs, n_symbols)) as pool:
+            for keys, counts in pool.imap(count_pairs_in_shard, shards):
+                for key, count in zip(keys, counts):
+                    encoded_pairs[key] += count
+        return PriorityCounter({divmod(key, n_symbols): count for key, count in encoded_pairs.items()})
+
+    def to_symbols(self, pair: Tuple[int, int]) -> Tuple[str, str]:
+        return self.symbols[pair[0]], self.symbols[pair[1]]
+
+    @staticmethod
+    def _merge_word(symbol_ids: List[int], first: int, second: int, merged: int) -> List[int]:
+        result = []
+        i = 0
+        while i < len(symbol_ids):
+            if i < len(symbol_ids) - 1 and symbol_ids[i] == first and symbol_ids[i + 1] == second:
+                result.append(merged)
+                i += 2
+            else:
+                result.append(symbol_ids[i])
+                i += 1
+        return result
+
+    def merge(self, pair: Tuple[int, int], pairs: PriorityCounter) -> None:
+        first, second = pair
+        concat_pair = self.symbols[first] + self.symbols[second]
+        merged = self.__intern(concat_pair)
+        for word_id in sorted(self.pair_index.pop(pair, ())):
+            old_symbol_ids = self.words[word_id]
+            new_symbol_ids = BpeLearner._merge_word(old_symbol_ids, first, second, merged)
+            self.__unindex_word(word_id, old_symbol_ids)
+            self.__index_word(word_id, new_symbol_ids)
+            self.words[word_id] = new_symbol_ids
+            self.__update_pairs(new_symbol_ids, self.freqs[word_id], first, second, merged, concat_pair, pairs)
+
+    def __update_pairs(self, symbol_ids: List[int], freq: int, first: int, second: int, merged: int,
+                       concat_pair: str, pairs: PriorityCounter) -> None:
+        # mirrors the two `re.search` calls in `merge_vocab`: only the leftmost
+        # symbol followed by the merged pair and the leftmost symbol preceded by it are updated
+        for i in range(len(symbol_ids) - 1):
+            if self.symbols[symbol_ids[i + 1]].startswith(concat_pair):
+                pairs.add((symbol_ids[i], merged), freq)
+                pairs.add((symbol_ids[i], first), -freq)
+                break
+        for i in range(len(symbol_ids) - 1):
+            if self.symbols[symbol_ids[i]].endswith(concat_pair):
+                pairs.add((merged, symbol_ids[i + 1]), freq)
+                pairs.add((second, symbol_ids[i + 1]), -freq)
+                break
+
+    def to_arrays(self) -> Tuple[array, array, array]:
+        return (array('i', map(len, self.words)),
+                array('i', itertools.chain.from_iterable(self.words)),
+                array('q', self.freqs))
+
+    @classmethod
+    def from_arrays(cls, symbols: List[str], word_lengths: array, word_symbols: array, freqs: array):
+        learner = cls({})
+        learner.symbols = symbols
+        learner.symbol_ids = {symbol: symbol_id for symbol_id, symbol in enumerate(symbols)}
+        learner.freqs = freqs.tolist()
+        offset = 0
+        for word_id, length in enumerate(word_lengths):
+            symbol_ids = word_symbols[offset:offset + length].tolist()
+            learner.words.append(symbol_ids)
+            learner.__index_word(word_id, symbol_ids)
+            offset += length
+        return learner
+
+    def get_vocab(self) -> Dict[str, int]:
+        return {' '.join(map(lambda s: self.symbols[s], symbol_ids)): freq
+                for symbol_ids, freq in zip(self.words, self.freqs)}
+
+
 VOCAB_FILE_NAME = "vocab"
 REASSEMBLED_VOCAB_FILE_NAME = "vocab_reassembled.txt"
 MERGES_FILE_NAME = "merges.txt"
 MERGES_CACHE_FILE_NAME = "merges_cache.txt"
 RESULTING_VOCAB_FILE_NAME = "vocab_res.txt"
+CHECKPOINT_FILE_NAME = "checkpoint"
+NOT_FINISHED_EXTENSION = "part"
 
+CHECKPOINT_VERSION = 1
 
-def get_most_recent_bpe_dir(base_dir: str) -> Optional[str]:
+
+def get_most_recent_bpe_dir(base_dir: str, max_n_merges: Optional[int] = None) -> Optional[str]:
+    """
+    :return: the bpe dir with the biggest number of merges, not bigger than `max_n_merges` if it is given
+    """
     common_bpe_dir = os.path.join(base_dir, BPE_DIR)
     if not os.path.exists(common_bpe_dir):
         logger.warning(f'Directory {common_bpe_dir} does not exist!')
@@ -66,7 +310,7 @@ def get_most_recent_bpe_dir(base_dir: str) -> Optional[str]:
     for subdir in subdirs:
         try:
             num = int(subdir)
-            if num > max_number:
+            if num > max_number and (max_n_merges is None or num <= max_n_merges):
                 max_number = num
         except ValueError:
             pass
@@ -98,23 +342,132 @@ Dict[str, int], Dict[str, int]):
     return vocab, non_splitable_vocab
 
 
-def run(dataset: str, repr: str, n_merges: int, reset: bool) -> None:
+def write_bpe_dir(base_dir: str, merges: List, vocab: Dict[str, int], non_splitable_vocab: Dict[str, int],
+                  exist_ok: bool = False) -> None:
+    new_bpe_dir = os.path.join(base_dir, BPE_DIR, str(len(merges)))
+    if os.path.exists(new_bpe_dir):
+        if exist_ok:
+            logger.warning(f'Dir {new_bpe_dir} already exists. Not overwriting it.')
+            return
+        raise AssertionError(f'Dir {new_bpe_dir} already exists? Something went wrong.'
+                             f'Check the contents of {os.path.join(base_dir, BPE_DIR)} folder')
+
+    for k, v in non_splitable_vocab.items():
+        vocab[k] = v
+    resulting_vocab = collections.defaultdict(int)
+    for entry, frequency in vocab.items():
+        for subword in entry.split(" "):
+            resulting_vocab[subword] += frequency
+    resulting_vocab_sorted = sorted(resulting_vocab.items(), key=lambda x: x[1], reverse=True)
+
+    merges_cache = {}
+    for entry, frequency in vocab.items():
+        subword_list = entry.split(' ')
+        key = ''.join(subword_list)
+        merges_cache[key] = subword_list
+
+    # files are written into a temporary dir first so that a killed run never leaves a half-written bpe dir
+    not_finished_dir = f'{new_bpe_dir}.{NOT_FINISHED_EXTENSION}'
+    if os.path.exists(not_finished_dir):
+        shutil.rmtree(not_finished_dir)
+    os.makedirs(not_finished_dir)
+
+    dump_list(merges, os.path.join(not_finished_dir, MERGES_FILE_NAME))
+    dump_dict_into_2_columns(vocab, os.path.join(not_finished_dir, REASSEMBLED_VOCAB_FILE_NAME))
+    dump_dict_into_2_columns(merges_cache, os.path.join(not_finished_dir, MERGES_CACHE_FILE_NAME), val_type=list)
+    dump_merges_cache(merges_cache, os.path.join(not_finished_dir, MERGES_CACHE_BIN_FILE_NAME))
+    dump_dict_into_2_columns(resulting_vocab_sorted, os.path.join(not_finished_dir, RESULTING_VOCAB_FILE_NAME))
+    os.rename(not_finished_dir, new_bpe_dir)
+    logger.info(f'Bpe output files are saved into {new_bpe_dir} folder')
+
+
+def save_checkpoint(path_to_checkpoint: str, learner: BpeLearner, pairs: PriorityCounter, merges: List,
+                    non_splitable_vocab: Dict[str, int]) -> None:
+    word_lengths, word_symbols, freqs = learner.to_arrays()
+    entries, next_count = pairs.get_state()
+    checkpoint = {
+        'version': CHECKPOINT_VERSION,
+        'merges': merges,
+        'non_splitable_vocab': non_splitable_vocab,
+        'symbols': learner.symbols,
+        'word_lengths': word_lengths,
+        'word_symbols': word_symbols,
+        'freqs': freqs,
+        'pair_priorities': array('q', (entry[0] for entry in entries)),
+        'pair_counts': array('q', (entry[1] for entry in entries)),
+        'pair_firsts': array('i', (entry[2][0] for entry in entries)),
+        'pair_seconds': array('i', (entry[2][1] for entry in entries)),
+        'next_count': next_count
+    }
+    with open(f'{path_to_checkpoint}.{NOT_FINISHED_EXTENSION}', 'wb') as f:
+        pickle.dump(checkpoint, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(f'{path_to_checkpoint}.{NOT_FINISHED_EXTENSION}', path_to_checkpoint)
+    logger.info(f'Checkpoint after {len(merges)} merges is saved to {path_to_checkpoint}')
+
+
+def load_checkpoint(path_to_checkpoint: str) -> Tuple[BpeLearner, PriorityCounter, List, Dict[str, int]]:
+    with open(path_to_checkpoint, 'rb') as f:
+        checkpoint = pickle.load(f)
+    if checkpoint['version'] != CHECKPOINT_VERSION:
+        raise ValueError(f'Checkpoint version {checkpoint["version"]} is not supported, '
+                         f'expected version: {CHECKPOINT_VERSION}')
+    learner = BpeLearner.from_arrays(checkpoint['symbols'], checkpoint['word_lengths'],
+                                     checkpoint['word_symbols'], checkpoint['freqs'])
+    entries = zip(checkpoint['pair_priorities'], checkpoint['pair_counts'],
+                  zip(checkpoint['pair_firsts'], checkpoint['pair_seconds']))
+    pairs = PriorityCounter.from_state(entries, checkpoint['next_count'])
+    return learner, pairs, checkpoint['merges'], checkpoint['non_splitable_vocab']
+
+
+def existing_bpe_dirs(base_dir: str) -> List[int]:
+    common_bpe_dir = os.path.join(base_dir, BPE_DIR)
+    if not os.path.exists(common_bpe_dir):
+        return []
+    return [int(subdir) for subdir in next(os.walk(common_bpe_dir))[1] if subdir.isdigit()]
+
+
+def run(dataset: str, repr: str, n_merges: Union[int, List[int]], reset: bool, workers: int = 1,
+        checkpoint_every: int = 0) -> None:
+    """
+    :param n_merges: total number of merges to be done or a list of such numbers, a bpe dir is written for each
+    of them in one learning pass. Numbers for which bpe dirs already exist are skipped (unless `reset` is set).
+    The learning is resumed from the checkpoint or the bpe dir with the biggest number of merges
+    not bigger than the smallest of the numbers left, so that a bpe dir can be written for each of them
+    """
+    n_merges_targets = sorted(set([n_merges] if isinstance(n_merges, int) else n_merges))
     base_dir = os.path.join(DEFAULT_PARSED_DATASETS_DIR, dataset, METADATA_DIR, repr)
+    path_to_checkpoint = os.path.join(base_dir, BPE_DIR, CHECKPOINT_FILE_NAME)
+    learner = None
     if reset:
         starting_from_scratch = True
         archive_existing_common_bpe_folder(base_dir)
     else:
-        logger.info("Using existing merges...")
-        most_recent_bpe_dir = get_most_recent_bpe_dir(base_dir)
-        if not most_recent_bpe_dir:
-            logger.warning("Existing merges not found ")
-            starting_from_scratch = True
-        else:
-            all_vocab = read_dict_from_2_columns(
-                os.path.join(most_recent_bpe_dir, REASSEMBLED_VOCAB_FILE_NAME))
-            vocab, non_splitable_vocab = separate_non_splittable_vocab(all_vocab, from_reassambled=True)
-            merges = read_list(os.path.join(most_recent_bpe_dir, MERGES_FILE_NAME))
-            starting_from_scratch = False
+        existing = set(existing_bpe_dirs(base_dir))
+        already_done = [n for n in n_merges_targets if n in existing]
+        if already_done:
+            logger.info(f'Bpe dirs already exist for {already_done} merges, skipping them')
+        n_merges_targets = [n for n in n_merges_targets if n not in existing]
+        if not n_merges_targets:
+            return
+        starting_from_scratch = False
+        if os.path.exists(path_to_checkpoint):
+            logger.info(f"Resuming from checkpoint {path_to_checkpoint}...")
+            learner, pairs, merges, non_splitable_vocab = load_checkpoint(path_to_checkpoint)
+            if len(merges) > n_merges_targets[0]:
+                logger.warning(f'Checkpoint has {len(merges)} merges, more than {n_merges_targets[0]} merges '
+                               f'that have to be written, not using it')
+                learner = None
+        if learner is None:
+            logger.info("Using existing merges...")
+            most_recent_bpe_dir = get_most_recent_bpe_dir(base_dir, max_n_merges=n_merges_targets[0])
+            if not most_recent_bpe_dir:
+                logger.warning("Existing merges not found ")
+                starting_from_scratch = True
+            else:
+                all_vocab = read_dict_from_2_columns(
+                    os.path.join(most_recent_bpe_dir, REASSEMBLED_VOCAB_FILE_NAME))
+                vocab, non_splitable_vocab = separate_non_splittable_vocab(all_vocab, from_reassambled=True)
+                merges = read_list(os.path.join(most_recent_bpe_dir, MERGES_FILE_NAME))
 
     if starting_from_scratch:
         logger.info("Starting the encoding from scratch...")
@@ -122,51 +475,58 @@ def run(dataset: str, repr: str, n_merges: int, reset: bool) -> None:
         vocab, non_splitable_vocab = separate_non_splittable_vocab(all_vocab, from_reassambled=False)
         merges = []
 
-    pairs = get_stats(vocab)
-    n_done_merges = len(merges)
-    for i in range(n_merges):
+    if learner is None:
+        learner = BpeLearner(vocab, workers)
+        pairs = learner.get_stats(workers)
+    n_merges_total = n_merges_targets[-1]
+    intermediate_n_merges = set(n_merges_targets[:-1])
+    if len(merges) in intermediate_n_merges:
+        write_bpe_dir(base_dir, merges, learner.get_vocab(), non_splitable_vocab, exist_ok=True)
+    while len(merges) < n_merges_total:
         try:
             best = pairs.pop_pair()
-            print(f'Processing pair number {n_done_merges + i+1} {best}')
-            merges.append(best)
+            print(f'Processing pair number {len(merges) + 1} {learner.to_symbols(best)}')
+            merges.append(learner.to_symbols(best))
         except KeyError:
             break
-        vocab = merge_vocab(best, vocab, pairs)
+        learner.merge(best, pairs)
+        if len(merges) < n_merges_total:
+            checkpoint_needed = checkpoint_every and len(merges) % checkpoint_every == 0
+            if checkpoint_needed or len(merges) in intermediate_n_merges:
+                write_bpe_dir(base_dir, merges, learner.get_vocab(), non_splitable_vocab, exist_ok=True)
+            if checkpoint_needed:
+                save_checkpoint(path_to_checkpoint, learner, pairs, merges, non_splitable_vocab)
 
-    for k, v in non_splitable_vocab.items():
-        vocab[k] = v
-    resulting_vocab = collections.defaultdict(int)
-    for entry, frequency in vocab.items():
-        for subword in entry.split(" "):
-            resulting_vocab[subword] += frequency
-    resulting_vocab_sorted = sorted(resulting_vocab.items(), key=lambda x: x[1], reverse=True)
+    no_pairs_left = len(merges) < n_merges_total
+    if no_pairs_left:
+        logger.warning(f'No pairs left to merge after {len(merges)} merges.')
 
-    merges_cache = {}
-    for entry, frequency in vocab.items():
-        subword_list = entry.split(' ')
-        key = ''.join(subword_list)
-        merges_cache[key] = subword_list
-
-    new_bpe_dir = os.path.join(base_dir, BPE_DIR, str(len(merges)))
-    if os.path.exists(new_bpe_dir):
-        raise AssertionError(f'Dir {new_bpe_dir} already exists? Something went wrong.'
-                             f'Check the contents of {os.path.join(base_dir, BPE_DIR)} folder')
-    os.makedirs(new_bpe_dir)
-
-    dump_list(merges, os.path.join(new_bpe_dir, MERGES_FILE_NAME))
-    dump_dict_into_2_columns(vocab, os.path.join(new_bpe_dir, REASSEMBLED_VOCAB_FILE_NAME))
-    dump_dict_into_2_columns(merges_cache, os.path.join(new_bpe_dir, MERGES_CACHE_FILE_NAME), val_type=list)
-    dump_dict_into_2_columns(resulting_vocab_sorted, os.path.join(new_bpe_dir, RESULTING_VOCAB_FILE_NAME))
-    logger.info(f'Bpe output files are saved into {new_bpe_dir} folder')
+    write_bpe_dir(base_dir, merges, learner.get_vocab(), non_splitable_vocab, exist_ok=no_pairs_left)
+    if os.path.exists(path_to_checkpoint):
+        os.remove(path_to_checkpoint)
 
 
 if __name__ == '__main__':
     argument_parser = argparse.ArgumentParser()
     argument_parser.add_argument('dataset', action='store', help=f'dataset name')
     argument_parser.add_argument('repr', action='store', help=f'repr name')
-    argument_parser.add_argument('n_merges', action='store', type=int)
+    argument_parser.add_argument('n_merges', action='store', type=int, nargs='*',
+                                 help='one or more total numbers of merges, a bpe dir is created for each of them '
+                                      'unless it already exists')
+    argument_parser.add_argument('--all-split-values', action='store_true',
+                                 help=f'create bpe dirs for all the numbers of merges used by SPLIT param: '
+                                      f'{PrepConfig.bpe_n_merges}')
     argument_parser.add_argument('--reset', action='store_true')
+    argument_parser.add_argument('--checkpoint-every', action='store', type=int, default=0,
+                                 help='save a checkpoint and a bpe dir every n merges, '
+                                      'a killed run is resumed from the last checkpoint')
+    argument_parser.add_argument('--workers', action='store', type=int, default=1,
+                                 help='number of processes used to index the words and count pairs '
+                                      'before the first merge')
 
     args = argument_parser.parse_args(*DEFAULT_BPE_ARGS)
+    n_merges = args.n_merges + (list(PrepConfig.bpe_n_merges.values()) if args.all_split_values else [])
+    if not n_merges:
+        argument_parser.error('At least one number of merges must be specified')
 
-    run(args.dataset, args.repr, args.n_merges, args.reset)
+    run(args.dataset, args.repr, n_merges, args.reset, args.workers, args.checkpoint_every)
@@ -1,32 +1,75 @@
 import argparse
 import logging
-import sys
+from functools import lru_cache
+from heapq import heappush, heappop
+from typing import Dict, Tuple, List, Iterable, Union
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CACHE_SIZE = 100000
+
+
+class BpeEncoder(object):
+    """
+    Applies bpe merges to words. Adjacent pairs are kept in a heap ordered by merge priority (and by position
+    to resolve ties the same way as the original left-to-right scan), subwords are kept in a linked list,
+    so encoding a word of n characters takes O(n log n).
+
+    Encoded words are kept in a bounded LRU cache which is shared by all the calls to the encoder.
+    """
+
+    def __init__(self, merges: Union[Dict[Tuple[str, str], int], List[Tuple[str, str]]],
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.merges = merges if isinstance(merges, dict) else {tuple(m): i for i, m in enumerate(merges)}
+        self._cached_encode = lru_cache(maxsize=cache_size)(self._encode)
+
+    def _push_pair(self, heap: list, subwords: List[str], left: int, right: int) -> None:
+        priority = self.merges.get((subwords[left], subwords[right]))
+        if priority is not None:
+            heappush(heap, (priority, left, subwords[left], subwords[right]))
+
+    def _encode(self, word: str) -> List[str]:
+        subwords = list(word)
+        n = len(subwords)
+        if n < 2:
+            return [word]
+        nxt = list(range(1, n + 1))
+        prev = list(range(-1, n - 1))
+        heap = []
+        for i in range(n - 1):
+            self._push_pair(heap, subwords, i, i + 1)
+        while heap:
+            _, left, left_subword, right_subword = heappop(heap)
+            right = nxt[left]
+            if subwords[left] != left_subword or right >= n or subwords[right] != right_subword:
+                # stale entry: one of the subwords has been merged since the pair was pushed
+                continue
+            subwords[left] = left_subword + right_subword
+            subwords[right] = None
+            nxt[left] = nxt[right]
+            if nxt[left] < n:
+                prev[nxt[left]] = left
+                self._push_pair(heap, subwords, left, nxt[left])
+            if prev[left] >= 0:
+                self._push_pair(heap, subwords, prev[left], left)
+        return [s for s in subwords if s is not None]
+
+    def encode(self, word: str) -> List[str]:
+        """
+        The returned list is shared with the cache and must not be modified
+        """
+        return self._cached_encode(word)
+
+    def encode_many(self, words: Iterable[str]) -> List[List[str]]:
+        return [self._cached_encode(word) for word in words]
+
+    def cache_info(self):
+        return self._cached_encode.cache_info()
+
+
 def encode(words, merges):
-    letters_list = {" ".join(k): v for k, v in words.items()}
-
-    new_letters_list = {}
-    for letters, freq in letters_list.items():
-        subwords = letters.split(" ")
-        while True:
-            merge_index = None
-            merge_candidate_priority = sys.maxsize
-            for i in range(len(subwords) - 1):
-                merge_candidate = (subwords[i], subwords[i + 1])
-                if merge_candidate in merges:
-                    if merges[merge_candidate] < merge_candidate_priority:
-                        merge_candidate_priority = merges[merge_candidate]
-                        merge_index = i
-            if merge_index is None:
-                break
-            concat_pair = ''.join([subwords[merge_index], subwords[merge_index + 1]])
-            del subwords[merge_index]
-            del subwords[merge_index]
-            subwords = subwords[:merge_index] + [concat_pair] + subwords[merge_index:]
-        new_letters_list[" ".join(subwords)] = freq
-    return new_letters_list
+    encoder = BpeEncoder(merges)
+    return {" ".join(encoder.encode(word)): freq for word, freq in words.items()}
 
 
 def read_merges(merges_file):
@@ -39,18 +82,23 @@ def read_merges(merges_file):
 
 
 def encode_word(word, merges):
-    enc_word, _ = encode({word: 0}, merges).popitem()
-    subwords = enc_word.split(" ")
-    return subwords
+    return list(BpeEncoder(merges, cache_size=0).encode(word))
+
+
+def encode_file(encoder: BpeEncoder, input_file: str, output_file: str, delim: str = '\t') -> None:
+    with open(input_file, 'r') as i, open(output_file, 'w') as o:
+        for line in i:
+            word, freq = line.rstrip('\n').split(delim, 1)
+            o.write(f'{" ".join(encoder.encode(word))}{delim}{freq}\n')
 
 
-__all__ = [read_merges, encode_word]
+__all__ = [read_merges, encode_word, BpeEncoder]
 
 
 if __name__ == '__main__':
     arg_parser = argparse.ArgumentParser()
     arg_parser.add_argument('--merges-file', action='store', help='path to file with merges')
-    arg_parser.add_argument('word', action='store', help='word to encode', default='if')
+    arg_parser.add_argument('word', action='store', nargs='?', help='word to encode', default='if')
     arg_parser.add_argument('--input', action='store')
     arg_parser.add_argument('--output', action='store')
 
@@ -58,12 +106,12 @@ if __name__ == '__main__':
     args = arg_parser.parse_args(*DEFAULT_BPE_ENCODE_ARGS)
 
     merges = read_merges(args.merges_file)
+    encoder = BpeEncoder(merges)
 
     if args.input and args.output:
         # working with files
-        words = io.read_dict_from_2_columns(args.input)
-        new_words = encode(words, merges)
-        io.dump_dict_into_2_columns(new_words, args.output)
+        encode_file(encoder, args.input, args.output)
+        logger.info(f'Cache stats: {encoder.cache_info()}')
     else:
-        subwords = encode_word(args.word, merges)
+        subwords = encoder.encode(args.word)
         print(subwords)
@@ -0,0 +1,155 @@
+import argparse
+import logging
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, List, Optional
+
+from logrec.dataprep.util import read_dict_from_2_columns
+
+logger = logging.getLogger(__name__)
+
+MERGES_CACHE_BIN_FILE_NAME = "merges_cache.bin"
+
+MAGIC = b'MRGCACHE'
+VERSION = 1
+# magic, version, number of words, number of distinct subwords, total number of subwords in all the splittings
+HEADER = struct.Struct('<8sIQQQ')
+HEADER_SIZE = 40  # HEADER.size padded to 8 bytes
+
+
+def _pad(n: int) -> int:
+    return (n + 7) // 8 * 8
+
+
+def dump_merges_cache(merges_cache: Dict[str, List[str]], file: str) -> None:
+    """
+    Binary format: header, word offsets, offsets into subword ids, subword ids, subword offsets,
+    sorted words (utf-8), distinct subwords (utf-8). Words are sorted by their code points,
+    which is also the order of their utf-8 representations, so they can be binary searched in place.
+    """
+    subword_ids = {}
+    word_offsets, ref_offsets, refs, subword_offsets = array('Q', [0]), array('Q', [0]), array('I'), array('Q', [0])
+    word_bytes, subword_bytes = bytearray(), bytearray()
+    for word in sorted(merges_cache.keys()):
+        word_bytes += word.encode('utf-8')
+        word_offsets.append(len(word_bytes))
+        for subword in merges_cache[word]:
+            if subword not in subword_ids:
+                subword_ids[subword] = len(subword_ids)
+                subword_bytes += subword.encode('utf-8')
+                subword_offsets.append(len(subword_bytes))
+            refs.append(subword_ids[subword])
+        ref_offsets.append(len(refs))
+
+    with open(f'{file}.part', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(merges_cache), len(subword_ids), len(refs)).ljust(HEADER_SIZE, b'\0'))
+        f.write(word_offsets.tobytes())
+        f.write(ref_offsets.tobytes())
+        f.write(refs.tobytes().ljust(_pad(len(refs) * refs.itemsize), b'\0'))
+        f.write(subword_offsets.tobytes())
+        f.write(word_bytes)
+        f.write(subword_bytes)
+    os.replace(f'{file}.part', file)
+
+
+class MergesCache(object):
+    """
+    Read-only view of a merges cache dumped with `dump_merges_cache`. The file is memory-mapped lazily
+    in each process that uses it, so pool workers share the pages of the page cache instead of
+    holding their own copies of a dict of lists. Subwords are decoded once per process.
+    """
+
+    def __init__(self, file: str):
+        self.file = file
+        self._pid = None
+
+    def __getstate__(self):
+        return {'file': self.file}
+
+    def __setstate__(self, state):
+        self.__init__(state['file'])
+
+    def _open(self) -> None:
+        with open(self.file, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_words, n_subwords, n_refs = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{self.file} is not a merges cache file of version {VERSION}')
+        view = memoryview(self._mm)
+        pos = HEADER_SIZE
+        self._word_offsets = view[pos:pos + (n_words + 1) * 8].cast('Q')
+        pos += (n_words + 1) * 8
+        self._ref_offsets = view[pos:pos + (n_words + 1) * 8].cast('Q')
+        pos += (n_words + 1) * 8
+        self._refs = view[pos:pos + n_refs * 4].cast('I')
+        pos += _pad(n_refs * 4)
+        self._subword_offsets = view[pos:pos + (n_subwords + 1) * 8].cast('Q')
+        pos += (n_subwords + 1) * 8
+        self._words_start = pos
+        self._subwords_start = pos + self._word_offsets[n_words]
+        self._n_words = n_words
+        self._subwords = {}
+        self._pid = os.getpid()
+
+    def __ensure_open(self) -> None:
+        if self._pid != os.getpid():
+            self._open()
+
+    def __len__(self):
+        self.__ensure_open()
+        return self._n_words
+
+    def __find(self, word: str) -> int:
+        key = word.encode('utf-8')
+        mm, offsets, start = self._mm, self._word_offsets, self._words_start
+        lo, hi = 0, self._n_words
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = mm[start + offsets[mid]:start + offsets[mid + 1]]
+            if current < key:
+                lo = mid + 1
+            elif current > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def __subword(self, subword_id: int) -> str:
+        subword = self._subwords.get(subword_id)
+        if subword is None:
+            begin = self._subwords_start + self._subword_offsets[subword_id]
+            end = self._subwords_start + self._subword_offsets[subword_id + 1]
+            subword = self._mm[begin:end].decode('utf-8')
+            self._subwords[subword_id] = subword
+        return subword
+
+    def get(self, word: str, default: Optional[List[str]] = None) -> Optional[List[str]]:
+        self.__ensure_open()
+        index = self.__find(word)
+        if index < 0:
+            return default
+        return [self.__subword(subword_id) for subword_id in
+                self._refs[self._ref_offsets[index]:self._ref_offsets[index + 1]]]
+
+    def __contains__(self, word: str) -> bool:
+        self.__ensure_open()
+        return self.__find(word) >= 0
+
+    def __getitem__(self, word: str) -> List[str]:
+        subwords = self.get(word)
+        if subwords is None:
+            raise KeyError(word)
+        return subwords
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Converts merges_cache.txt into the binary format')
+    parser.add_argument('path_to_bpe_dir', action='store', help='path to the dir with merges_cache.txt')
+
+    args = parser.parse_args()
+
+    merges_cache = read_dict_from_2_columns(os.path.join(args.path_to_bpe_dir, 'merges_cache.txt'), val_type=list)
+    dump_merges_cache(merges_cache, os.path.join(args.path_to_bpe_dir, MERGES_CACHE_BIN_FILE_NAME))
+    logger.info(f'Binary merges cache is saved to {os.path.join(args.path_to_bpe_dir, MERGES_CACHE_BIN_FILE_NAME)}')
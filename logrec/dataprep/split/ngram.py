@@ -1,6 +1,6 @@
 from enum import Enum, auto
 
-from logrec.dataprep.split.bpe_encode import encode_word
+from logrec.dataprep.split.bpe_encode import BpeEncoder
 
 
 
@@ -15,6 +15,7 @@ class NgramSplitConfig(object):
         self._splitting_type = splitting_type
         self._merges_cache = merges_cache
         self._merges = merges
+        self._bpe_encoder = None
         self._sc_splittings = sc_splittings
 
     @property
@@ -25,6 +26,12 @@ class NgramSplitConfig(object):
     def merges(self):
         return self._merges
 
+    @property
+    def bpe_encoder(self):
+        if self._bpe_encoder is None:
+            self._bpe_encoder = BpeEncoder(self._merges)
+        return self._bpe_encoder
+
     @property
     def sc_splittings(self):
         return self._sc_splittings
@@ -32,6 +39,7 @@ class NgramSplitConfig(object):
     @merges.setter
     def merges(self, m):
         self._merges = m
+        self._bpe_encoder = None
 
     @merges_cache.setter
     def merges_cache(self, m):
@@ -50,12 +58,11 @@ class NgramSplitConfig(object):
 
 
 def get_bpe_subwords(word, config):
-    merges = config.merges
-    cache = config.merges_cache
-    if word in cache:
-        return cache[word]
+    subwords = config.merges_cache.get(word)
+    if subwords is not None:
+        return subwords
     else:
-        return encode_word(word, merges)
+        return config.bpe_encoder.encode(word)
 
 
 def get_sc_subwords(word, config):
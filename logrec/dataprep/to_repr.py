@@ -1,20 +1,22 @@
 import argparse
-import gzip
 import logging
 import os
-import pickle
+import shutil
 import time
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
 from multiprocessing.pool import Pool
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 import jsons
 
 from logrec.dataprep import base_project_dir, METADATA_DIR, BPE_DIR, PARSED_DIR
+from logrec.dataprep.parsed_file import ParsedFile
 from logrec.dataprep.preprocessors.general import to_token_list
 from logrec.dataprep.prepconfig import PrepParam, get_types_to_be_repr, PrepConfig
 from logrec.dataprep.preprocessors.repr import to_repr_list, ReprConfig
 from logrec.dataprep.split.bpe_encode import read_merges
+from logrec.dataprep.split.merges_cache import MergesCache, MERGES_CACHE_BIN_FILE_NAME
 from logrec.dataprep.split.ngram import NgramSplittingType, NgramSplitConfig
 from logrec.dataprep.util import read_dict_from_2_columns
 from logrec.properties import DEFAULT_PARSED_DATASETS_DIR, DEFAULT_TO_REPR_ARGS
@@ -25,6 +27,9 @@ PARSED_FILE_EXTENSION = "parsed"
 REPR_EXTENSION = "repr"
 NOT_FINISHED_EXTENSION = "part"
 
+# parsed files with more source files than this are split between multiple processes
+SOURCE_FILES_PER_TASK = 1000
+
 
 class ReprWriter(metaclass=ABCMeta):
     def __init__(self, dest_file, mode, extension):
@@ -68,30 +73,55 @@ def to_repr(prep_config: PrepConfig, token_list: List, n_gramm_splitting_config:
     return repr_list
 
 
-def preprocess_and_write(params):
-    src_file, dest_file, prep_config = params
+def get_dest_file_for_part(dest_file: str, part: int) -> str:
+    # hidden, so that it is not taken for a repr of a whole project
+    return os.path.join(os.path.dirname(dest_file), f'.{os.path.basename(dest_file)}.{part}')
+
+
+def preprocess_and_write(params) -> Tuple[str, Optional[int]]:
+    """
+    Converts source files from `start` to `end` of a parsed file. If `part` is specified,
+    the result is written to a separate file to be concatenated with the other parts by `join_parts`.
+    """
+    src_file, dest_file, prep_config, start, end, part = params
     if not os.path.exists(src_file):
         logger.error(f"File {src_file} does not exist")
         exit(2)
 
-    logger.info(f"Preprocessing parsed file {src_file}")
-    with gzip.GzipFile(src_file, 'rb') as i:
-        preprocessing_param_dict = pickle.load(i)
-        writer = FinalReprWriter(dest_file)
-
-        if os.path.exists(writer.get_full_dest_name()):
-            logger.warning(f"File {writer.get_full_dest_name()} already exists! Doing nothing.")
-            return
-        with writer as w:
-            while True:
-                try:
-                    token_list = pickle.load(i)
-                    repr = to_repr(prep_config, token_list, global_n_gramm_splitting_config)
-                    w.write(repr)
-                except EOFError:
-                    break
+    writer = FinalReprWriter(dest_file if part is None else get_dest_file_for_part(dest_file, part))
+    if os.path.exists(writer.get_full_dest_name()):
+        logger.warning(f"File {writer.get_full_dest_name()} already exists! Doing nothing.")
+        return dest_file, part
+
+    logger.info(f"Preprocessing parsed file {src_file}" + (f" (source files {start}-{end})" if part is not None else ""))
+    with ParsedFile(src_file) as parsed_file, writer as w:
+        for token_list in parsed_file.iterate(start, end):
+            repr = to_repr(prep_config, token_list, global_n_gramm_splitting_config)
+            w.write(repr)
     # remove .part to show that all raw files in this chunk have been preprocessed
     os.rename(f'{writer.get_full_dest_name()}.{NOT_FINISHED_EXTENSION}', f'{writer.get_full_dest_name()}')
+    return dest_file, part
+
+
+def join_parts(dest_file: str, n_parts: int) -> None:
+    writer = FinalReprWriter(dest_file)
+    with open(f'{writer.get_full_dest_name()}.{NOT_FINISHED_EXTENSION}', 'w') as f:
+        for part in range(n_parts):
+            path_to_part = FinalReprWriter(get_dest_file_for_part(dest_file, part)).get_full_dest_name()
+            with open(path_to_part, 'r') as part_file:
+                shutil.copyfileobj(part_file, f)
+    os.rename(f'{writer.get_full_dest_name()}.{NOT_FINISHED_EXTENSION}', f'{writer.get_full_dest_name()}')
+    for part in range(n_parts):
+        os.remove(FinalReprWriter(get_dest_file_for_part(dest_file, part)).get_full_dest_name())
+
+
+def create_tasks(src_file: str, dest_file: str, prep_config: PrepConfig) -> List[Tuple]:
+    with ParsedFile(src_file) as parsed_file:
+        n_source_files = len(parsed_file) if parsed_file.indexed else None
+    if n_source_files is None or n_source_files <= SOURCE_FILES_PER_TASK:
+        return [(src_file, dest_file, prep_config, 0, None, None)]
+    return [(src_file, dest_file, prep_config, start, start + SOURCE_FILES_PER_TASK, part)
+            for part, start in enumerate(range(0, n_source_files, SOURCE_FILES_PER_TASK))]
 
 
 def init_splitting_config(dataset: str, prep_config: PrepConfig,
@@ -106,8 +136,7 @@ def init_splitting_config(dataset: str, prep_config: PrepConfig,
             if not bpe_n_merges:
                 raise ValueError("--bpe-n-merges must be specified for repr **9**")
         else:
-            bpe_n_merges_dict = {4: 5000, 5: 1000, 6: 10000, 7: 20000, 8: 0}
-            bpe_n_merges = bpe_n_merges_dict[prep_config.get_param_value(PrepParam.SPLIT)]
+            bpe_n_merges = PrepConfig.bpe_n_merges[prep_config.get_param_value(PrepParam.SPLIT)]
 
         if bpe_base_repr.find("/") == -1:
             bpe_base_dataset = dataset
@@ -121,8 +150,13 @@ def init_splitting_config(dataset: str, prep_config: PrepConfig,
                                           str(bpe_n_merges))
         bpe_merges_file = os.path.join(path_to_merges_dir, 'merges.txt')
         bpe_merges_cache = os.path.join(path_to_merges_dir, 'merges_cache.txt')
+        bpe_merges_cache_bin = os.path.join(path_to_merges_dir, MERGES_CACHE_BIN_FILE_NAME)
 
-        global_n_gramm_splitting_config.merges_cache = read_dict_from_2_columns(bpe_merges_cache, val_type=list)
+        if os.path.exists(bpe_merges_cache_bin):
+            # memory-mapped by each worker instead of being copied into it
+            global_n_gramm_splitting_config.merges_cache = MergesCache(bpe_merges_cache_bin)
+        else:
+            global_n_gramm_splitting_config.merges_cache = read_dict_from_2_columns(bpe_merges_cache, val_type=list)
         global_n_gramm_splitting_config.merges = read_merges(bpe_merges_file)
         global_n_gramm_splitting_config.set_splitting_type(NgramSplittingType.BPE)
     elif prep_config.get_param_value(PrepParam.SPLIT) == 3:
@@ -164,6 +198,8 @@ def run(dataset: str, preprocessing_params: str, bpe_base_repr: Optional[str],
         f.write(json_str)
 
     params = []
+    n_parts = {}
+    parts_done = defaultdict(int)
     for root, dirs, files in os.walk(full_src_dir):
         for file in files:
             if file.endswith(f".{PARSED_FILE_EXTENSION}"):
@@ -171,15 +207,25 @@ def run(dataset: str, preprocessing_params: str, bpe_base_repr: Optional[str],
                 full_dest_dir_with_sub_dir = os.path.join(full_dest_dir, os.path.relpath(root, full_src_dir))
                 if not os.path.exists(full_dest_dir_with_sub_dir):
                     os.makedirs(full_dest_dir_with_sub_dir)
-                params.append((os.path.join(root, file),
-                               os.path.join(full_dest_dir_with_sub_dir, file),
-                               preprocessing_params))
+                dest_file = os.path.join(full_dest_dir_with_sub_dir, file)
+                if os.path.exists(FinalReprWriter(dest_file).get_full_dest_name()):
+                    logger.warning(f"File {FinalReprWriter(dest_file).get_full_dest_name()} already exists! "
+                                   f"Doing nothing.")
+                    continue
+                tasks = create_tasks(os.path.join(root, file), dest_file, preprocessing_params)
+                if len(tasks) > 1:
+                    n_parts[dest_file] = len(tasks)
+                params.extend(tasks)
     files_total = len(params)
     current_file = 0
     start_time = time.time()
     with Pool() as pool:
         it = pool.imap_unordered(preprocess_and_write, params)
-        for _ in it:
+        for dest_file, part in it:
+            if part is not None:
+                parts_done[dest_file] += 1
+                if parts_done[dest_file] == n_parts[dest_file]:
+                    join_parts(dest_file, n_parts[dest_file])
             current_file += 1
             logger.info(f"Processed {current_file} out of {files_total}")
             time_elapsed = time.time() - start_time
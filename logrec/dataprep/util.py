@@ -1,5 +1,3 @@
-import multiprocessing
-import threading
 from typing import Dict, Tuple, List
 
 
@@ -54,48 +52,6 @@ class Singleton(type):
         return cls._instances[cls]
 
 
-class AtomicInteger(object):
-    def __init__(self, v=0):
-        self._lock = threading.Lock()
-        self._queue = multiprocessing.Queue()
-        for i in range(v):
-            self._queue.put(1)
-
-    def inc(self):
-        with self._lock:
-            self._queue.put(1)
-            return self._queue.qsize()
-
-    def dec(self):
-        with self._lock:
-            self._queue.get()
-            return self._queue.qsize()
-
-    def compare_and_dec(self, val):
-        with self._lock:
-            result = self._queue.qsize() == val
-            self._queue.get()
-            return result
-
-    def get_and_dec(self):
-        with self._lock:
-            result = self._queue.qsize()
-            self._queue.get()
-            return result
-
-    @property
-    def value(self):
-        with self._lock:
-            return self._queue.qsize()
-
-    @value.setter
-    def value(self, v):
-        with self._lock:
-            self._queue = multiprocessing.Queue()
-            for i in range(v):
-                self._queue.put(1)
-
-
 def dump_dict_into_2_columns(dct, file, val_type=str, delim='\t', append=False):
     with open(file, 'w+' if append else 'w') as f:
         lst = dct.items() if isinstance(dct, dict) else dct
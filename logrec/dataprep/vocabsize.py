@@ -1,10 +1,12 @@
 import argparse
+import heapq
 import logging.config
+import math
 import multiprocessing
 import os
-import signal
-from multiprocessing import Queue
-from typing import List, Tuple, Dict
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Tuple, Optional, Iterable, Iterator, Callable, Dict
 
 import dill as pickle
 import shutil
@@ -12,46 +14,62 @@ import time
 from collections import Counter, defaultdict
 from multiprocessing.pool import Pool
 
-from torchtext.data import Field
-
-from logrec.dataprep import TRAIN_DIR, METADATA_DIR, REPR_DIR, TEXT_FIELD_FILE
+from logrec.dataprep import TRAIN_DIR, METADATA_DIR, REPR_DIR, TEXT_FIELD_FILE, COMPACT_VOCAB_FILE
 from logrec.dataprep.model.placeholders import placeholders
 from logrec.dataprep.to_repr import REPR_EXTENSION
-from logrec.dataprep.util import AtomicInteger, merge_dicts_
+from logrec.dataprep.util import merge_dicts_
 from logrec.util import io
+from logrec.util.hyperloglog import HyperLogLog, DEFAULT_PRECISION
 from logrec.util.files import file_mapper
 
 logger = logging.getLogger(__name__)
 
-queue_size = AtomicInteger()
-
 PARTVOCAB_EXT = 'partvocab'
 VOCABSIZE_FILENAME = 'vocabsize'
 VOCAB_FILENAME = 'vocab'
 
 N_CHUNKS = 20
-BLOCKING_TIMEOUT_SECONDS_SHORT = 5
-BLOCKING_TIMEOUT_SECONDS_LONG = 300
+DEFAULT_MEMORY_BUDGET_MB = 1024
+# rough size of a Counter entry together with its key
+ESTIMATED_BYTES_PER_WORD = 150
+# number of partial vocabs merged into one at each level of the reduction tree
+DEFAULT_FAN_IN = 4
+SOURCES_EXT = 'sources'
+NOT_FINISHED_EXT = 'part'
+RUN_EXT = 'run'
+# max number of runs read simultaneously when merging them
+MAX_RUNS_TO_MERGE = 128
+# number of points of the vocab growth curve estimated with sketches
+DEFAULT_N_SKETCH_POINTS = 100
+
+
+def get_stats_entry(n_files: int, word_counts: Counter) -> Tuple[int, int, int, int]:
+    return (n_files,
+            len(word_counts),
+            word_counts[placeholders['non_eng']],
+            word_counts[placeholders['non_eng_content']])
 
 
 class PartialVocab(object):
     CLASS_VERSION = '2.0.0'
 
-    def __init__(self, word_counts: Counter, chunk: int):
+    def __init__(self, word_counts: Counter, chunk: int, stats: Optional[List[Tuple[int, int, int, int]]] = None):
+        """
+        :param stats: stats entries collected while the files were being folded into `word_counts`,
+        if not specified, `word_counts` is considered to be the vocab of a single file
+        """
         if not isinstance(word_counts, Counter):
             raise TypeError(f'Vocab must be a Counter, but is {type(word_counts)}')
 
         self.merged_word_counts = word_counts
-        self.stats = [(1,
-                       len(self.merged_word_counts),
-                       self.merged_word_counts[placeholders['non_eng']],
-                       self.merged_word_counts[placeholders['non_eng_content']])]
-        self.n_files = 1
+        self.stats = stats if stats is not None else [get_stats_entry(1, self.merged_word_counts)]
+        self.n_files = self.stats[-1][0]
         self.chunk = chunk
         self.id = self.__generate_id()
 
     def __generate_id(self) -> str:
-        return ''.join(str(time.time()).split('.'))
+        # pid is added as vocabs can be created simultaneously in different processes
+        return f'{time.time():.6f}'.replace('.', '') + str(os.getpid())
 
     def renew_id(self) -> None:
         self.id = self.__generate_id()
@@ -64,13 +82,9 @@ class PartialVocab(object):
             raise TypeError(f'Vocab must be a PartialVocab, but is {type(partial_vocab)}')
 
         self.merged_word_counts, new_words = merge_dicts_(self.merged_word_counts, partial_vocab.merged_word_counts)
-        cur_vocab_size = len(self.merged_word_counts)
 
         self.n_files += partial_vocab.n_files
-        new_stats_entry = (self.n_files,
-                           cur_vocab_size,
-                           self.merged_word_counts[placeholders['non_eng']],
-                           self.merged_word_counts[placeholders['non_eng_content']])
+        new_stats_entry = get_stats_entry(self.n_files, self.merged_word_counts)
         self.stats.extend(partial_vocab.stats + [new_stats_entry])
         return new_words
 
@@ -87,8 +101,15 @@ class PartialVocab(object):
         io.dump_dict_into_2_columns(sorted_vocab, path_to_vocab_file)
 
     def write_field(self, path_to_field_file: str) -> None:
-        text_field = Field(tokenize=lambda s: s.split(" "), pad_token=placeholders['pad_token'])
-        text_field.build_vocab([[i] for i in self.merged_word_counts.keys()])
+        """
+        Besides the pickled field, writes its vocab in the compact format next to it,
+        which is much faster to load (see `FS.load_text_field`)
+        """
+        # imported here so that the vocab can be calculated without torchtext being installed
+        from logrec.dataprep.compact_vocab import create_field, dump_compact_vocab
+
+        text_field, itos, counts = create_field(self.merged_word_counts)
+        dump_compact_vocab(itos, counts, os.path.join(os.path.dirname(path_to_field_file), COMPACT_VOCAB_FILE))
         pickle.dump(text_field, open(path_to_field_file, 'wb'))
 
     def __generate_stats(self):
@@ -99,111 +120,44 @@ class PartialVocab(object):
         return sorted(fin.items())
 
 
-class VocabMerger(multiprocessing.Process):
-    def __init__(self, id: int, tasks: Dict[int, Queue], path_to_dump: str, process_counter: AtomicInteger,
-                 chunk_queue: Queue, chunk_queue_elm_counter: AtomicInteger):
-        multiprocessing.Process.__init__(self)
-        self.id = id
-        self.tasks = tasks
-        self.path_to_dump = path_to_dump
-        self.process_counter = process_counter
-        self.chunk_queue = chunk_queue
-        self.chunk_queue_elm_counter = chunk_queue_elm_counter
-        self.total_merges = chunk_queue_elm_counter.value
-
-    def run(self):
-        import time
-        logger.info('Sleeping 5 seconds before all the merges have started...')
-        time.sleep(5)
-        while True:
-            chunk_assigned = self.chunk_queue.get(block=True, timeout=BLOCKING_TIMEOUT_SECONDS_SHORT)
-            if chunk_assigned == -1:
-                if not self.process_counter.compare_and_dec(1):
-                    logger.debug(
-                        f"[{self.id}] No vocabs available for merge. "
-                        f"Terminating process..., mergers left: {self.process_counter.value}")
-                    break
-                else:
-                    logger.info("Leaving 1 process to finish the merges")
-                    self.__finish_merges()
-                    logger.info(f'[{self.id}] Vocab files are saved. Terminating the process...')
-                    break
-
-            first = self.tasks[chunk_assigned].get(block=True, timeout=BLOCKING_TIMEOUT_SECONDS_LONG)
-            second = self.tasks[chunk_assigned].get(block=True, timeout=BLOCKING_TIMEOUT_SECONDS_LONG)
-
-            start = time.time()
-
-            merges_left = self.chunk_queue_elm_counter.get_and_dec()
-            merges_done = self.total_merges - merges_left
-            log_this_merge = (merges_left & (merges_left - 1) == 0 or merges_done & (merges_done - 1) == 0)
-            if log_this_merge:
-                logger.info(
-                    f'[{self.id}] Merging vocabs ({self.total_merges - merges_left} out of {self.total_merges})')
-
-            first, new_words = self.__merge_(first, second)
-
-            if log_this_merge:
-                self.__log_merge_results(new_words, len(first.merged_word_counts), time.time() - start)
-
-            self.tasks[chunk_assigned].put_nowait(first)
-
-    def __finish_merges(self):
-        logger.info("===============     Finishing merges    ===============")
-        list_from_chunks = [queue.get(block=True, timeout=BLOCKING_TIMEOUT_SECONDS_SHORT) for queue in
-                            self.tasks.values()]
-
-        percents_in_one_chunk = 100 // len(list_from_chunks)
-
-        first = list_from_chunks.pop()
-        for i, vocab in enumerate(list_from_chunks):
-            logger.info(
-                f'{(i+1)* percents_in_one_chunk}% + {percents_in_one_chunk}%  ---> {(i+2) * percents_in_one_chunk}%')
-
-            start = time.time()
-
-            first, new_words = self.__merge_(first, vocab)
-
-            self.__log_merge_results(new_words, len(first.merged_word_counts), time.time() - start)
-
-        first.write_stats(os.path.join(full_metadata_dir, VOCABSIZE_FILENAME))
-        first.write_vocab(os.path.join(full_metadata_dir, VOCAB_FILENAME))
-        first.write_field(os.path.join(full_metadata_dir, TEXT_FIELD_FILE))
-        shutil.rmtree(self.path_to_dump)
-
-    def __log_merge_results(self, new_words: List[str], resulting_vocab_size: int, time: float):
-        logger.debug(f"[{self.id}] New words: {new_words[:10]} ..., total: {len(new_words)}")
-        logger.info(
-            f"[{self.id}] Merging took {time:.3f} s, current vocab size: {resulting_vocab_size}")
-
-    def __merge_(self, first: PartialVocab, second: PartialVocab) -> Tuple[PartialVocab, List[str]]:
-        first_id = first.id
-        second_id = second.id
-
-        new_words = first.add_vocab(second)
-
-        first.renew_id()
-        path_to_new_file = os.path.join(self.path_to_dump, f'{first_id}_{second_id}_{first.id}.{PARTVOCAB_EXT}')
-        pickle.dump(first, open(path_to_new_file, 'wb'))
-        finish_file_dumping(path_to_new_file)
-
-        return first, new_words
-
-
-def get_vocab(path_to_file: str) -> Counter:
-    vocab = Counter()
+def add_to_vocab(vocab: Counter, path_to_file: str) -> Counter:
     with open(path_to_file, 'r') as f:
         for line in f:
             vocab.update(line.rstrip('\n').split(' '))
     return vocab
 
 
-def create_and_dump_partial_vocab(param):
-    path_to_file, path_to_dump, chunk = param
-    vocab = get_vocab(path_to_file)
-    partial_vocab = PartialVocab(vocab, chunk)
+def get_vocab(path_to_file: str) -> Counter:
+    return add_to_vocab(Counter(), path_to_file)
+
+
+def dump_partial_vocab(partial_vocab: PartialVocab, path_to_dump: str) -> None:
     pickle.dump(partial_vocab, open(os.path.join(path_to_dump, f'{partial_vocab.id}.{PARTVOCAB_EXT}'), 'wb'))
-    return partial_vocab
+
+
+def create_and_dump_partial_vocabs(param) -> List[PartialVocab]:
+    """
+    Folds all the files of a chunk into one counter. The counter is dumped as a partial vocab
+    and a new one is started only when the estimated size of the counter exceeds the memory budget.
+    """
+    files, path_to_dump, chunk, memory_budget_mb = param
+    max_words = memory_budget_mb * 1024 * 1024 // ESTIMATED_BYTES_PER_WORD
+    partial_vocabs = []
+    vocab = Counter()
+    stats = []
+    for file in files:
+        add_to_vocab(vocab, file)
+        stats.append(get_stats_entry(len(stats) + 1, vocab))
+        if len(vocab) > max_words:
+            logger.info(f'[chunk {chunk}] Memory budget exceeded, spilling vocab of {len(stats)} files to disk')
+            partial_vocabs.append(PartialVocab(vocab, chunk, stats))
+            dump_partial_vocab(partial_vocabs[-1], path_to_dump)
+            vocab = Counter()
+            stats = []
+    if stats:
+        partial_vocabs.append(PartialVocab(vocab, chunk, stats))
+        dump_partial_vocab(partial_vocabs[-1], path_to_dump)
+    return partial_vocabs
 
 
 def finish_file_dumping(path_to_new_file):
@@ -227,11 +181,89 @@ def finish_file_dumping(path_to_new_file):
     return new_file, (first_file, second_file)
 
 
-def list_to_queue(lst: List) -> Queue:
-    queue = Queue()
-    for elm in lst:
-        queue.put_nowait(elm)
-    return queue
+def finish_merged_vocab_dumping(path_to_sources_file: str) -> None:
+    """
+    If the merged vocab has been dumped completely, removes the dumps of the vocabs it has been merged from,
+    otherwise removes what has been dumped of the merged vocab.
+    """
+    dir = os.path.dirname(path_to_sources_file)
+    new_id = os.path.basename(path_to_sources_file).split('.')[0]
+    new_file = os.path.join(dir, f'{new_id}.{PARTVOCAB_EXT}')
+    if os.path.exists(new_file):
+        with open(path_to_sources_file, 'r') as f:
+            for source_id in f.read().split('\n'):
+                source_file = os.path.join(dir, f'{source_id}.{PARTVOCAB_EXT}')
+                if os.path.exists(source_file):
+                    os.remove(source_file)
+    elif os.path.exists(f'{new_file}.{NOT_FINISHED_EXT}'):
+        os.remove(f'{new_file}.{NOT_FINISHED_EXT}')
+    os.remove(path_to_sources_file)
+
+
+def dump_merged_partial_vocab(partial_vocab: PartialVocab, source_ids: List[str], path_to_dump: str) -> None:
+    path_to_new_file = os.path.join(path_to_dump, f'{partial_vocab.id}.{PARTVOCAB_EXT}')
+    path_to_sources_file = os.path.join(path_to_dump, f'{partial_vocab.id}.{SOURCES_EXT}')
+    with open(f'{path_to_new_file}.{NOT_FINISHED_EXT}', 'wb') as f:
+        pickle.dump(partial_vocab, f)
+    with open(path_to_sources_file, 'w') as f:
+        f.write('\n'.join(source_ids))
+    os.rename(f'{path_to_new_file}.{NOT_FINISHED_EXT}', path_to_new_file)
+    finish_merged_vocab_dumping(path_to_sources_file)
+
+
+def merge_partial_vocabs(param) -> Tuple[PartialVocab, List[str]]:
+    """
+    Merges a group of partial vocabs into the first one of the group. Each vocab comes with the ids of the dumps
+    it covers. If `spill` is set, the merged vocab is dumped replacing these dumps,
+    otherwise their ids are passed on to be replaced at one of the next levels.
+    """
+    group, path_to_dump, spill = param
+    if len(group) == 1:
+        return group[0]
+
+    start = time.time()
+    first, dumped_ids = group[0]
+    dumped_ids = list(dumped_ids)
+    n_new_words = 0
+    for partial_vocab, ids in group[1:]:
+        n_new_words += len(first.add_vocab(partial_vocab))
+        dumped_ids.extend(ids)
+    first.renew_id()
+    if spill:
+        dump_merged_partial_vocab(first, dumped_ids, path_to_dump)
+        dumped_ids = [first.id]
+    logger.info(f"Merged {len(group)} vocabs in {time.time() - start:.3f} s, new words: {n_new_words}, "
+                f"current vocab size: {len(first.merged_word_counts)}")
+    return first, dumped_ids
+
+
+def reduce_partial_vocabs(partial_vocabs: List[PartialVocab], path_to_dump: str, fan_in: int = DEFAULT_FAN_IN,
+                          spill_levels: Iterable[int] = ()) -> PartialVocab:
+    """
+    Balanced `fan_in`-way tree reduction of partial vocabs. The vocabs are ordered by chunk and id and
+    merged in consecutive groups, so that which vocabs are merged together does not depend on process scheduling.
+    The results of a level are dumped only if the level is in `spill_levels`, the first merge level being 1.
+    """
+    if fan_in < 2:
+        raise ValueError(f'Fan-in must be at least 2, but is {fan_in}')
+    spill_levels = set(spill_levels)
+
+    nodes = [(vocab, [vocab.id]) for vocab in sorted(partial_vocabs, key=lambda v: (v.chunk, v.id))]
+    level = 0
+    with Pool() as pool:
+        while len(nodes) > 1:
+            level += 1
+            spill = level in spill_levels
+            groups = [nodes[i:i + fan_in] for i in range(0, len(nodes), fan_in)]
+            logger.info(f"Level {level}: merging {len(nodes)} vocabs into {len(groups)}"
+                        f"{', spilling results to disk' if spill else ''}")
+            params = [(group, path_to_dump, spill) for group in groups]
+            if len(groups) == 1:
+                # no need to send the vocabs to another process to do the last merge
+                nodes = [merge_partial_vocabs(params[0])]
+            else:
+                nodes = pool.map(merge_partial_vocabs, params, chunksize=1)
+    return nodes[0][0]
 
 
 def create_chunk_generator(total: int, n_chunks: int):
@@ -243,36 +275,238 @@ def create_chunk_generator(total: int, n_chunks: int):
         yield i
 
 
-def create_initial_partial_vocabs(all_files, path_to_dump: str):
+def create_initial_partial_vocabs(all_files, path_to_dump: str, memory_budget_mb: int):
     partial_vocabs_queue = []
-    files_total = len(all_files)
-    current_file = 0
-    chunk_generator = create_chunk_generator(len(all_files), N_CHUNKS)
-    params = [(file, path_to_dump, chunk) for file, chunk in zip(all_files, chunk_generator)]
+    n_chunks = max(N_CHUNKS, multiprocessing.cpu_count())
+    files_in_chunks = defaultdict(list)
+    for file, chunk in zip(all_files, create_chunk_generator(len(all_files), n_chunks)):
+        files_in_chunks[chunk].append(file)
+    chunks_total = len(files_in_chunks)
+    current_chunk = 0
+    params = [(files, path_to_dump, chunk, memory_budget_mb) for chunk, files in files_in_chunks.items()]
     pool = Pool()
-    partial_vocab_it = pool.imap_unordered(create_and_dump_partial_vocab, params)
-    for partial_vocab in partial_vocab_it:
-        partial_vocabs_queue.append(partial_vocab)
-        current_file += 1
-        logger.info(f"To partial vocabs added  {current_file} out of {files_total}")
+    partial_vocab_it = pool.imap_unordered(create_and_dump_partial_vocabs, params)
+    for partial_vocabs in partial_vocab_it:
+        partial_vocabs_queue.extend(partial_vocabs)
+        current_chunk += 1
+        logger.info(f"Chunks of files processed: {current_chunk} out of {chunks_total}, "
+                    f"partial vocabs created: {len(partial_vocabs_queue)}")
     pool.terminate()
     return partial_vocabs_queue
 
 
-def create_chunk_queue(chunk_sizes: Dict[int, int], num_mergers: int) -> Tuple[Queue, int]:
-    chunk_queue_list = [chunk for chunk, chunk_size in chunk_sizes.items() for _ in range(chunk_size - 1)]
-    return list_to_queue(chunk_queue_list + [-1 for _ in range(num_mergers)]), len(chunk_queue_list)
-
+# Out-of-core calculation of the vocab: word counts are written to disk as runs sorted by word
+# and then merged in a streaming fashion, so that the whole vocab is never held in memory.
+# Each entry of a run is (word, count, index of the first file the word occurs in).
 
-def mapify_tasks(tasks: List[PartialVocab]) -> Tuple[Dict[int, Queue], Dict[int, int]]:
-    task_lists_in_chunks = defaultdict(list)
-    for task in tasks:
-        task_lists_in_chunks[task.chunk].append(task)
-    return {chunk: list_to_queue(task_list_in_chunk) for chunk, task_list_in_chunk in
-            task_lists_in_chunks.items()}, {k: len(v) for k, v in task_lists_in_chunks.items()}
+def write_run(entries: Iterable[Tuple[str, int, int]], path_to_run: str) -> None:
+    with open(path_to_run, 'w', encoding='utf-8', newline='\n') as f:
+        for word, count, first_file in entries:
+            f.write(f'{count} {first_file} {word}\n')
 
 
-def run(full_src_dir, full_metadata_dir):
+def read_run(path_to_run: str) -> Iterator[Tuple[str, int, int]]:
+    with open(path_to_run, 'r', encoding='utf-8', newline='\n') as f:
+        for line in f:
+            count, first_file, word = line[:-1].split(' ', 2)
+            yield word, int(count), int(first_file)
+
+
+def merge_runs_by_word(runs: List[Iterator[Tuple[str, int, int]]]) -> Iterator[Tuple[str, int, int]]:
+    for word, entries in groupby(heapq.merge(*runs, key=itemgetter(0)), key=itemgetter(0)):
+        count = 0
+        first_file = None
+        for _, c, f in entries:
+            count += c
+            first_file = f if first_file is None else min(first_file, f)
+        yield word, count, first_file
+
+
+def by_count(entry: Tuple[str, int, int]) -> Tuple[int, str]:
+    return -entry[1], entry[0]
+
+
+def merge_runs_by_count(runs: List[Iterator[Tuple[str, int, int]]]) -> Iterator[Tuple[str, int, int]]:
+    return heapq.merge(*runs, key=by_count)
+
+
+def merge_run_files(run_files: List[str], path_to_runs: str, merge_func: Callable[[List[Iterator]], Iterator],
+                    max_runs_to_merge: int = MAX_RUNS_TO_MERGE) -> Iterator[Tuple[str, int, int]]:
+    """
+    If there are more than `max_runs_to_merge` runs, they are merged in groups into new runs first.
+    """
+    level = 0
+    while len(run_files) > max_runs_to_merge:
+        merged_run_files = []
+        for i in range(0, len(run_files), max_runs_to_merge):
+            group = run_files[i:i + max_runs_to_merge]
+            merged_run_file = os.path.join(path_to_runs, f'merged_{level}_{len(merged_run_files)}.{RUN_EXT}')
+            write_run(merge_func([read_run(file) for file in group]), merged_run_file)
+            for file in group:
+                os.remove(file)
+            merged_run_files.append(merged_run_file)
+        run_files = merged_run_files
+        level += 1
+    return merge_func([read_run(file) for file in run_files])
+
+
+def create_runs(param) -> Tuple[List[str], Dict[int, Tuple[int, int]]]:
+    """
+    Counts words in the files of a chunk, a run is written every time the number of words exceeds the memory budget.
+    Files are passed together with their indices and have to be ordered by them.
+
+    :return: files the runs were written to and the number of placeholders for non-english words in each file
+    """
+    files, path_to_runs, chunk, memory_budget_mb = param
+    max_words = memory_budget_mb * 1024 * 1024 // ESTIMATED_BYTES_PER_WORD
+    run_files = []
+    placeholder_counts = {}
+    word_counts = {}
+    first_files = {}
+
+    def dump_run():
+        run_file = os.path.join(path_to_runs, f'{chunk}_{len(run_files)}.{RUN_EXT}')
+        write_run(((word, word_counts[word], first_files[word]) for word in sorted(word_counts)), run_file)
+        run_files.append(run_file)
+
+    for file_index, file in files:
+        file_vocab = get_vocab(file)
+        placeholder_counts[file_index] = (file_vocab[placeholders['non_eng']],
+                                          file_vocab[placeholders['non_eng_content']])
+        for word, count in file_vocab.items():
+            if word in word_counts:
+                word_counts[word] += count
+            else:
+                word_counts[word] = count
+                first_files[word] = file_index
+        if len(word_counts) > max_words:
+            dump_run()
+            word_counts = {}
+            first_files = {}
+    if word_counts:
+        dump_run()
+    return run_files, placeholder_counts
+
+
+def sort_by_count(entries: Iterator[Tuple[str, int, int]], path_to_runs: str, memory_budget_mb: int,
+                  max_runs_to_merge: int = MAX_RUNS_TO_MERGE) -> Iterator[Tuple[str, int, int]]:
+    max_words = memory_budget_mb * 1024 * 1024 // ESTIMATED_BYTES_PER_WORD
+    run_files = []
+    buffer = []
+    for entry in entries:
+        buffer.append(entry)
+        if len(buffer) > max_words:
+            run_files.append(os.path.join(path_to_runs, f'by_count_{len(run_files)}.{RUN_EXT}'))
+            write_run(sorted(buffer, key=by_count), run_files[-1])
+            buffer = []
+    if buffer:
+        run_files.append(os.path.join(path_to_runs, f'by_count_{len(run_files)}.{RUN_EXT}'))
+        write_run(sorted(buffer, key=by_count), run_files[-1])
+    return merge_run_files(run_files, path_to_runs, merge_runs_by_count, max_runs_to_merge)
+
+
+def write_stats_from_first_occurrences(first_occurrences: List[int], placeholder_counts: Dict[int, Tuple[int, int]],
+                                       path_to_stats_file: str) -> None:
+    """
+    :param first_occurrences: number of words first occurring in each of the files
+    """
+    n_files = len(first_occurrences)
+    vocabsize, non_eng, non_eng_content = 0, 0, 0
+    lines = []
+    for file_index, new_words in enumerate(first_occurrences):
+        vocabsize += new_words
+        non_eng += placeholder_counts[file_index][0]
+        non_eng_content += placeholder_counts[file_index][1]
+        lines.append(f"{(file_index + 1) / n_files:.4f} {vocabsize} {non_eng} {non_eng_content}\n")
+    with open(path_to_stats_file, 'w') as f:
+        f.write(f'{vocabsize}\n')
+        f.writelines(lines)
+
+
+def calc_vocab_out_of_core(all_files: List[str], path_to_runs: str, full_metadata_dir: str,
+                           memory_budget_mb: int, max_runs_to_merge: int = MAX_RUNS_TO_MERGE) -> None:
+    if os.path.exists(path_to_runs):
+        shutil.rmtree(path_to_runs)
+    os.makedirs(path_to_runs)
+
+    indexed_files = list(enumerate(sorted(all_files)))
+    n_chunks = max(N_CHUNKS, multiprocessing.cpu_count())
+    params = [(indexed_files[chunk::n_chunks], path_to_runs, chunk, memory_budget_mb) for chunk in range(n_chunks)]
+    run_files = []
+    placeholder_counts = {}
+    with Pool() as pool:
+        for chunk_run_files, chunk_placeholder_counts in pool.imap_unordered(create_runs, params):
+            run_files.extend(chunk_run_files)
+            placeholder_counts.update(chunk_placeholder_counts)
+    logger.info(f"{len(run_files)} runs are written, merging them...")
+
+    first_occurrences = [0] * len(indexed_files)
+
+    def count_first_occurrences(entries):
+        for entry in entries:
+            first_occurrences[entry[2]] += 1
+            yield entry
+
+    merged = count_first_occurrences(merge_run_files(sorted(run_files), path_to_runs, merge_runs_by_word,
+                                                     max_runs_to_merge))
+    sorted_vocab = ((word, count) for word, count, _ in sort_by_count(merged, path_to_runs, memory_budget_mb,
+                                                                      max_runs_to_merge))
+    io.dump_dict_into_2_columns(sorted_vocab, os.path.join(full_metadata_dir, VOCAB_FILENAME))
+    write_stats_from_first_occurrences(first_occurrences, placeholder_counts,
+                                       os.path.join(full_metadata_dir, VOCABSIZE_FILENAME))
+    shutil.rmtree(path_to_runs)
+
+
+# Estimation of the vocab growth curve with HyperLogLog sketches. Files are split into contiguous segments.
+# For each segment a sketch of its words is built, and snapshots of it are taken at the points of the curve
+# falling into the segment. The curve is then calculated by merging the sketches in the order of the segments.
+
+def sketch_segment(param) -> Tuple[HyperLogLog, List[Tuple[int, HyperLogLog, int, int]], Tuple[int, int]]:
+    files, start, points, precision = param
+    sketch = HyperLogLog(precision)
+    non_eng, non_eng_content = 0, 0
+    snapshots = []
+    for i, file in enumerate(files):
+        file_vocab = get_vocab(file)
+        sketch.update(file_vocab.keys())
+        non_eng += file_vocab[placeholders['non_eng']]
+        non_eng_content += file_vocab[placeholders['non_eng_content']]
+        n_files = start + i + 1
+        if n_files in points:
+            snapshots.append((n_files, sketch.copy(), non_eng, non_eng_content))
+    return sketch, snapshots, (non_eng, non_eng_content)
+
+
+def estimate_vocab_growth(all_files: List[str], path_to_stats_file: str, precision: int = DEFAULT_PRECISION,
+                          n_points: int = DEFAULT_N_SKETCH_POINTS) -> None:
+    files = sorted(all_files)
+    n_files_total = len(files)
+    points = {max(1, n_files_total * (i + 1) // n_points) for i in range(n_points)}
+    n_segments = max(N_CHUNKS, multiprocessing.cpu_count())
+    segment_size = math.ceil(n_files_total / n_segments)
+    params = [(files[start:start + segment_size], start, points, precision)
+              for start in range(0, n_files_total, segment_size)]
+    with Pool() as pool:
+        segments = pool.map(sketch_segment, params, chunksize=1)
+
+    sketch = HyperLogLog(precision)
+    non_eng, non_eng_content = 0, 0
+    lines = []
+    for segment_sketch, snapshots, (segment_non_eng, segment_non_eng_content) in segments:
+        for n_files, snapshot, snapshot_non_eng, snapshot_non_eng_content in snapshots:
+            vocabsize = len(snapshot.merge(sketch))
+            lines.append(f"{n_files / n_files_total:.4f} {vocabsize} {non_eng + snapshot_non_eng} "
+                         f"{non_eng_content + snapshot_non_eng_content}\n")
+        sketch.merge(segment_sketch)
+        non_eng += segment_non_eng
+        non_eng_content += segment_non_eng_content
+    with open(path_to_stats_file, 'w') as f:
+        f.write(f'{len(sketch)}\n')
+        f.writelines(lines)
+
+
+def run(full_src_dir, full_metadata_dir, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, fan_in=DEFAULT_FAN_IN,
+        spill_levels: Iterable[int] = (), out_of_core=False, sketch_precision: Optional[int] = None):
     if not os.path.exists(full_src_dir):
         logger.error(f"Dir does not exist: {full_src_dir}")
         exit(3)
@@ -288,10 +522,26 @@ def run(full_src_dir, full_metadata_dir):
         logger.warning("No preprocessed files found.")
         exit(4)
 
+    if sketch_precision is not None:
+        logger.info(f"Estimating vocabulary growth with sketches of precision {sketch_precision}, "
+                    f"the vocab is not going to be saved")
+        estimate_vocab_growth(all_files, os.path.join(full_metadata_dir, VOCABSIZE_FILENAME), sketch_precision)
+        logger.info(f'Vocab size stats are saved to {full_metadata_dir}')
+        return
+
+    if out_of_core:
+        logger.info("Calculating vocabulary out of core, the field file is not going to be created")
+        calc_vocab_out_of_core(all_files, os.path.join(full_metadata_dir, 'vocab_runs'), full_metadata_dir,
+                               memory_budget_mb)
+        logger.info(f'Vocab files are saved to {full_metadata_dir}')
+        return
+
     path_to_dump = os.path.join(full_metadata_dir, 'part_vocab')
     dumps_valid_file = os.path.join(path_to_dump, 'ready')
 
     if os.path.exists(dumps_valid_file):
+        for sources_file in list(file_mapper(path_to_dump, lambda l: l, SOURCES_EXT)):
+            finish_merged_vocab_dumping(sources_file)
         all_files = [file for file in file_mapper(path_to_dump, lambda l: l, PARTVOCAB_EXT)]
         task_list = []
         removed_files = []
@@ -312,29 +562,19 @@ def run(full_src_dir, full_metadata_dir):
         if os.path.exists(path_to_dump):
             shutil.rmtree(path_to_dump)
         os.makedirs(path_to_dump)
-        task_list = create_initial_partial_vocabs(all_files, path_to_dump)
+        task_list = create_initial_partial_vocabs(all_files, path_to_dump, memory_budget_mb)
         open(dumps_valid_file, 'a').close()
 
-    num_mergers = multiprocessing.cpu_count()
-    logger.info(f"Using {num_mergers} mergers, number of partial vocabs: {len(task_list)}")
-    queue_size.value = len(task_list)
-    merger_counter = AtomicInteger(num_mergers)
-    tasks_queues, chunk_sizes = mapify_tasks(task_list)
-    chunk_queue, chunk_queue_size = create_chunk_queue(chunk_sizes, num_mergers)
     logger.info(f'==================    Starting merging    =================')
-    logger.info(f'Merges need to be done: {chunk_queue_size}')
-    chunk_queue_elm_counter = AtomicInteger(chunk_queue_size)
-    mergers = [VocabMerger(i + 1, tasks_queues, path_to_dump, merger_counter, chunk_queue, chunk_queue_elm_counter) for
-               i in range(num_mergers)]
-    for merger in mergers:
-        merger.start()
-    
-
-    for i, merger in enumerate(mergers):
-        merger.join()
-        logger.info(f'Merger {merger.id} has joined ({i+1}/{len(mergers)})')
+    logger.info(f"Number of partial vocabs: {len(task_list)}, fan-in: {fan_in}, "
+                f"levels to spill at: {sorted(spill_levels)}")
+    vocab = reduce_partial_vocabs(task_list, path_to_dump, fan_in, spill_levels)
 
-    os.kill(os.getpid(), signal.SIGTERM)
+    vocab.write_stats(os.path.join(full_metadata_dir, VOCABSIZE_FILENAME))
+    vocab.write_vocab(os.path.join(full_metadata_dir, VOCAB_FILENAME))
+    vocab.write_field(os.path.join(full_metadata_dir, TEXT_FIELD_FILE))
+    shutil.rmtree(path_to_dump)
+    logger.info(f'Vocab files are saved to {full_metadata_dir}')
 
 
 if __name__ == '__main__':
@@ -344,6 +584,20 @@ if __name__ == '__main__':
     parser.add_argument('--base-from', action='store', default=DEFAULT_PARSED_DATASETS_DIR)
     parser.add_argument('dataset', action='store', help=f'dataset name')
     parser.add_argument('repr', action='store', help=f'repr name')
+    parser.add_argument('--memory-budget', action='store', type=int, default=DEFAULT_MEMORY_BUDGET_MB,
+                        help='approximate memory (MB) a worker can use for its vocab before spilling it to disk')
+    parser.add_argument('--fan-in', action='store', type=int, default=DEFAULT_FAN_IN,
+                        help='number of partial vocabs merged into one at each level of the reduction tree')
+    parser.add_argument('--spill-levels', action='store', type=int, nargs='*', default=[],
+                        help='levels of the reduction tree (starting from 1) which results are dumped to disk at, '
+                             'so that the merging can be resumed from them')
+    parser.add_argument('--out-of-core', action='store_true',
+                        help='merge word counts sorted on disk instead of in memory, for vocabs larger than RAM; '
+                             'the field file is not created in this mode')
+    parser.add_argument('--sketch', action='store', type=int, nargs='?', const=DEFAULT_PRECISION, default=None,
+                        metavar='PRECISION',
+                        help='only estimate the vocab growth curve using HyperLogLog sketches with 2^PRECISION '
+                             'registers, the vocab itself is not saved')
 
     args = parser.parse_known_args(*DEFAULT_VOCABSIZE_ARGS)
     args = args[0]
@@ -352,4 +606,5 @@ if __name__ == '__main__':
     full_src_dir = os.path.join(path_to_dataset, REPR_DIR, args.repr, TRAIN_DIR)
     full_metadata_dir = os.path.join(path_to_dataset, METADATA_DIR, args.repr)
 
-    run(full_src_dir, full_metadata_dir)
+    run(full_src_dir, full_metadata_dir, args.memory_budget, args.fan_in, args.spill_levels,
+        args.out_of_core, args.sketch)
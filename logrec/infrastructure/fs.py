@@ -9,8 +9,9 @@ import dill as pickle
 from torchtext.data import Field
 
 from fastai.nlp import RNN_Learner
-from logrec.dataprep import MODELS_DIR, TEXT_FIELD_FILE, REPR_DIR, TRAIN_DIR, VALID_DIR, TEST_DIR, \
+from logrec.dataprep import MODELS_DIR, TEXT_FIELD_FILE, COMPACT_VOCAB_FILE, REPR_DIR, TRAIN_DIR, VALID_DIR, TEST_DIR, \
     CLASSIFICATION_DIR, PARSED_DIR, METADATA_DIR
+from logrec.dataprep.compact_vocab import load_field
 from logrec.util.io import dump_dict_into_2_columns
 from logrec.infrastructure import fractions_manager
 from logrec.infrastructure.config_manager import find_most_similar_config, find_name_for_new_config
@@ -342,4 +343,7 @@ class FS(object):
     def load_text_field(self):
         path_to_metadata = self.path_to_base_metadata if self.base_model_specified else self.path_to_metadata
         logger.debug(f'Loading field from {path_to_metadata}')
+        path_to_compact_vocab = os.path.join(path_to_metadata, COMPACT_VOCAB_FILE)
+        if os.path.exists(path_to_compact_vocab):
+            return load_field(path_to_compact_vocab)
         return pickle.load(open(os.path.join(path_to_metadata, TEXT_FIELD_FILE), 'rb'))
@@ -0,0 +1,42 @@
+import bz2
+import lzma
+import zlib
+from collections import namedtuple
+from functools import partial
+from typing import Dict
+
+# `id` is what is stored in the headers of files, it must never change for an existing codec
+Codec = namedtuple('Codec', ['id', 'name', 'compress', 'decompress'])
+
+
+def _identity(data: bytes) -> bytes:
+    return data
+
+
+# gzip is deflate with a header and a checksum around it,
+# for small independently compressed records zlib with the same level is used instead
+CODECS = [
+    Codec(0, 'none', _identity, _identity),
+    Codec(1, 'zlib-1', partial(zlib.compress, level=1), zlib.decompress),
+    Codec(2, 'zlib-6', partial(zlib.compress, level=6), zlib.decompress),
+    Codec(3, 'zlib-9', partial(zlib.compress, level=9), zlib.decompress),
+    Codec(4, 'bz2', partial(bz2.compress, compresslevel=9), bz2.decompress),
+    Codec(5, 'lzma', partial(lzma.compress, preset=1), lzma.decompress),
+]
+
+DEFAULT_CODEC = 'zlib-6'
+
+_codecs_by_name: Dict[str, Codec] = {codec.name: codec for codec in CODECS}
+_codecs_by_id: Dict[int, Codec] = {codec.id: codec for codec in CODECS}
+
+
+def get_codec(name: str) -> Codec:
+    if name not in _codecs_by_name:
+        raise ValueError(f'Unknown codec: {name}, available codecs: {list(_codecs_by_name.keys())}')
+    return _codecs_by_name[name]
+
+
+def get_codec_by_id(id: int) -> Codec:
+    if id not in _codecs_by_id:
+        raise ValueError(f'Unknown codec id: {id}')
+    return _codecs_by_id[id]
@@ -0,0 +1,66 @@
+import math
+from hashlib import blake2b
+
+DEFAULT_PRECISION = 14
+
+
+def _hash(item: str) -> int:
+    return int.from_bytes(blake2b(item.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog(object):
+    """
+    Sketch estimating the number of distinct strings added to it with the relative error of about 1.04 / sqrt(2 ** p)
+    using 2 ** p bytes of memory. Sketches with the same precision can be merged,
+    the result is the sketch of the union of the strings added to them.
+
+    Strings are hashed with blake2b, so sketches created in different processes are compatible.
+    """
+
+    def __init__(self, p: int = DEFAULT_PRECISION, registers: bytes = None):
+        if not 4 <= p <= 18:
+            raise ValueError(f'Precision must be between 4 and 18, but is {p}')
+        self.p = p
+        self.m = 1 << p
+        if registers is not None and len(registers) != self.m:
+            raise ValueError(f'Expected {self.m} registers, but got {len(registers)}')
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+
+    def add(self, item: str) -> None:
+        x = _hash(item)
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, items) -> None:
+        for item in items:
+            self.add(item)
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """
+        Merges `other` into this sketch (modifies this sketch!)
+        """
+        if other.p != self.p:
+            raise ValueError(f'Cannot merge sketches with different precisions: {self.p} and {other.p}')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def copy(self) -> 'HyperLogLog':
+        return HyperLogLog(self.p, self.registers)
+
+    def estimate(self) -> float:
+        if self.m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / self.m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[self.m]
+        raw = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * self.m and zeros:
+            # linear counting is more precise for small cardinalities
+            return self.m * math.log(self.m / zeros)
+        return raw
+
+    def __len__(self):
+        return int(round(self.estimate()))
@@ -5,15 +5,17 @@ from heapq import heappush, heappop, heapify
 class PriorityCounter(object):
     REMOVED = '<removed-task>'  # placeholder for a removed task
 
-    def __init__(self, d):
-        self.counter = itertools.count()
+    def __init__(self, d, start_count=0):
+        self.counter = itertools.count(start_count)
         self.pq = [[-value, next(self.counter), key] for key, value in d.items()]  # list of entries arranged in a heap
         heapify(self.pq)
         self.entry_finder = {entry[2]: entry for entry in self.pq}  # mapping of tasks to entries
+        self.next_count = start_count + len(self.pq)
 
     def add(self, pair, to_add):
         'Add a new task or update the priority of an existing task'
         count = next(self.counter)
+        self.next_count = count + 1
         to_add = -to_add
         if pair in self.entry_finder:
             entry = self.entry_finder[pair]
@@ -37,3 +39,15 @@ class PriorityCounter(object):
                 del self.entry_finder[pair]
                 return pair
         raise KeyError('pop from an empty priority queue')
+
+    def get_state(self):
+        'Return live entries and the next count, the order in which pairs are popped is fully determined by them'
+        return [tuple(entry) for entry in self.entry_finder.values()], self.next_count
+
+    @classmethod
+    def from_state(cls, entries, next_count):
+        priority_counter = cls({}, next_count)
+        priority_counter.pq = [list(entry) for entry in entries]
+        heapify(priority_counter.pq)
+        priority_counter.entry_finder = {entry[2]: entry for entry in priority_counter.pq}
+        return priority_counter
@@ -0,0 +1,62 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from array import array
+
+from logrec.dataprep.compact_vocab import create_field, dump_compact_vocab, load_compact_vocab, load_field
+
+
+class CompactVocabTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file = os.path.join(self.tmp_dir, 'TEXT.vocab')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_dump_load(self):
+        itos = ['<unk>', '<pad>', 'a', 'ändern', '\t', '']
+        counts = array('q', [0, 0, 5, 1, 2, 3])
+
+        dump_compact_vocab(itos, counts, self.file)
+
+        self.assertEqual((itos, counts), load_compact_vocab(self.file))
+
+    def test_dump_load_empty(self):
+        dump_compact_vocab([], array('q'), self.file)
+
+        self.assertEqual(([], array('q')), load_compact_vocab(self.file))
+
+    def test_create_field(self):
+        text_field, itos, counts = create_field({'b': 3, 'a': 1, '<pad>': 2})
+
+        self.assertEqual(['<unk>', '<pad>', 'a', 'b'], itos)
+        self.assertEqual(array('q', [0, 2, 1, 3]), counts)
+        self.assertEqual(3, text_field.vocab.stoi['b'])
+        self.assertEqual(0, text_field.vocab.stoi['unknown'])
+        self.assertEqual({'<pad>': 1, 'a': 1, 'b': 1}, text_field.vocab.freqs)
+        self.assertEqual(4, len(text_field.vocab))
+
+    def test_load_field(self):
+        _, itos, counts = create_field({'b': 3, 'a': 1})
+        dump_compact_vocab(itos, counts, self.file)
+
+        text_field = load_field(self.file)
+
+        self.assertEqual(itos, text_field.vocab.itos)
+        self.assertEqual(2, text_field.vocab.stoi['a'])
+
+    def test_pickle_does_not_include_lazy_attributes(self):
+        text_field, _, _ = create_field({'b': 3, 'a': 1})
+        _ = text_field.vocab.stoi
+
+        vocab = pickle.loads(pickle.dumps(text_field.vocab))
+
+        self.assertNotIn('stoi', vocab.__dict__)
+        self.assertEqual(3, vocab.stoi['b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
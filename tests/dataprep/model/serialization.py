@@ -0,0 +1,84 @@
+import pickle
+import unittest
+
+from logrec.dataprep.model.chars import NewLine, Tab, Backslash, Quote, MultilineCommentStart, MultilineCommentEnd, \
+    OneLineCommentStart
+from logrec.dataprep.model.containers import SplitContainer, OneLineComment, MultilineComment, StringLiteral
+from logrec.dataprep.model.logging import LogStatement, LoggableBlock, INFO, UNKNOWN
+from logrec.dataprep.model.noneng import NonEng
+from logrec.dataprep.model.numeric import Number, HexStart, DecimalPoint, E, L, F, D
+from logrec.dataprep.model.serialization import encode, decode, is_encoded
+from logrec.dataprep.model.word import Word, Underscore, ParseableToken
+from logrec.dataprep.preprocessors.core import apply_preprocessors
+from logrec.dataprep.preprocessors.general import from_file
+from logrec.dataprep.preprocessors.preprocessor_list import pp_params
+
+text = '''
+package org.example;
+
+/* Utility class
+   ändern für Übersetzung */
+public class MyUtil { // TODO
+    private static final long MAX_VALUE = 0x7fL;
+    double d = 1.5e10d;
+
+    void log() {
+        if (d > 0) {
+            LOGGER.info("Value of \\"d\\" is " + d + '\\t');
+        }
+    }
+}
+'''
+
+
+class SerializationTest(unittest.TestCase):
+    def __test_round_trip(self, token_list):
+        encoded = encode(token_list)
+
+        self.assertTrue(is_encoded(encoded))
+        self.assertFalse(is_encoded(pickle.dumps(token_list)))
+        decoded = decode(encoded)
+        self.assertEqual(token_list, decoded)
+        self.assertEqual(repr(token_list), repr(decoded))
+
+    def test_empty(self):
+        self.__test_round_trip([])
+
+    def test_all_token_types(self):
+        self.__test_round_trip([
+            NewLine(), Tab(), Backslash(), Quote(), MultilineCommentStart(), MultilineCommentEnd(),
+            OneLineCommentStart(), '{', '', ParseableToken('int a'),
+            SplitContainer([Underscore(), Word.from_('my'), NonEng(Word.from_('Übersetzung')), Word.from_('HTTP'),
+                            Word('i', Word.from_('i').capitalization), Word.from_('iPhone')]),
+            Number([HexStart(), '7', 'f', L()]), Number(['1', DecimalPoint(), '5', E(), '1', F(), D()]),
+            OneLineComment([SplitContainer.from_single_token('todo')]),
+            MultilineComment([SplitContainer.from_single_token('ändern'), NewLine()]),
+            StringLiteral([]),
+            LoggableBlock([LogStatement(SplitContainer.from_single_token('LOGGER'),
+                                        SplitContainer.from_single_token('info'), INFO,
+                                        [StringLiteral([SplitContainer.from_single_token("Hi")])], ['x'])]),
+            LogStatement(None, SplitContainer.from_single_token('log'), UNKNOWN, None, None),
+            [['nested']],
+        ])
+
+    def test_preprocessed_file(self):
+        token_list = apply_preprocessors(from_file(text.split("\n")), pp_params["preprocessors"], {
+            'interesting_context_words': []
+        })
+
+        self.__test_round_trip(token_list)
+
+    def test_unsupported_type(self):
+        with self.assertRaises(ValueError):
+            encode([1.5])
+
+    def test_unsupported_version(self):
+        encoded = bytearray(encode(['a']))
+        encoded[1] = 100
+
+        with self.assertRaises(ValueError):
+            decode(bytes(encoded))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import pickle
+import unittest
+
+from logrec.dataprep.model.chars import NewLine, Tab
+from logrec.dataprep.model.containers import SplitContainer, StringLiteral
+from logrec.dataprep.model.logging import LogStatement, INFO
+from logrec.dataprep.model.numeric import DecimalPoint, Number
+from logrec.dataprep.model.word import Word, Capitalization
+
+
+class SlotsTest(unittest.TestCase):
+    def test_stateless_tokens_are_singletons(self):
+        self.assertIs(NewLine(), NewLine())
+        self.assertIs(DecimalPoint(), DecimalPoint())
+        self.assertIsNot(NewLine(), Tab())
+        self.assertIs(NewLine(), pickle.loads(pickle.dumps(NewLine())))
+
+    def test_no_instance_dict(self):
+        for token in [NewLine(), Word.from_('a'), SplitContainer([]), StringLiteral([]), Number(['1'])]:
+            self.assertFalse(hasattr(token, '__dict__'))
+
+    def test_pickle(self):
+        token_list = [NewLine(), SplitContainer([Word.from_('Http')]), Number(['1', DecimalPoint(), '5']),
+                      StringLiteral([SplitContainer.from_single_token('a')]),
+                      LogStatement(SplitContainer.from_single_token('log'), SplitContainer.from_single_token('info'),
+                                   INFO, [], [])]
+
+        self.assertEqual(token_list, pickle.loads(pickle.dumps(token_list)))
+
+    def test_setstate_from_attribute_dict(self):
+        # state that objects had before the classes got slots
+        word = Word.__new__(Word)
+        word.__setstate__({'canonic_form': 'http', 'capitalization': Capitalization.ALL})
+
+        self.assertEqual(Word.from_('HTTP'), word)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import gzip
+import os
+import pickle
+import shutil
+import struct
+import tempfile
+import unittest
+import zlib
+
+from logrec.dataprep.parsed_file import ParsedFile, ParsedFileWriter, dump_record, MAGIC, HEADER_SIZE
+from logrec.util.compression import CODECS
+
+params = {'param': None}
+token_lists = [['class', 'A', '{', '}'], [], ['ändern', '\t', '\n'], ['x'] * 1000]
+
+
+class ParsedFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file = os.path.join(self.tmp_dir, 'project.parsed')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self):
+        with ParsedFileWriter(self.file, params) as writer:
+            for token_list in token_lists[:-1]:
+                writer.write(token_list)
+            # token lists used to be pickled
+            writer.write_compressed(dump_record(token_lists[-1]))
+
+    def test_iterate(self):
+        self.write()
+
+        with ParsedFile(self.file) as parsed_file:
+            self.assertTrue(parsed_file.indexed)
+            self.assertEqual(params, parsed_file.params)
+            self.assertEqual(token_lists, list(parsed_file))
+
+    def test_random_access(self):
+        self.write()
+
+        with ParsedFile(self.file) as parsed_file:
+            self.assertEqual(len(token_lists), len(parsed_file))
+            self.assertEqual(token_lists[2], parsed_file[2])
+            self.assertEqual(token_lists[0], parsed_file[0])
+            with self.assertRaises(IndexError):
+                parsed_file[len(token_lists)]
+
+    def test_iterate_range(self):
+        self.write()
+
+        with ParsedFile(self.file) as parsed_file:
+            self.assertEqual(token_lists[1:3], list(parsed_file.iterate(1, 3)))
+            self.assertEqual(token_lists[2:], list(parsed_file.iterate(2, 100)))
+            self.assertEqual([], list(parsed_file.iterate(3, 3)))
+
+    def test_empty(self):
+        with ParsedFileWriter(self.file, params):
+            pass
+
+        with ParsedFile(self.file) as parsed_file:
+            self.assertEqual(0, len(parsed_file))
+            self.assertEqual([], list(parsed_file))
+
+    def test_not_finished(self):
+        writer = ParsedFileWriter(self.file, params)
+        writer.write(token_lists[0])
+        writer.handle.close()
+
+        with self.assertRaises(ValueError):
+            ParsedFile(self.file)
+
+    def test_exception_while_writing(self):
+        with self.assertRaises(KeyError):
+            with ParsedFileWriter(self.file, params) as writer:
+                writer.write(token_lists[0])
+                raise KeyError()
+
+        self.assertTrue(writer.handle.closed)
+        self.assertFalse(os.path.exists(self.file))
+
+    def test_exception_while_reading(self):
+        self.write()
+
+        with self.assertRaises(KeyError):
+            with ParsedFile(self.file) as parsed_file:
+                parsed_file[0]
+                raise KeyError()
+
+        self.assertTrue(parsed_file.handle.closed)
+        with ParsedFile(self.file) as parsed_file:
+            self.assertEqual(token_lists, list(parsed_file))
+
+    def test_codecs(self):
+        for codec in CODECS:
+            with self.subTest(codec=codec.name):
+                with ParsedFileWriter(self.file, params, codec.name) as writer:
+                    for token_list in token_lists:
+                        writer.write(token_list)
+
+                with ParsedFile(self.file) as parsed_file:
+                    self.assertEqual(codec.name, parsed_file.codec.name)
+                    self.assertEqual(params, parsed_file.params)
+                    self.assertEqual(token_lists, list(parsed_file))
+                    self.assertEqual(token_lists[2], parsed_file[2])
+
+    def test_version_1(self):
+        records = [zlib.compress(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)) for obj in [params] + token_lists]
+        offsets = [HEADER_SIZE]
+        for record in records:
+            offsets.append(offsets[-1] + len(record))
+        with open(self.file, 'wb') as f:
+            f.write(struct.pack('<8sIQQ', MAGIC, 1, len(records), offsets[-1]).ljust(HEADER_SIZE, b'\0'))
+            for record in records:
+                f.write(record)
+            f.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+
+        with ParsedFile(self.file) as parsed_file:
+            self.assertEqual(params, parsed_file.params)
+            self.assertEqual(token_lists, list(parsed_file))
+
+    def test_legacy_format(self):
+        with gzip.GzipFile(self.file, 'wb') as f:
+            pickle.dump(params, f, pickle.HIGHEST_PROTOCOL)
+            for token_list in token_lists:
+                pickle.dump(token_list, f, pickle.HIGHEST_PROTOCOL)
+
+        with ParsedFile(self.file) as parsed_file:
+            self.assertFalse(parsed_file.indexed)
+            self.assertEqual(params, parsed_file.params)
+            self.assertEqual(token_lists, list(parsed_file))
+            with self.assertRaises(TypeError):
+                parsed_file[0]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,8 @@ import unittest
 from logrec.dataprep.model.noneng import NonEng
 from logrec.dataprep.model.word import Word, Underscore
 from logrec.dataprep.preprocessors.preprocessor_list import pp_params
-from logrec.dataprep.preprocessors.core import apply_preprocessors
+from logrec.dataprep.preprocessors.core import apply_preprocessors, streamable, PreprocessingPlan, \
+    PreprocessingStats
 from logrec.dataprep.preprocessors.general import from_file
 from logrec.dataprep.model.chars import NewLine, Tab, Backslash, Quote
 from logrec.dataprep.model.containers import OneLineComment, SplitContainer, StringLiteral, MultilineComment
@@ -24,6 +25,10 @@ class ApplyPreprocessorsTest(unittest.TestCase):
             'interesting_context_words': []})
         self.assertEqual(expected, res)
 
+        streamed = apply_preprocessors(from_file([l for l in input.split("\n")]), pp_params["preprocessors"], {
+            'interesting_context_words': []}, streaming=True)
+        self.assertEqual(expected, streamed)
+
     def test_1(self):
         text = '''
 long[] lovely_longs = {0x34a35EL,     0x88bc96fl           , -0x34L};
@@ -339,6 +344,90 @@ MyClass Class CONSTANT VAR_WITH_UNDERSCORES
 
         self.__test_apply_preprocessors(text, expected_result)
 
+    def test_streaming_with_not_streamable_preprocessor(self):
+        def double_stream(tokens, context):
+            for token in tokens:
+                yield token * 2
+
+        @streamable(double_stream)
+        def double(token_list, context):
+            return [token * 2 for token in token_list]
+
+        def count(token_list, context):
+            return token_list, [('count', len(token_list))]
+
+        context = {}
+        res = apply_preprocessors(['a', 'b'], [double, count, double], context, streaming=True)
+
+        self.assertEqual(['aaaa', 'bbbb'], res)
+        self.assertEqual({'count': 2}, context)
+
+
+
+def double(token_list, context):
+    return [token * 2 for token in token_list]
+
+
+def drop_first(token_list, context):
+    return token_list[1:]
+
+
+class PreprocessingPlanTest(unittest.TestCase):
+    def test_names_resolved_once(self):
+        plan = PreprocessingPlan(["java.process_numeric_literals", "split.simple_split"])
+
+        self.assertEqual(["java.process_numeric_literals", "split.simple_split"], plan.stage_names)
+        self.assertEqual("process_numeric_literals", plan.preprocessors[0].__name__)
+
+    def test_stats(self):
+        plan = PreprocessingPlan([double, drop_first])
+
+        self.assertEqual(['bb', 'cc'], plan.apply(['a', 'b', 'c'], {}))
+        self.assertEqual(['bb'], plan.apply(['a', 'b'], {}, streaming=True))
+
+        stats = plan.collect_stats()
+        self.assertEqual(['core.double', 'core.drop_first'], stats.stage_names)
+        self.assertEqual(2, stats.runs)
+        self.assertEqual(5, stats.input_token_count)
+        self.assertEqual(3, stats.output_token_count)
+        self.assertEqual(1, stats.timed_runs)
+        self.assertEqual([5, 3], stats.stage_token_counts)
+        self.assertEqual(0, plan.stats.runs)
+
+    def test_stats_streaming(self):
+        plan = PreprocessingPlan([double, drop_first])
+
+        plan.apply(['a', 'b', 'c'], {}, streaming=True)
+
+        stats = plan.collect_stats()
+        self.assertEqual(0, stats.timed_runs)
+        self.assertEqual([3, 2], stats.stage_token_counts)
+        self.assertEqual([0.0, 0.0], stats.stage_times)
+
+    def test_merge_stats(self):
+        plan = PreprocessingPlan([double, drop_first])
+        plan.apply(['a', 'b', 'c'], {})
+        stats = PreprocessingStats(plan.stage_names)
+
+        stats.merge(plan.collect_stats())
+        stats.merge(plan.collect_stats())
+
+        self.assertEqual(1, stats.runs)
+        self.assertEqual([3, 2], stats.stage_token_counts)
+        with self.assertRaises(ValueError):
+            stats.merge(PreprocessingStats(['core.double']))
+
+    def test_merge_cache_lookups(self):
+        stats = PreprocessingStats(['core.double'])
+        other = PreprocessingStats(['core.double'])
+        stats.add_cache_lookups('split', 1, 4)
+        other.add_cache_lookups('split', 2, 2)
+
+        stats.merge(other)
+
+        self.assertEqual({'split': [3, 6]}, stats.cache_lookups)
+        self.assertIn('split cache hit rate: 50.0% (3 hits out of 6 lookups)', str(stats))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,12 +1,18 @@
+import random
 import unittest
 
-from logrec.dataprep.preprocessors.java import process_comments_and_str_literals
-from logrec.dataprep.model.chars import OneLineCommentStart, NewLine, Quote, MultilineCommentStart, MultilineCommentEnd
+from logrec.dataprep.preprocessors.core import apply_preprocessors
+from logrec.dataprep.preprocessors.general import from_file
+from logrec.dataprep.preprocessors.java import process_comments_and_str_literals, process_numeric_literals, \
+    is_number, find_comments_and_str_literals
+from logrec.dataprep.model.chars import OneLineCommentStart, NewLine, Quote, MultilineCommentStart, MultilineCommentEnd, \
+    Backslash, Tab
 
 
 # TODO write explanations with normal strings
 from logrec.dataprep.model.containers import SplitContainer, StringLiteral, OneLineComment, MultilineComment
-from logrec.dataprep.model.word import Word, Underscore
+from logrec.dataprep.model.numeric import Number, HexStart, L, DecimalPoint, E, F
+from logrec.dataprep.model.word import Word, Underscore, ParseableToken
 
 
 class JavaTest(unittest.TestCase):
@@ -83,6 +89,120 @@ class JavaTest(unittest.TestCase):
 
         self.assertEqual(expected, actual)
 
+    def test_process_numeric_literals(self):
+        tokens = [ParseableToken("a = 0x1FL + b2 - 1.5e3f;"), NewLine(), ParseableToken("")]
+
+        actual = process_numeric_literals(tokens, {})
+
+        expected = [ParseableToken("a = "),
+                    Number([HexStart(), '1', 'F', L()]),
+                    ParseableToken(" + b2 - "),
+                    Number(['1', DecimalPoint(), '5', E(), '3', F()]),
+                    ParseableToken(";"),
+                    NewLine()]
+
+        self.assertEqual(expected, actual)
+
+    def test_process_numeric_literals_no_digits(self):
+        actual = process_numeric_literals([ParseableToken("int a = b;")], {})
+
+        self.assertEqual([ParseableToken("int a = b;")], actual)
+
+    def test_process_numeric_literals_number_at_line_end(self):
+        self.assertEqual([ParseableToken("return 5")], process_numeric_literals([ParseableToken("return 5")], {}))
+        self.assertEqual([Number(['-', '5'])], process_numeric_literals([ParseableToken("-5")], {}))
+
+    def test_is_number(self):
+        self.assertTrue(is_number("0x7fL"))
+        self.assertTrue(is_number(".5d"))
+        self.assertFalse(is_number("a1"))
+        self.assertFalse(is_number(""))
+
+
+def reference_find_comments_and_str_literals(token_list):
+    """
+    Two-pass implementation comparing tokens with `==`, which `find_comments_and_str_literals` has to be equivalent to
+    """
+    symbols = []
+    for ind in range(len(token_list)):
+        if token_list[ind] == Quote():
+            i = ind - 1
+            while i >= 0 and token_list[i] == Backslash():
+                i -= 1
+            if (ind - i) % 2 == 1 and (ind == 0 or token_list[ind - 1] != "'" or ind + 1 >= len(token_list)
+                                       or token_list[ind + 1] != "'"):
+                symbols.append((ind, token_list[ind]))
+        elif token_list[ind] in [MultilineCommentStart(), MultilineCommentEnd(), OneLineCommentStart(), NewLine()]:
+            symbols.append((ind, token_list[ind]))
+
+    active_symbol, active_symbol_index = None, -1
+    segments_to_remove = []
+    for index, symbol in symbols:
+        if active_symbol is None:
+            if symbol == MultilineCommentEnd():
+                return None
+            elif symbol != NewLine():
+                active_symbol, active_symbol_index = symbol, index
+        elif active_symbol == Quote():
+            if symbol == NewLine():
+                return None
+            elif symbol == Quote():
+                segments_to_remove.append((active_symbol_index, index, StringLiteral))
+                active_symbol, active_symbol_index = None, -1
+        elif active_symbol == OneLineCommentStart():
+            if symbol == NewLine():
+                segments_to_remove.append((active_symbol_index, index, OneLineComment))
+                active_symbol, active_symbol_index = None, -1
+        elif active_symbol == MultilineCommentStart():
+            if symbol == MultilineCommentEnd():
+                segments_to_remove.append((active_symbol_index, index, MultilineComment))
+                active_symbol, active_symbol_index = None, -1
+    return segments_to_remove
+
+
+regression_corpus = [
+    '''String s = "a // b /* c */"; // comment with "quotes"''',
+    '''/* multi
+    line "comment" // with a one-line comment start
+    */ int a = 1; /* /* not nested */''',
+    '''char q = '"'; String s = "'"; char b = '\\\\'; char c = '\\"';''',
+    '''String s = "escaped \\" quote", t = "backslash \\\\", u = "\\\\\\" three";''',
+    '''String unterminated = "abc
+    ;''',
+    '''int a; */ int b;''',
+    '''// "unterminated in a comment
+    /** javadoc with "quote */ String s = "//";''',
+    '''String s = "a" + "" + "/*" + "*/";''',
+    '''"''',
+    '''/*''',
+    '''//''',
+]
+
+
+class CommentsAndStrLiteralsRegressionTest(unittest.TestCase):
+    def __test_same_as_reference(self, token_list):
+        self.assertEqual(reference_find_comments_and_str_literals(token_list), find_comments_and_str_literals(token_list))
+
+    def test_corpus(self):
+        for text in regression_corpus:
+            token_list = apply_preprocessors(from_file(text.split("\n")), [
+                "java.process_numeric_literals",
+                "general.replace_4whitespaces_with_tabs",
+                "lexer.tokenize_verbose",
+                "split.simple_split",
+            ], {})
+            with self.subTest(text=text):
+                self.__test_same_as_reference(token_list)
+
+    def test_random_token_lists(self):
+        rnd = random.Random(7)
+        tokens = [Quote(), Backslash(), MultilineCommentStart(), MultilineCommentEnd(), OneLineCommentStart(), NewLine(),
+                  "'", "a", Tab()]
+        for _ in range(3000):
+            token_list = [rnd.choice(tokens) for _ in range(rnd.randint(0, 12))]
+            with self.subTest(token_list=token_list):
+                self.__test_same_as_reference(token_list)
+
 
 if __name__ == '__main__':
     unittest.main()
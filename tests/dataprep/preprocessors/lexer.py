@@ -0,0 +1,38 @@
+import unittest
+
+from logrec.dataprep.model.chars import MultilineCommentStart, MultilineCommentEnd, Tab
+from logrec.dataprep.model.containers import SplitContainer
+from logrec.dataprep.model.word import ParseableToken, Word
+from logrec.dataprep.preprocessors.general import spl_verbose
+from logrec.dataprep.preprocessors.lexer import tokenize_verbose
+
+
+class LexerTest(unittest.TestCase):
+    def __test_same_as_spl_verbose(self, token_list):
+        expected = spl_verbose(token_list, None)
+        actual = tokenize_verbose(token_list, None)
+
+        self.assertEqual(expected, actual)
+        self.assertEqual([type(t) for t in expected], [type(t) for t in actual])
+
+    def test_code(self):
+        text = '''
+float[] floats = {}; //floats were removed 
+BigAWESOMEString[] a2y = "abc".doSplit("\\"");
+~-|=?==!=/* gj **/
+\tx <<= 0x1fE >>> 2; ändern++'''
+        self.__test_same_as_spl_verbose([ParseableToken(text)])
+
+    def test_multiline_comment_tokens_take_precedence(self):
+        self.assertEqual([ParseableToken('a'), '/', MultilineCommentStart(), '*', MultilineCommentEnd()],
+                         tokenize_verbose([ParseableToken('a//***/')], None))
+        self.__test_same_as_spl_verbose([ParseableToken('a//***/')])
+        self.__test_same_as_spl_verbose([ParseableToken('**/=/*/')])
+
+    def test_other_tokens(self):
+        self.__test_same_as_spl_verbose([Tab(), ParseableToken(''), ParseableToken('  '),
+                                         SplitContainer([Word.from_('a'), ParseableToken('b+c')])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,8 @@ import unittest
 
 from logrec.dataprep.model.containers import StringLiteral, SplitContainer
 from logrec.dataprep.model.word import ParseableToken, Underscore, Word
-from logrec.dataprep.preprocessors.split import simple_split
+from logrec.dataprep.preprocessors.split import simple_split, split_identifier, split_cache_hit_rate, \
+    split_cache_lookups
 
 
 class SplitTest(unittest.TestCase):
@@ -23,6 +24,17 @@ class SplitTest(unittest.TestCase):
         ])])]
         self.assertEqual(actual, expected)
 
+    def test_cached_splitting(self):
+        split_identifier.cache_clear()
+
+        first, second = simple_split([ParseableToken("getName"), ParseableToken("getName")], {})
+
+        self.assertEqual(SplitContainer([Word.from_("get"), Word.from_("Name")]), first)
+        self.assertEqual(first, second)
+        self.assertIsNot(first.get_subtokens(), second.get_subtokens())
+        self.assertEqual((1, 2), split_cache_lookups())
+        self.assertEqual(0.5, split_cache_hit_rate())
+
 
 if __name__ == '__main__':
     unittest.main()
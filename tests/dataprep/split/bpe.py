@@ -0,0 +1,195 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from logrec.dataprep import METADATA_DIR, BPE_DIR
+from logrec.dataprep.split import bpe
+from logrec.dataprep.split.bpe import get_stats, merge_vocab, BpeLearner, save_checkpoint, load_checkpoint
+from logrec.dataprep.util import dump_dict_into_2_columns
+
+vocab = {
+    'g e t N a m e': 120,
+    's e t N a m e': 45,
+    'n a m e': 30,
+    'a a a a': 11,
+    'a a b a a b': 7,
+    'b a a': 5,
+    'N a N': 3,
+    'i': 300
+}
+
+
+def learn_with_merge_vocab(v, n_merges):
+    pairs = get_stats(v)
+    merges = []
+    for _ in range(n_merges):
+        try:
+            best = pairs.pop_pair()
+        except KeyError:
+            break
+        merges.append(best)
+        v = merge_vocab(best, v, pairs)
+    return merges, v
+
+
+def learn_with_bpe_learner(v, n_merges):
+    learner = BpeLearner(v)
+    pairs = learner.get_stats()
+    merges = []
+    for _ in range(n_merges):
+        try:
+            best = pairs.pop_pair()
+        except KeyError:
+            break
+        merges.append(learner.to_symbols(best))
+        learner.merge(best, pairs)
+    return merges, learner.get_vocab()
+
+
+class BpeLearnerTest(unittest.TestCase):
+    def test_same_as_merge_vocab(self):
+        expected_merges, expected_vocab = learn_with_merge_vocab(dict(vocab), 10)
+        actual_merges, actual_vocab = learn_with_bpe_learner(dict(vocab), 10)
+
+        self.assertEqual(expected_merges, actual_merges)
+        self.assertEqual(list(expected_vocab.items()), list(actual_vocab.items()))
+
+    def test_same_as_merge_vocab_until_no_pairs_left(self):
+        expected_merges, expected_vocab = learn_with_merge_vocab(dict(vocab), 1000)
+        actual_merges, actual_vocab = learn_with_bpe_learner(dict(vocab), 1000)
+
+        self.assertEqual(expected_merges, actual_merges)
+        self.assertEqual(list(expected_vocab.items()), list(actual_vocab.items()))
+
+    def test_merge_only_touches_words_with_pair(self):
+        learner = BpeLearner({'a b c': 1, 'c d': 2, 'a b': 3})
+        pairs = learner.get_stats()
+
+        best = pairs.pop_pair()
+        learner.merge(best, pairs)
+
+        self.assertEqual(('a', 'b'), learner.to_symbols(best))
+        self.assertEqual({'ab c': 1, 'c d': 2, 'ab': 3}, learner.get_vocab())
+        self.assertNotIn(best, learner.pair_index)
+
+    def test_parallel_stats_same_as_sequential(self):
+        learner = BpeLearner(dict(vocab))
+
+        expected = learner.get_stats()
+        actual = learner.get_stats(workers=2)
+
+        self.assertEqual(expected.pq, actual.pq)
+        self.assertEqual(expected.entry_finder, actual.entry_finder)
+
+    def test_parallel_init_same_as_sequential(self):
+        expected = BpeLearner(dict(vocab))
+        actual = BpeLearner(dict(vocab), workers=2)
+
+        self.assertEqual(expected.symbols, actual.symbols)
+        self.assertEqual(expected.words, actual.words)
+        self.assertEqual(expected.freqs, actual.freqs)
+        self.assertEqual(dict(expected.pair_index), dict(actual.pair_index))
+
+        expected_pairs = expected.get_stats()
+        actual_pairs = actual.get_stats(workers=2)
+        while True:
+            try:
+                expected_pair = expected_pairs.pop_pair()
+            except KeyError:
+                self.assertRaises(KeyError, actual_pairs.pop_pair)
+                break
+            self.assertEqual(expected_pair, actual_pairs.pop_pair())
+
+
+class BpeCheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.default_parsed_datasets_dir = bpe.DEFAULT_PARSED_DATASETS_DIR
+        bpe.DEFAULT_PARSED_DATASETS_DIR = self.tmp_dir
+        for dataset in ['uninterrupted', 'checkpointed']:
+            path_to_metadata = os.path.join(self.tmp_dir, dataset, METADATA_DIR, 'repr')
+            os.makedirs(path_to_metadata)
+            dump_dict_into_2_columns({''.join(k.split(' ')): v for k, v in vocab.items()},
+                                     os.path.join(path_to_metadata, bpe.VOCAB_FILE_NAME))
+
+    def tearDown(self):
+        bpe.DEFAULT_PARSED_DATASETS_DIR = self.default_parsed_datasets_dir
+        shutil.rmtree(self.tmp_dir)
+
+    def __read_bpe_dir(self, dataset, n_merges):
+        path_to_bpe_dir = os.path.join(self.tmp_dir, dataset, METADATA_DIR, 'repr', BPE_DIR, str(n_merges))
+        res = {}
+        for file in sorted(os.listdir(path_to_bpe_dir)):
+            with open(os.path.join(path_to_bpe_dir, file), 'rb') as f:
+                res[file] = f.read()
+        return res
+
+    def test_resume_from_checkpoint(self):
+        expected_merges, expected_vocab = learn_with_bpe_learner(dict(vocab), 12)
+
+        learner = BpeLearner(dict(vocab))
+        pairs = learner.get_stats()
+        merges = []
+        for _ in range(5):
+            best = pairs.pop_pair()
+            merges.append(learner.to_symbols(best))
+            learner.merge(best, pairs)
+        path_to_checkpoint = os.path.join(self.tmp_dir, bpe.CHECKPOINT_FILE_NAME)
+        save_checkpoint(path_to_checkpoint, learner, pairs, merges, {})
+
+        learner, pairs, merges, non_splittable_vocab = load_checkpoint(path_to_checkpoint)
+        for _ in range(7):
+            best = pairs.pop_pair()
+            merges.append(learner.to_symbols(best))
+            learner.merge(best, pairs)
+
+        self.assertEqual(expected_merges, merges)
+        self.assertEqual(list(expected_vocab.items()), list(learner.get_vocab().items()))
+
+    def test_run_with_checkpoints(self):
+        bpe.run('uninterrupted', 'repr', 10, reset=False)
+        bpe.run('checkpointed', 'repr', 10, reset=False, checkpoint_every=4)
+
+        self.assertEqual(self.__read_bpe_dir('uninterrupted', 10), self.__read_bpe_dir('checkpointed', 10))
+        self.assertEqual(sorted(['4', '8', '10']),
+                         sorted(os.listdir(os.path.join(self.tmp_dir, 'checkpointed', METADATA_DIR, 'repr', BPE_DIR))))
+
+    def test_run_with_several_n_merges(self):
+        bpe.run('uninterrupted', 'repr', 10, reset=False)
+        bpe.run('checkpointed', 'repr', [0, 3, 10, 6], reset=False)
+
+        self.assertEqual(self.__read_bpe_dir('uninterrupted', 10), self.__read_bpe_dir('checkpointed', 10))
+        self.assertEqual(sorted(['0', '3', '6', '10']),
+                         sorted(os.listdir(os.path.join(self.tmp_dir, 'checkpointed', METADATA_DIR, 'repr', BPE_DIR))))
+        self.assertEqual(3, len(self.__read_bpe_dir('checkpointed', 3)[bpe.MERGES_FILE_NAME].splitlines()))
+
+    def __bpe_dirs(self, dataset):
+        return sorted(os.listdir(os.path.join(self.tmp_dir, dataset, METADATA_DIR, 'repr', BPE_DIR)), key=int)
+
+    def __merges(self, dataset, n_merges):
+        return self.__read_bpe_dir(dataset, n_merges)[bpe.MERGES_FILE_NAME].splitlines()
+
+    def test_resume_from_existing_bpe_dir(self):
+        bpe.run('checkpointed', 'repr', 3, reset=False)
+
+        bpe.run('checkpointed', 'repr', [6, 10], reset=False)
+
+        self.assertEqual(['3', '6', '10'], self.__bpe_dirs('checkpointed'))
+        self.assertEqual(6, len(self.__merges('checkpointed', 6)))
+        self.assertEqual(10, len(self.__merges('checkpointed', 10)))
+        self.assertEqual(self.__merges('checkpointed', 3), self.__merges('checkpointed', 10)[:3])
+
+    def test_resume_from_bpe_dir_not_bigger_than_smallest_target(self):
+        bpe.run('checkpointed', 'repr', [3, 10], reset=False)
+        merges_10 = self.__merges('checkpointed', 10)
+
+        bpe.run('checkpointed', 'repr', [6, 10], reset=False)
+
+        self.assertEqual(['3', '6', '10'], self.__bpe_dirs('checkpointed'))
+        self.assertEqual(merges_10, self.__merges('checkpointed', 10))
+        self.assertEqual(6, len(self.__merges('checkpointed', 6)))
+        self.assertEqual(self.__merges('checkpointed', 3), self.__merges('checkpointed', 6)[:3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from logrec.dataprep.split.bpe_encode import BpeEncoder, encode
+
+merges = {
+    ('a', 'a'): 0,
+    ('e', 'r'): 1,
+    ('aa', 'a'): 2,
+    ('g', 'e'): 3,
+    ('ge', 't'): 4,
+    ('n', 'a'): 5,
+}
+
+
+class BpeEncoderTest(unittest.TestCase):
+    def test_encode(self):
+        encoder = BpeEncoder(merges)
+
+        self.assertEqual(['get', 'na', 'm', 'er'], encoder.encode('getnamer'))
+
+    def test_encode_leftmost_pair_is_merged_first(self):
+        encoder = BpeEncoder(merges)
+
+        self.assertEqual(['aa', 'aaa'], encoder.encode('aaaaa'))
+
+    def test_encode_short_words(self):
+        encoder = BpeEncoder(merges)
+
+        self.assertEqual(['x'], encoder.encode('x'))
+        self.assertEqual([''], encoder.encode(''))
+
+    def test_encode_with_merges_list(self):
+        encoder = BpeEncoder([('a', 'b'), ('ab', 'c')])
+
+        self.assertEqual(['abc', 'a'], encoder.encode('abca'))
+
+    def test_encode_many_uses_cache(self):
+        encoder = BpeEncoder(merges)
+
+        actual = encoder.encode_many(['getter', 'naan', 'getter'])
+
+        self.assertEqual([['get', 't', 'er'], ['n', 'aa', 'n'], ['get', 't', 'er']], actual)
+        self.assertEqual(1, encoder.cache_info().hits)
+
+    def test_encode_dict(self):
+        self.assertEqual({'get t er': 3, 'aaa': 1}, encode({'getter': 3, 'aaa': 1}, merges))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from logrec.dataprep.split.merges_cache import dump_merges_cache, MergesCache
+
+merges_cache = {
+    'getname': ['get', 'name'],
+    'i': ['i'],
+    'ändern': ['än', 'dern'],
+    'abc': ['a', 'bc'],
+    'abcd': ['a', 'bc', 'd'],
+    '\\t': ['\\t'],
+}
+
+
+class MergesCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'merges_cache.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_dump_and_lookup(self):
+        dump_merges_cache(merges_cache, self.path)
+        cache = MergesCache(self.path)
+
+        self.assertEqual(len(merges_cache), len(cache))
+        for word, subwords in merges_cache.items():
+            self.assertIn(word, cache)
+            self.assertEqual(subwords, cache[word])
+            self.assertEqual(subwords, cache.get(word))
+
+    def test_missing_words(self):
+        dump_merges_cache(merges_cache, self.path)
+        cache = MergesCache(self.path)
+
+        for word in ['', 'ab', 'abcde', 'zzz', 'Getname']:
+            self.assertNotIn(word, cache)
+            self.assertIsNone(cache.get(word))
+        with self.assertRaises(KeyError):
+            cache['ab']
+
+    def test_empty(self):
+        dump_merges_cache({}, self.path)
+        cache = MergesCache(self.path)
+
+        self.assertEqual(0, len(cache))
+        self.assertIsNone(cache.get('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
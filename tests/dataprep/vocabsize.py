@@ -0,0 +1,205 @@
+import os
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+
+import dill as pickle
+
+from logrec.dataprep.model.placeholders import placeholders
+from logrec.dataprep.util import read_dict_from_2_columns
+from logrec.dataprep.vocabsize import create_and_dump_partial_vocabs, PARTVOCAB_EXT, ESTIMATED_BYTES_PER_WORD, \
+    PartialVocab, dump_partial_vocab, reduce_partial_vocabs, finish_merged_vocab_dumping, SOURCES_EXT, \
+    NOT_FINISHED_EXT, write_run, read_run, merge_run_files, merge_runs_by_word, calc_vocab_out_of_core, RUN_EXT, \
+    VOCAB_FILENAME, VOCABSIZE_FILENAME
+
+file_contents = [
+    f'class A {{\n}} {placeholders["non_eng"]}\n',
+    f'class B {{ int x ;\n}}\n',
+    f'{placeholders["non_eng"]} {placeholders["non_eng_content"]} x\n',
+]
+
+
+class VocabsizeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.files = []
+        for i, content in enumerate(file_contents):
+            file = os.path.join(self.tmp_dir, f'{i}.repr')
+            with open(file, 'w') as f:
+                f.write(content)
+            self.files.append(file)
+        self.dump_dir = os.path.join(self.tmp_dir, 'dump')
+        os.makedirs(self.dump_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def create_partial_vocabs(self, n):
+        partial_vocabs = []
+        for i in range(n):
+            partial_vocab = PartialVocab(Counter({f'w{i}': 1, 'common': i + 1}), chunk=i)
+            partial_vocab.id = str(i)
+            dump_partial_vocab(partial_vocab, self.dump_dir)
+            partial_vocabs.append(partial_vocab)
+        return partial_vocabs
+
+    def dumped_files(self):
+        return sorted(os.listdir(self.dump_dir))
+
+    def dumped_vocabs(self):
+        vocabs = []
+        for file in os.listdir(self.dump_dir):
+            if file.endswith(f'.{PARTVOCAB_EXT}'):
+                with open(os.path.join(self.dump_dir, file), 'rb') as f:
+                    vocabs.append(pickle.load(f))
+        return sorted(vocabs, key=lambda v: v.id)
+
+    def test_create_and_dump_partial_vocabs(self):
+        partial_vocabs = create_and_dump_partial_vocabs((self.files, self.dump_dir, 7, 1))
+
+        self.assertEqual(1, len(partial_vocabs))
+        partial_vocab = partial_vocabs[0]
+        expected = Counter({'class': 2, '{': 2, '}': 2, 'A': 1, 'B': 1, 'int': 1, 'x': 2, ';': 1,
+                            placeholders['non_eng']: 2, placeholders['non_eng_content']: 1})
+        self.assertEqual(expected, partial_vocab.merged_word_counts)
+        self.assertEqual(7, partial_vocab.chunk)
+        self.assertEqual(3, partial_vocab.n_files)
+        self.assertEqual([(1, 5, 1, 0), (2, 9, 1, 0), (3, 10, 2, 1)], partial_vocab.stats)
+
+        dumped_vocabs = self.dumped_vocabs()
+        self.assertEqual([partial_vocab.id], [v.id for v in dumped_vocabs])
+        self.assertEqual(expected, dumped_vocabs[0].merged_word_counts)
+
+    def test_create_and_dump_partial_vocabs_over_memory_budget(self):
+        # a budget so small that the vocab is spilled after every file that brings more than 3 words
+        memory_budget_mb = 3 * ESTIMATED_BYTES_PER_WORD / 1024 / 1024
+        partial_vocabs = create_and_dump_partial_vocabs((self.files, self.dump_dir, 0, memory_budget_mb))
+
+        self.assertEqual([Counter(['class', 'A', '{', '}', placeholders['non_eng']]),
+                          Counter(['class', 'B', '{', 'int', 'x', ';', '}']),
+                          Counter([placeholders['non_eng'], placeholders['non_eng_content'], 'x'])],
+                         [v.merged_word_counts for v in partial_vocabs])
+        self.assertEqual([1, 1, 1], [v.n_files for v in partial_vocabs])
+        self.assertEqual(sorted(v.id for v in partial_vocabs), [v.id for v in self.dumped_vocabs()])
+
+    def test_reduce_partial_vocabs(self):
+        partial_vocabs = self.create_partial_vocabs(5)
+
+        vocab = reduce_partial_vocabs(partial_vocabs, self.dump_dir, fan_in=2)
+
+        expected = Counter({'w0': 1, 'w1': 1, 'w2': 1, 'w3': 1, 'w4': 1, 'common': 15})
+        self.assertEqual(expected, vocab.merged_word_counts)
+        self.assertEqual(5, vocab.n_files)
+        self.assertEqual((5, 6, 0, 0), vocab.stats[-1])
+        # nothing is dumped if no level is spilled
+        self.assertEqual([f'{i}.{PARTVOCAB_EXT}' for i in range(5)], self.dumped_files())
+
+    def test_reduce_partial_vocabs_wrong_fan_in(self):
+        with self.assertRaises(ValueError):
+            reduce_partial_vocabs(self.create_partial_vocabs(2), self.dump_dir, fan_in=1)
+
+    def test_reduce_partial_vocabs_spill_level(self):
+        partial_vocabs = self.create_partial_vocabs(5)
+
+        # levels: [0, 1] [2, 3] [4] -> [01, 23] [4] -> [0123, 4]
+        reduce_partial_vocabs(partial_vocabs, self.dump_dir, fan_in=2, spill_levels=[2])
+
+        # the dumps of 0-3 are replaced with their merged vocab, 4 has not been merged with anything at level 2
+        dumped_vocabs = {vocab.id: vocab for vocab in self.dumped_vocabs()}
+        self.assertEqual(2, len(dumped_vocabs))
+        self.assertEqual(Counter({'w4': 1, 'common': 5}), dumped_vocabs.pop('4').merged_word_counts)
+        self.assertEqual(Counter({'w0': 1, 'w1': 1, 'w2': 1, 'w3': 1, 'common': 10}),
+                         dumped_vocabs.popitem()[1].merged_word_counts)
+        self.assertEqual(2, len(self.dumped_files()))
+
+    def test_reduce_partial_vocabs_spill_levels_beyond_tree(self):
+        partial_vocabs = self.create_partial_vocabs(5)
+
+        # levels: [0, 1, 2] [3, 4] -> [012, 34]
+        reduce_partial_vocabs(partial_vocabs, self.dump_dir, fan_in=3, spill_levels=[3])
+
+        self.assertEqual([f'{i}.{PARTVOCAB_EXT}' for i in range(5)], self.dumped_files())
+
+    def test_reduce_partial_vocabs_spill_all_levels(self):
+        partial_vocabs = self.create_partial_vocabs(5)
+
+        vocab = reduce_partial_vocabs(partial_vocabs, self.dump_dir, fan_in=2, spill_levels=[1, 2, 3])
+
+        # the dumps of every level are removed once the next level is dumped
+        self.assertEqual([f'{vocab.id}.{PARTVOCAB_EXT}'], self.dumped_files())
+        self.assertEqual(vocab.merged_word_counts, self.dumped_vocabs()[0].merged_word_counts)
+
+    def write_sources_file(self, new_id, source_ids):
+        path_to_sources_file = os.path.join(self.dump_dir, f'{new_id}.{SOURCES_EXT}')
+        with open(path_to_sources_file, 'w') as f:
+            f.write('\n'.join(source_ids))
+        return path_to_sources_file
+
+    def test_finish_merged_vocab_dumping(self):
+        self.create_partial_vocabs(3)
+        merged_vocab = PartialVocab(Counter({'w0': 1, 'w1': 1, 'common': 3}), chunk=0)
+        merged_vocab.id = 'merged'
+        dump_partial_vocab(merged_vocab, self.dump_dir)
+        path_to_sources_file = self.write_sources_file('merged', ['0', '1'])
+
+        finish_merged_vocab_dumping(path_to_sources_file)
+
+        self.assertEqual([f'2.{PARTVOCAB_EXT}', f'merged.{PARTVOCAB_EXT}'], self.dumped_files())
+
+    def test_finish_merged_vocab_dumping_not_finished(self):
+        self.create_partial_vocabs(3)
+        with open(os.path.join(self.dump_dir, f'merged.{PARTVOCAB_EXT}.{NOT_FINISHED_EXT}'), 'wb') as f:
+            f.write(b'truncated')
+        path_to_sources_file = self.write_sources_file('merged', ['0', '1'])
+
+        finish_merged_vocab_dumping(path_to_sources_file)
+
+        self.assertEqual([f'{i}.{PARTVOCAB_EXT}' for i in range(3)], self.dumped_files())
+
+    def test_merge_run_files(self):
+        runs_dir = os.path.join(self.tmp_dir, 'runs')
+        os.makedirs(runs_dir)
+        runs = [[('a', 1, 0), ('b', 2, 0)], [('b', 1, 1), ('c', 1, 1)], [('a', 3, 2)], [('d', 1, 3)], [('c', 2, 4)]]
+        run_files = []
+        for i, run in enumerate(runs):
+            run_files.append(os.path.join(runs_dir, f'{i}.{RUN_EXT}'))
+            write_run(run, run_files[-1])
+
+        merged = list(merge_run_files(run_files, runs_dir, merge_runs_by_word, max_runs_to_merge=2))
+
+        self.assertEqual([('a', 4, 0), ('b', 3, 0), ('c', 3, 1), ('d', 1, 3)], merged)
+        # 5 runs -> 3 -> 2, runs merged at the previous levels are removed
+        self.assertEqual([f'merged_1_0.{RUN_EXT}', f'merged_1_1.{RUN_EXT}'], sorted(os.listdir(runs_dir)))
+        self.assertEqual([('a', 4, 0), ('b', 3, 0), ('c', 1, 1), ('d', 1, 3)],
+                         list(read_run(os.path.join(runs_dir, f'merged_1_0.{RUN_EXT}'))))
+
+    def test_calc_vocab_out_of_core(self):
+        for content in ['y x\nx z\n', 'x\n', f'a b c {placeholders["non_eng"]}\nz\n']:
+            self.files.append(os.path.join(self.tmp_dir, f'{len(self.files)}.repr'))
+            with open(self.files[-1], 'w') as f:
+                f.write(content)
+        in_memory_dir = os.path.join(self.tmp_dir, 'in_memory')
+        out_of_core_dir = os.path.join(self.tmp_dir, 'out_of_core')
+        os.makedirs(in_memory_dir)
+        os.makedirs(out_of_core_dir)
+
+        partial_vocab, = create_and_dump_partial_vocabs((sorted(self.files), self.dump_dir, 0, 1))
+        partial_vocab.write_vocab(os.path.join(in_memory_dir, VOCAB_FILENAME))
+        partial_vocab.write_stats(os.path.join(in_memory_dir, VOCABSIZE_FILENAME))
+        # a budget so small that a run is written after almost every file, the runs are merged 2 at a time
+        memory_budget_mb = 2 * ESTIMATED_BYTES_PER_WORD / 1024 / 1024
+        calc_vocab_out_of_core(self.files, os.path.join(self.tmp_dir, 'runs'), out_of_core_dir, memory_budget_mb,
+                               max_runs_to_merge=2)
+
+        self.assertEqual(read_dict_from_2_columns(os.path.join(in_memory_dir, VOCAB_FILENAME)),
+                         read_dict_from_2_columns(os.path.join(out_of_core_dir, VOCAB_FILENAME)))
+        with open(os.path.join(in_memory_dir, VOCABSIZE_FILENAME)) as f:
+            expected_stats = f.read()
+        with open(os.path.join(out_of_core_dir, VOCABSIZE_FILENAME)) as f:
+            self.assertEqual(expected_stats, f.read())
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, 'runs')))
+
+
+if __name__ == '__main__':
+    unittest.main()
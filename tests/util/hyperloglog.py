@@ -0,0 +1,50 @@
+import pickle
+import unittest
+
+from logrec.util.hyperloglog import HyperLogLog
+
+
+class HyperLogLogTest(unittest.TestCase):
+    def test_empty(self):
+        self.assertEqual(0, len(HyperLogLog()))
+
+    def test_small_cardinality(self):
+        sketch = HyperLogLog()
+        sketch.update(['a', 'b', 'c', 'a', 'ä'])
+        self.assertEqual(4, len(sketch))
+
+    def test_large_cardinality(self):
+        sketch = HyperLogLog(12)
+        sketch.update(f'word{i}' for i in range(50000))
+        self.assertAlmostEqual(50000, sketch.estimate(), delta=50000 * 0.05)
+
+    def test_merge(self):
+        first, second, union = HyperLogLog(10), HyperLogLog(10), HyperLogLog(10)
+        first.update(f'word{i}' for i in range(3000))
+        second.update(f'word{i}' for i in range(2000, 6000))
+        union.update(f'word{i}' for i in range(6000))
+
+        self.assertEqual(union.registers, first.merge(second).registers)
+
+    def test_merge_different_precisions(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(11))
+
+    def test_copy_is_independent(self):
+        sketch = HyperLogLog()
+        sketch.add('a')
+        copy = sketch.copy()
+        sketch.add('b')
+
+        self.assertEqual(1, len(copy))
+        self.assertEqual(2, len(sketch))
+
+    def test_pickle(self):
+        sketch = HyperLogLog(8)
+        sketch.update(['a', 'b'])
+
+        self.assertEqual(sketch.registers, pickle.loads(pickle.dumps(sketch)).registers)
+
+
+if __name__ == '__main__':
+    unittest.main()